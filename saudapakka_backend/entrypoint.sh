@@ -27,5 +27,6 @@ if [ $# -gt 0 ]; then
 else
     echo "Starting Gunicorn..."
     # 120s timeout to handle slow initial requests/migrations if they overlap
-    exec gunicorn saudapakka.wsgi:application --bind 0.0.0.0:8000 --workers 3 --timeout 120
+    # Threaded workers so KYC long-polls (/api/kyc/verify-status/?wait=) hold a thread, not a process
+    exec gunicorn saudapakka.wsgi:application --bind 0.0.0.0:8000 --workers 3 --worker-class gthread --threads 8 --timeout 120
 fi
\ No newline at end of file
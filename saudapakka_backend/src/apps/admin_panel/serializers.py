@@ -1,7 +1,11 @@
+from datetime import timedelta
+
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
+from django.utils import timezone
 from apps.users.serializers import UserSerializer
 from apps.users.models import ExternalAPIKey
+from apps.users import usage
 from apps.properties.models import Property
 from apps.users.models import KYCVerification
 
@@ -63,15 +67,23 @@ class AdminUserDetailSerializer(UserSerializer):
 class APIKeySerializer(serializers.ModelSerializer):
     """
     Serializer for ExternalAPIKey model.
+    Usage combines flushed APIKeyUsage rows with counters still in the shared cache.
     """
     user_id = serializers.UUIDField(source='user.id', read_only=True)
     user_email = serializers.EmailField(source='user.email', read_only=True)
     user_name = serializers.CharField(source='user.full_name', read_only=True)
     key = serializers.SerializerMethodField()
+    last_used_at = serializers.SerializerMethodField()
+    usage = serializers.SerializerMethodField()
+
+    USAGE_WINDOW_DAYS = 30
 
     class Meta:
         model = ExternalAPIKey
-        fields = ['id', 'user_id', 'user_email', 'user_name', 'name', 'key', 'is_active', 'created_at']
+        fields = [
+            'id', 'user_id', 'user_email', 'user_name', 'name', 'key', 'is_active',
+            'rate_limit_per_minute', 'burst_limit', 'last_used_at', 'usage', 'created_at'
+        ]
         read_only_fields = ['id', 'is_active', 'created_at']
 
     def get_key(self, obj):
@@ -81,3 +93,34 @@ class APIKeySerializer(serializers.ModelSerializer):
         if hasattr(obj, '_raw_key'):
             return obj._raw_key
         return f"sPk_{obj.prefix}.*********************"
+
+    def get_last_used_at(self, obj):
+        cached = usage.pending_last_used([obj.pk]).get(obj.pk)
+        if cached and (obj.last_used_at is None or cached > obj.last_used_at):
+            return serializers.DateTimeField().to_representation(cached)
+        return serializers.DateTimeField().to_representation(obj.last_used_at) if obj.last_used_at else None
+
+    def get_usage(self, obj):
+        today = timezone.localdate()
+        since = today - timedelta(days=self.USAGE_WINDOW_DAYS - 1)
+        rows = getattr(obj, 'recent_usage', None)
+        if rows is None:
+            rows = obj.usage.filter(date__gte=since)
+
+        today_totals = dict.fromkeys(usage.METRICS, 0)
+        window_totals = dict.fromkeys(usage.METRICS, 0)
+        for row in rows:
+            if row.date < since:
+                continue
+            for metric in usage.METRICS:
+                window_totals[metric] += getattr(row, metric)
+                if row.date == today:
+                    today_totals[metric] += getattr(row, metric)
+
+        pending_dates = [(today - timedelta(days=n)).isoformat() for n in range(3)]
+        for (_, day, metric), value in usage.pending_usage([obj.pk], pending_dates).items():
+            window_totals[metric] += value
+            if day == today.isoformat():
+                today_totals[metric] += value
+
+        return {'today': today_totals, f'last_{self.USAGE_WINDOW_DAYS}_days': window_totals}
@@ -0,0 +1,26 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.core.cache import dashboard_cache
+from apps.mandates.models import Mandate
+from apps.properties.models import Property
+from apps.users.models import KYCVerification
+
+User = get_user_model()
+
+
+@receiver([post_save, post_delete], sender=Property)
+@receiver([post_save, post_delete], sender=Mandate)
+@receiver([post_save, post_delete], sender=KYCVerification)
+def invalidate_dashboard_stats(sender, **kwargs):
+    """Any write that moves a dashboard counter drops the cached aggregates (once committed)."""
+    transaction.on_commit(dashboard_cache.invalidate)
+
+
+@receiver(post_save, sender=User)
+def invalidate_dashboard_on_signup(sender, instance, created, **kwargs):
+    # Plain user saves (e.g. last_login) do not change the counts
+    if created:
+        transaction.on_commit(dashboard_cache.invalidate)
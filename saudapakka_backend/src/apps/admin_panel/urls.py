@@ -10,6 +10,8 @@ from .views import (
     AdminUserKYCVerify,
     AdminAPIKeyList,
     AdminAPIKeyDelete,
+    AdminCacheStats,
+    AdminThrottleStats,
 )
 
 urlpatterns = [
@@ -32,4 +34,8 @@ urlpatterns = [
     # API Key Management
     path('api-keys/', AdminAPIKeyList.as_view(), name='admin-apikey-list'),
     path('api-keys/<int:pk>/', AdminAPIKeyDelete.as_view(), name='admin-apikey-delete'),
+
+    # System
+    path('system/cache/', AdminCacheStats.as_view(), name='admin-cache-stats'),
+    path('system/throttles/', AdminThrottleStats.as_view(), name='admin-throttle-stats'),
 ]
\ No newline at end of file
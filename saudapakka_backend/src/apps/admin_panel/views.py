@@ -1,6 +1,7 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status, permissions, generics
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.db.models import Count, Q
 from django.utils import timezone
@@ -12,6 +13,10 @@ from django.db.models import Count, Avg, Q
 # Import models from other apps
 from apps.properties.models import Property
 from apps.users.models import BrokerProfile, KYCVerification
+from apps.core.cache import dashboard_cache, namespace_stats
+from apps.core.throttling import throttle_stats
+from apps.core.fieldsets import SparseFieldsetViewMixin
+from apps.properties import fast_read
 
 User = get_user_model()
 
@@ -27,10 +32,14 @@ class AdminDashboardStats(APIView):
     permission_classes = [permissions.IsAdminUser]
 
     def get(self, request):
+        # ~15 aggregate queries; shared across workers and invalidated on writes
+        return Response(dashboard_cache.get_or_set('admin-dashboard-stats', self._build_stats))
+
+    def _build_stats(self):
         now = timezone.now()
         last_30_days = now - timedelta(days=30)
 
-        return Response({
+        return {
             # --- 1. User & Growth Metrics ---
             "users": {
                 "total": User.objects.count(),
@@ -60,8 +69,13 @@ class AdminDashboardStats(APIView):
             # --- 4. Market Intelligence (For Frontend Charts) ---
             "market_insights": {
                 "avg_property_price": Property.objects.filter(verification_status='VERIFIED').aggregate(Avg('total_price'))['total_price__avg'] or 0,
-                "top_localities": Property.objects.values('locality').annotate(count=Count('id')).order_by('-count')[:5],
-                "inventory_by_bhk": Property.objects.values('bhk_config').annotate(count=Count('id')).order_by('bhk_config'),
+                # Grouped by canonical locality so spelling variants count together
+                "top_localities": [
+                    {'locality': row['locality_ref__name'], 'count': row['count']}
+                    for row in Property.objects.filter(locality_ref__isnull=False)
+                    .values('locality_ref', 'locality_ref__name').annotate(count=Count('id')).order_by('-count')[:5]
+                ],
+                "inventory_by_bhk": list(Property.objects.values('bhk_config').annotate(count=Count('id')).order_by('bhk_config')),
             },
 
             # --- 5. System Health ---
@@ -69,13 +83,13 @@ class AdminDashboardStats(APIView):
                 "last_updated": now,
                 "server_time": now.strftime("%Y-%m-%d %H:%M:%S")
             }
-        })
+        }
 
 # ==========================================
 # 2. PROPERTY VERIFICATION WORKFLOW
 # ==========================================
 
-class AdminPropertyList(generics.ListAPIView):
+class AdminPropertyList(SparseFieldsetViewMixin, generics.ListAPIView):
     """
     List properties based on status.
     Usage: /api/admin/properties/?status=PENDING
@@ -90,9 +104,18 @@ class AdminPropertyList(generics.ListAPIView):
 
     def get_queryset(self):
         status_param = self.request.query_params.get('status', 'PENDING')
+        properties = Property.objects.select_related('owner').prefetch_related('images', 'floor_plans')
         if status_param == 'ALL':
-            return Property.objects.all().order_by('-created_at')
-        return Property.objects.filter(verification_status=status_param).order_by('-created_at')
+            return properties.order_by('-created_at')
+        return properties.filter(verification_status=status_param).order_by('-created_at')
+
+    def list(self, request, *args, **kwargs):
+        if settings.FAST_LIST_SERIALIZATION:
+            # values()-based rows, same payload (apps.properties.fast_read)
+            data = fast_read.serialize(self.filter_queryset(self.get_queryset()), self.get_serializer())
+            if data is not None:
+                return Response(data)
+        return super().list(request, *args, **kwargs)
 
 class AdminPropertyAction(APIView):
     """
@@ -127,7 +150,7 @@ class AdminPropertyAction(APIView):
 # 3. USER MANAGEMENT (Brokers/Sellers)
 # ==========================================
 
-class AdminUserList(generics.ListAPIView):
+class AdminUserList(SparseFieldsetViewMixin, generics.ListAPIView):
     """
     List all users with filters.
     Usage: /api/admin/users/?role=BROKER
@@ -139,7 +162,7 @@ class AdminUserList(generics.ListAPIView):
     def get_queryset(self):
         role = self.request.query_params.get('role', 'ALL')
         
-        queryset = User.objects.all().order_by('-date_joined')
+        queryset = User.objects.select_related('kyc_data').order_by('-date_joined')
 
         if role == 'BROKER':
             queryset = queryset.filter(is_active_broker=True)
@@ -277,13 +300,20 @@ class AdminAPIKeyList(generics.ListCreateAPIView):
     """
     List all API keys or create a new one.
     GET /api/admin/api-keys/
-    POST /api/admin/api-keys/ with { "user_id": "...", "name": "..." }
+    POST /api/admin/api-keys/ with { "user_id": "...", "name": "...",
+                                     "rate_limit_per_minute": 60, "burst_limit": 20 }
     """
     permission_classes = [permissions.IsAdminUser]
     
     def get_queryset(self):
-        from apps.users.models import ExternalAPIKey
-        return ExternalAPIKey.objects.all().select_related('user').order_by('-created_at')
+        from django.db.models import Prefetch
+        from apps.users.models import ExternalAPIKey, APIKeyUsage
+        from .serializers import APIKeySerializer
+
+        since = timezone.localdate() - timedelta(days=APIKeySerializer.USAGE_WINDOW_DAYS - 1)
+        return ExternalAPIKey.objects.all().select_related('user').prefetch_related(
+            Prefetch('usage', queryset=APIKeyUsage.objects.filter(date__gte=since), to_attr='recent_usage')
+        ).order_by('-created_at')
     
     def get_serializer_class(self):
         from .serializers import APIKeySerializer
@@ -303,8 +333,18 @@ class AdminAPIKeyList(generics.ListCreateAPIView):
         except User.DoesNotExist:
             return Response({"error": "User not found"}, status=404)
         
+        limits = {}
+        for field in ('rate_limit_per_minute', 'burst_limit'):
+            if request.data.get(field) not in (None, ''):
+                try:
+                    limits[field] = int(request.data[field])
+                except (TypeError, ValueError):
+                    return Response({"error": f"{field} must be an integer"}, status=400)
+                if limits[field] < 1:
+                    return Response({"error": f"{field} must be at least 1"}, status=400)
+
         # Create the key
-        api_key = ExternalAPIKey.objects.create(user=user, name=name)
+        api_key = ExternalAPIKey.objects.create(user=user, name=name, **limits)
         
         from .serializers import APIKeySerializer
         serializer = APIKeySerializer(api_key)
@@ -320,3 +360,37 @@ class AdminAPIKeyDelete(generics.DestroyAPIView):
     def get_queryset(self):
         from apps.users.models import ExternalAPIKey
         return ExternalAPIKey.objects.all()
+
+
+# ==========================================
+# 5. SYSTEM
+# ==========================================
+
+class AdminCacheStats(APIView):
+    """
+    Per-namespace hit/miss counters of the shared cache (all workers combined).
+    GET /api/admin/system/cache/
+    """
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        from django.conf import settings
+        return Response({
+            "backend": settings.CACHE_BACKEND,
+            "namespaces": namespace_stats(),
+        })
+
+
+class AdminThrottleStats(APIView):
+    """
+    Allowed/throttled decisions per throttle scope (all workers combined).
+    GET /api/admin/system/throttles/
+    """
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        from django.conf import settings
+        return Response({
+            "backend": settings.RATELIMIT_BACKEND,
+            "scopes": throttle_stats(),
+        })
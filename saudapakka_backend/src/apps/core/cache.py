@@ -0,0 +1,256 @@
+"""
+Shared cache helpers.
+
+All gunicorn workers talk to the same CACHES['default'] (Redis or the Postgres
+UNLOGGED table), so anything cached here is visible to every process.
+
+Usage:
+    dashboard_cache = CacheNamespace('dashboard', timeout=60)
+    stats = dashboard_cache.get_or_set('admin-stats', build_stats)
+    dashboard_cache.invalidate()   # O(1): bumps the namespace version
+
+Hit/miss counts are kept per namespace in memory and pushed to the shared
+cache in small batches so instrumentation does not double the cache traffic.
+"""
+import threading
+import time
+from collections import OrderedDict, defaultdict
+
+from django.core.cache import caches
+
+STATS_FLUSH_INTERVAL = 10  # seconds between pushes of local hit/miss counters
+
+_registry = {}
+_stats_lock = threading.Lock()
+_local_stats = defaultdict(lambda: {'hits': 0, 'misses': 0})
+_last_flush = time.monotonic()
+
+
+class CacheNamespace:
+    """A named, versioned slice of the shared cache."""
+
+    def __init__(self, name, timeout=300, alias='default'):
+        self.name = name
+        self.timeout = timeout
+        self.alias = alias
+        _registry[name] = self
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    # --- Versioning ---
+
+    def _version_key(self):
+        return f"ns:{self.name}:version"
+
+    def version(self):
+        version = self.cache.get(self._version_key())
+        if version is None:
+            # Start from a timestamp so a flushed cache never reuses old keys
+            version = int(time.time())
+            if not self.cache.add(self._version_key(), version, timeout=None):
+                version = self.cache.get(self._version_key(), version)
+        return version
+
+    def invalidate(self):
+        """Drops every key in the namespace by moving to a new version."""
+        try:
+            return self.cache.incr(self._version_key())
+        except ValueError:
+            version = int(time.time())
+            self.cache.set(self._version_key(), version, timeout=None)
+            return version
+
+    def make_key(self, key, version=None):
+        return f"{self.name}:v{version or self.version()}:{key}"
+
+    # --- Cache operations ---
+
+    def get(self, key, default=None):
+        value = self.cache.get(self.make_key(key), _MISSING)
+        record(self.name, hit=value is not _MISSING)
+        return default if value is _MISSING else value
+
+    def set(self, key, value, timeout=None):
+        self.cache.set(self.make_key(key), value, self.timeout if timeout is None else timeout)
+
+    def add(self, key, value, timeout=None):
+        return self.cache.add(self.make_key(key), value, self.timeout if timeout is None else timeout)
+
+    def delete(self, key):
+        self.cache.delete(self.make_key(key))
+
+    def get_or_set(self, key, default, timeout=None):
+        """Returns the cached value, computing it with `default()` on a miss."""
+        version = self.version()
+        full_key = self.make_key(key, version)
+        value = self.cache.get(full_key, _MISSING)
+        record(self.name, hit=value is not _MISSING)
+        if value is _MISSING:
+            value = default() if callable(default) else default
+            self.cache.set(full_key, value, self.timeout if timeout is None else timeout)
+        return value
+
+
+_MISSING = object()
+
+
+class TTLLRUCache:
+    """
+    Small thread-safe per-process LRU with a TTL per entry.
+    For hot-path lookups where even a shared-cache round trip is too much;
+    pair it with a CacheNamespace version to get cross-worker invalidation.
+    """
+
+    def __init__(self, maxsize=1024, ttl=300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return default
+            expires_at, value = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        with self._lock:
+            self._data[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class VersionedLoader:
+    """
+    A per-process object (an in-memory index, say) that is rebuilt when any
+    process publishes a new version of its source data.
+
+        _loader = VersionedLoader('centroids:version', CentroidIndex.from_database)
+        index = _loader.get()   # loads on first use
+        _loader.publish()       # after an import: every process reloads
+
+    The version key in the shared cache is read at most every
+    `check_interval` seconds, so most get() calls touch nothing shared.
+    """
+
+    def __init__(self, version_key, load, check_interval=60, alias='default'):
+        self.version_key = version_key
+        self.load = load
+        self.check_interval = check_interval
+        self.alias = alias
+        self._lock = threading.Lock()
+        self._value = None
+        self._version = None
+        self._checked_at = 0.0
+
+    def get(self):
+        if self._value is not None and time.monotonic() - self._checked_at < self.check_interval:
+            return self._value
+        with self._lock:
+            if self._value is None or time.monotonic() - self._checked_at >= self.check_interval:
+                version = caches[self.alias].get(self.version_key)
+                if self._value is None or version != self._version:
+                    self._value = self.load()
+                    self._version = version
+                self._checked_at = time.monotonic()
+        return self._value
+
+    def publish(self):
+        caches[self.alias].set(self.version_key, time.time(), timeout=None)
+
+
+# --- Shared counters ---
+
+def add_or_incr_many(cache, deltas, timeout=None):
+    """
+    Adds each {key: delta} to the shared counters, creating missing keys with
+    `timeout`. Zero deltas are skipped. A key that expires between add() and
+    incr() is set to the delta, losing at most the increments it held.
+    """
+    for key, delta in deltas.items():
+        if not delta:
+            continue
+        if not cache.add(key, delta, timeout=timeout):
+            try:
+                cache.incr(key, delta)
+            except ValueError:
+                cache.set(key, delta, timeout=timeout)
+
+
+# --- Instrumentation ---
+
+def _stats_key(namespace, kind):
+    return f"ns-stats:{namespace}:{kind}"
+
+
+def record(namespace, hit):
+    global _last_flush
+    with _stats_lock:
+        _local_stats[namespace]['hits' if hit else 'misses'] += 1
+        due = time.monotonic() - _last_flush > STATS_FLUSH_INTERVAL
+    if due:
+        flush_stats()
+
+
+def flush_stats():
+    """Pushes this process's counters into the shared cache."""
+    global _last_flush
+    with _stats_lock:
+        pending = {ns: dict(counts) for ns, counts in _local_stats.items()}
+        _local_stats.clear()
+        _last_flush = time.monotonic()
+
+    add_or_incr_many(caches['default'], {
+        _stats_key(namespace, kind): delta
+        for namespace, counts in pending.items() for kind, delta in counts.items()
+    })
+
+
+def namespace_stats():
+    """Cluster-wide hit/miss counts for every registered namespace."""
+    flush_stats()
+    cache = caches['default']
+    result = {}
+    for name in sorted(_registry):
+        hits = cache.get(_stats_key(name, 'hits'), 0)
+        misses = cache.get(_stats_key(name, 'misses'), 0)
+        total = hits + misses
+        result[name] = {
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': round(hits / total, 4) if total else None,
+            'version': _registry[name].version(),
+        }
+    return result
+
+
+# --- Shared namespaces ---
+
+# Admin dashboard aggregates (invalidated by apps.admin_panel.signals)
+dashboard_cache = CacheNamespace('dashboard', timeout=60)
+
+# Verified API keys (invalidated by apps.users.signals on key/user changes)
+api_key_cache = CacheNamespace('api_keys', timeout=None)
+
+# Search term -> City/Locality ids (invalidated by apps.properties.models on alias writes)
+location_cache = CacheNamespace('locations', timeout=3600)
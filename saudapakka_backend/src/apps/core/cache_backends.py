@@ -0,0 +1,157 @@
+"""
+Postgres-backed shared cache for deployments without Redis.
+
+Uses the same row format as Django's DatabaseCache, but the table is created
+UNLOGGED (no WAL, truncated after a crash - acceptable for a cache) and writes
+are single-statement upserts instead of COUNT(*) + SELECT + UPDATE/INSERT.
+
+Integers are stored as plain decimal text rather than base64 pickles so that
+incr()/decr() can be one UPDATE ... RETURNING: namespace versions, throttle
+and usage counters don't lose increments between concurrent workers.
+"""
+import base64
+import pickle
+import random
+import re
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.core.cache.backends.db import DatabaseCache
+from django.db import connections, router
+from django.utils.timezone import now as tz_now
+
+CACHE_TABLE = 'core_cache'
+
+# Expired rows are swept, and MAX_ENTRIES enforced, on roughly 1 in CULL_EVERY
+# writes rather than on every set(); the table can briefly run a little over.
+CULL_EVERY = 200
+
+# A base64 pickle (protocol >= 2) always starts with 'g', so this can't clash
+INTEGER_VALUE = re.compile(r'-?\d+')
+
+
+def create_cache_table(connection, table=CACHE_TABLE):
+    """Creates the cache table; UNLOGGED on Postgres, a plain table elsewhere (tests)."""
+    quote_name = connection.ops.quote_name
+    unlogged = 'UNLOGGED ' if connection.vendor == 'postgresql' else ''
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"CREATE {unlogged}TABLE IF NOT EXISTS {quote_name(table)} ("
+            f"cache_key varchar(255) NOT NULL PRIMARY KEY, "
+            f"value text NOT NULL, "
+            f"expires {'timestamp with time zone' if connection.vendor == 'postgresql' else 'datetime'} NOT NULL)"
+        )
+        cursor.execute(
+            f"CREATE INDEX IF NOT EXISTS {quote_name(table + '_expires')} ON {quote_name(table)} (expires)"
+        )
+
+
+class PostgresUnloggedCache(DatabaseCache):
+    """Drop-in DatabaseCache with upsert writes and atomic incr() on Postgres."""
+
+    def _connection(self):
+        return connections[router.db_for_write(self.cache_model_class)]
+
+    def _expiry(self, connection, timeout):
+        timeout = self.get_backend_timeout(timeout)
+        if timeout is None:
+            exp = datetime.max
+        else:
+            exp = datetime.fromtimestamp(timeout, tz=timezone.utc if settings.USE_TZ else None)
+        return connection.ops.adapt_datetimefield_value(exp.replace(microsecond=0))
+
+    def _encode(self, value):
+        if type(value) is int:
+            return str(value)
+        return base64.b64encode(pickle.dumps(value, self.pickle_protocol)).decode('latin1')
+
+    def _decode(self, value):
+        if INTEGER_VALUE.fullmatch(value):
+            return int(value)
+        return pickle.loads(base64.b64decode(value.encode()))
+
+    def _now(self, connection):
+        return connection.ops.adapt_datetimefield_value(tz_now().replace(microsecond=0))
+
+    def _upsert(self, key, value, timeout, only_if_expired):
+        connection = self._connection()
+        table = connection.ops.quote_name(self._table)
+        sql = (
+            f"INSERT INTO {table} AS c (cache_key, value, expires) VALUES (%s, %s, %s) "
+            f"ON CONFLICT (cache_key) DO UPDATE SET value = EXCLUDED.value, expires = EXCLUDED.expires"
+        )
+        if only_if_expired:
+            sql += " WHERE c.expires < NOW()"
+        sql += " RETURNING cache_key"
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [key, self._encode(value), self._expiry(connection, timeout)])
+            written = cursor.fetchone() is not None
+        if random.randrange(CULL_EVERY) == 0:
+            self._cull_to_limit(connection)
+        return written
+
+    def _cull_to_limit(self, connection):
+        """Sweeps expired rows; past MAX_ENTRIES also culls live ones (timeout=None included)."""
+        table = connection.ops.quote_name(self._table)
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT COUNT(*) FROM {table}")
+            num = cursor.fetchone()[0]
+            if num > self._max_entries:
+                self._cull(connection.alias, cursor, tz_now().replace(microsecond=0), num)
+            else:
+                cursor.execute(f"DELETE FROM {table} WHERE expires < %s", [self._now(connection)])
+
+    def get_many(self, keys, version=None):
+        """As DatabaseCache, minus the per-read delete of expired rows (the sweep handles those)."""
+        if not keys:
+            return {}
+        key_map = {self.make_and_validate_key(key, version=version): key for key in keys}
+        connection = connections[router.db_for_read(self.cache_model_class)]
+        table = connection.ops.quote_name(self._table)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT cache_key, value FROM {table} "
+                f"WHERE cache_key IN ({', '.join(['%s'] * len(key_map))}) AND expires >= %s",
+                [*key_map, self._now(connection)],
+            )
+            rows = cursor.fetchall()
+        return {key_map[key]: self._decode(connection.ops.process_clob(value)) for key, value in rows}
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        if self._connection().vendor != 'postgresql':
+            return super().set(key, value, timeout, version)
+        key = self.make_and_validate_key(key, version=version)
+        self._upsert(key, value, timeout, only_if_expired=False)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        """Atomic on Postgres: only one concurrent caller gets True (usable as a lock)."""
+        if self._connection().vendor != 'postgresql':
+            return super().add(key, value, timeout, version)
+        key = self.make_and_validate_key(key, version=version)
+        return self._upsert(key, value, timeout, only_if_expired=True)
+
+    def incr(self, key, delta=1, version=None):
+        """One UPDATE ... RETURNING on Postgres; the expiry is left as it was."""
+        connection = self._connection()
+        if connection.vendor != 'postgresql':
+            return super().incr(key, delta, version)
+        cache_key = self.make_and_validate_key(key, version=version)
+        table = connection.ops.quote_name(self._table)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"UPDATE {table} SET value = (value::bigint + %s)::text "
+                f"WHERE cache_key = %s AND expires >= %s AND value ~ '^-?[0-9]+$' RETURNING value",
+                [delta, cache_key, self._now(connection)],
+            )
+            row = cursor.fetchone()
+        if row is not None:
+            return int(row[0])
+        # Missing (ValueError) or not an integer (TypeError, as with any backend)
+        return super().incr(key, delta, version)
+
+    def delete_expired(self):
+        connection = self._connection()
+        table = connection.ops.quote_name(self._table)
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {table} WHERE expires < %s", [self._now(connection)])
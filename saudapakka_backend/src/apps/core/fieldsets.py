@@ -0,0 +1,117 @@
+"""
+Sparse fieldsets for read endpoints.
+
+    GET /api/properties/?fields=card&expand=owner_details
+    GET /api/mandates/?fields=id,status,end_date,seller_name
+
+?fields= limits each row to the named serializer fields, or to a preset from
+the serializer's field_presets (e.g. 'card'). Nested objects listed in
+Meta.expandable_fields are left out of a ?fields= selection unless named in
+it or in ?expand=. Without ?fields= the full representation is returned.
+
+On GET, SparseFieldsetViewMixin also narrows the queryset with .only() to the
+columns the selected fields read, and drops select_related/prefetch_related
+lookups none of them use. Method fields and model properties declare their
+columns in Meta.field_sources; if any selected field's columns can't be
+told, the queryset is left as is (a deferred column costs a query per row).
+"""
+import re
+
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+
+FIELDS_PARAM = 'fields'
+EXPAND_PARAM = 'expand'
+
+
+def _names(value):
+    return [name.strip() for name in (value or '').split(',') if name.strip()]
+
+
+class SparseFieldsetMixin:
+    """Serializer side: takes fields=/expand= kwargs (lists of names) and drops the rest."""
+    field_presets = {}
+
+    def __init__(self, *args, **kwargs):
+        self._sparse_fields = kwargs.pop('fields', None)
+        self._sparse_expand = kwargs.pop('expand', None) or []
+        super().__init__(*args, **kwargs)
+
+    def get_fields(self):
+        fields = super().get_fields()
+        if self._sparse_fields is None:
+            return fields
+        requested = []
+        for name in self._sparse_fields:
+            requested.extend(self.field_presets.get(name, [name]))
+        unknown = sorted({*requested, *self._sparse_expand} - set(fields))
+        if unknown:
+            raise serializers.ValidationError({FIELDS_PARAM: f"Unknown fields: {', '.join(unknown)}"})
+        expandable = set(getattr(self.Meta, 'expandable_fields', ()))
+        keep = {name for name in requested if name not in expandable or name in self._sparse_fields}
+        keep.update(self._sparse_expand)
+        return {name: field for name, field in fields.items() if name in keep}
+
+
+def _select_related_paths(tree, prefix=''):
+    for name, children in tree.items():
+        yield prefix + name
+        yield from _select_related_paths(children, f"{prefix}{name}__")
+
+
+def projected(queryset, serializer):
+    """queryset narrowed to the columns serializer's fields read, or unchanged if they can't be told."""
+    meta = queryset.model._meta
+    sources = getattr(serializer.Meta, 'field_sources', {})
+    columns, relations = {meta.pk.name}, set()
+    for name, field in serializer.fields.items():
+        for source in sources.get(name, [field.source]):
+            source = source.split('.')[0]
+            display = re.fullmatch(r'get_(\w+)_display', source)
+            if display:
+                source = display.group(1)
+            try:
+                model_field = meta.get_field(source)
+            except FieldDoesNotExist:
+                return queryset
+            (columns if model_field.concrete else relations).add(source)
+
+    select_related = queryset.query.select_related
+    if select_related is True:
+        return queryset
+    if select_related:
+        queryset = queryset.select_related(None).select_related(*(
+            path for path in _select_related_paths(select_related) if path.split('__')[0] in columns | relations
+        ))
+    lookups = queryset._prefetch_related_lookups
+    if lookups:
+        queryset = queryset.prefetch_related(None).prefetch_related(*(
+            lookup for lookup in lookups
+            if getattr(lookup, 'prefetch_through', lookup).split('__')[0] in columns | relations
+        ))
+    return queryset.only(*columns)
+
+
+class SparseFieldsetViewMixin:
+    """View side: passes ?fields=/?expand= to the serializer on GET and projects the queryset to match."""
+
+    def sparse_fieldset(self):
+        params = self.request.query_params
+        if self.request.method != 'GET' or FIELDS_PARAM not in params:
+            return None
+        return _names(params.get(FIELDS_PARAM)), _names(params.get(EXPAND_PARAM))
+
+    def get_serializer(self, *args, **kwargs):
+        fieldset = self.sparse_fieldset()
+        if fieldset is not None:
+            kwargs.setdefault('fields', fieldset[0])
+            kwargs.setdefault('expand', fieldset[1])
+        return super().get_serializer(*args, **kwargs)
+
+    def project_queryset(self, queryset):
+        if self.sparse_fieldset() is None:
+            return queryset
+        return projected(queryset, self.get_serializer())
+
+    def filter_queryset(self, queryset):
+        return self.project_queryset(super().filter_queryset(queryset))
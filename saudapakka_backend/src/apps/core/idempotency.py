@@ -0,0 +1,114 @@
+"""
+Idempotency-Key support for POST endpoints that clients retry.
+
+    class PropertyViewSet(viewsets.ModelViewSet):
+        @idempotent('property-create')
+        def create(self, request, *args, **kwargs):
+            return super().create(request, *args, **kwargs)
+
+A client sends 'Idempotency-Key: <unique string>' with the request. The first
+successful (2xx) response is stored in the shared cache together with a
+fingerprint of the request; a retry with the same key replays that response
+(with 'Idempotent-Replayed: true') without running the view again. A retry that
+arrives while the first request is still running gets 409, and reusing a key
+for a different request gets 422. Requests without the header are untouched.
+"""
+import functools
+import hashlib
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.response import Response
+
+HEADER = 'Idempotency-Key'
+MAX_KEY_LENGTH = 255
+
+# The lock only has to outlive one request; keep it short so a crashed worker
+# does not block retries for long.
+LOCK_TIMEOUT = 120
+
+REPLAY_HEADERS = ('Location',)
+
+
+def _fingerprint(request):
+    """Hash of method, path and body; uploaded files count by name, size and content."""
+    digest = hashlib.sha256()
+    digest.update(f"{request.method} {request.path}".encode())
+    data = request.data
+    items = data.lists() if hasattr(data, 'lists') else data.items()
+    for name, value in sorted(items, key=lambda item: item[0]):
+        digest.update(f"\0{name}={value!r}".encode())
+    for name in sorted(getattr(request, 'FILES', {}) or {}):
+        for upload in request.FILES.getlist(name):
+            digest.update(f"\0{name}:{upload.name}:{upload.size}:".encode())
+            for chunk in upload.chunks():
+                digest.update(chunk)
+            upload.seek(0)
+    return digest.hexdigest()
+
+
+def _owner(request):
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_authenticated:
+        return None
+    return str(user.pk)
+
+
+def idempotent(scope):
+    """Decorates a DRF view method (create / @action) with Idempotency-Key handling."""
+    def decorator(view_method):
+        @functools.wraps(view_method)
+        def wrapper(self, request, *args, **kwargs):
+            key = request.headers.get(HEADER)
+            owner = _owner(request)
+            if not key or owner is None:
+                return view_method(self, request, *args, **kwargs)
+            if len(key) > MAX_KEY_LENGTH:
+                return Response({"error": f"{HEADER} must be at most {MAX_KEY_LENGTH} characters."}, status=400)
+
+            cache = caches['default']
+            # Keys are per user and endpoint, so clients cannot collide with each other
+            base = f"idem:{scope}:{owner}:{hashlib.sha256(key.encode()).hexdigest()}"
+            fingerprint = _fingerprint(request)
+
+            stored = cache.get(base)
+            if stored is not None:
+                return _replay(stored, fingerprint)
+
+            lock_key = f"{base}:lock"
+            if not cache.add(lock_key, 1, timeout=LOCK_TIMEOUT):
+                response = Response(
+                    {"error": "A request with this Idempotency-Key is already in progress."}, status=409
+                )
+                response['Retry-After'] = '1'
+                return response
+
+            try:
+                # The first request may have finished between get() and add()
+                stored = cache.get(base)
+                if stored is not None:
+                    return _replay(stored, fingerprint)
+
+                response = view_method(self, request, *args, **kwargs)
+                if 200 <= response.status_code < 300 and isinstance(response, Response):
+                    cache.set(base, {
+                        'fingerprint': fingerprint,
+                        'status': response.status_code,
+                        'data': response.data,
+                        'headers': {h: response[h] for h in REPLAY_HEADERS if response.has_header(h)},
+                    }, timeout=settings.IDEMPOTENCY_KEY_TTL)
+                return response
+            finally:
+                cache.delete(lock_key)
+        return wrapper
+    return decorator
+
+
+def _replay(stored, fingerprint):
+    if stored['fingerprint'] != fingerprint:
+        return Response(
+            {"error": f"{HEADER} was already used for a different request."}, status=422
+        )
+    response = Response(stored['data'], status=stored['status'], headers=stored['headers'])
+    response['Idempotent-Replayed'] = 'true'
+    return response
@@ -0,0 +1,68 @@
+"""
+Image normalisation for user uploads.
+
+    variants = render_variants(fileobj, {
+        'preview': (1600, False),       # fit inside 1600x1600
+        'avatar_small': (96, True),     # centre-cropped 96x96 square
+    })
+    # -> {'preview': ContentFile(jpeg), 'avatar_small': ContentFile(jpeg)}
+
+The source is decoded once (JPEGs at a reduced scale via draft() when the
+largest variant is much smaller than the original), rotated per its EXIF
+orientation and re-encoded as progressive JPEG without any metadata, so GPS
+and camera EXIF never reach public URLs.
+"""
+import io
+
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+
+DEFAULT_QUALITY = 82
+
+# Pillow warns above MAX_IMAGE_PIXELS and raises DecompressionBombError above
+# twice that, so uploads past 128 MP are refused before they are decoded.
+Image.MAX_IMAGE_PIXELS = 64_000_000
+
+# What render_variants raises for an upload it can't (or won't) decode
+UNREADABLE_IMAGE_ERRORS = (OSError, Image.DecompressionBombError)
+
+
+def _open(fileobj, target_px):
+    image = Image.open(fileobj)
+    if image.format == 'JPEG':
+        # Let libjpeg decode at 1/2, 1/4 or 1/8 scale when that is still big enough
+        image.draft('RGB', (target_px, target_px))
+    image = ImageOps.exif_transpose(image)
+    if image.mode in ('RGBA', 'LA', 'P'):
+        image = image.convert('RGBA')
+        flattened = Image.new('RGB', image.size, (255, 255, 255))
+        flattened.paste(image, mask=image.getchannel('A'))
+        return flattened
+    return image.convert('RGB')
+
+
+def _encode(image, quality):
+    buffer = io.BytesIO()
+    image.save(buffer, format='JPEG', quality=quality, optimize=True, progressive=True)
+    return ContentFile(buffer.getvalue())
+
+
+def render_variants(fileobj, variants, quality=DEFAULT_QUALITY):
+    """
+    `variants` maps a name to (max_px, square). Returns name -> ContentFile
+    (JPEG). Larger variants are rendered first and each smaller one is
+    downscaled from the previous result rather than from the original.
+    """
+    ordered = sorted(variants.items(), key=lambda item: item[1][0], reverse=True)
+    image = _open(fileobj, ordered[0][1][0])
+
+    rendered = {}
+    for name, (max_px, square) in ordered:
+        if square:
+            variant = ImageOps.fit(image, (max_px, max_px), Image.LANCZOS)
+        else:
+            variant = image.copy()
+            variant.thumbnail((max_px, max_px), Image.LANCZOS)
+            image = variant
+        rendered[name] = _encode(variant, quality)
+    return rendered
@@ -0,0 +1,59 @@
+"""
+Long-lived email connections for background workers.
+
+Django's send_mail() opens and closes an SMTP(+TLS) session per message, which
+costs 1-3s against smtp.gmail.com. Workers instead keep one connection per
+thread open between jobs, reconnect once if the server dropped it, and close
+it after SMTP_IDLE_TIMEOUT seconds without use (servers drop idle sessions anyway).
+"""
+import logging
+import smtplib
+import threading
+import time
+
+from django.conf import settings
+from django.core.mail import get_connection
+
+logger = logging.getLogger(__name__)
+
+_local = threading.local()
+
+
+def _pooled_connection():
+    connection = getattr(_local, 'connection', None)
+    last_used = getattr(_local, 'last_used', 0)
+    if connection is not None and time.monotonic() - last_used > settings.SMTP_IDLE_TIMEOUT:
+        close_pooled_connection()
+        connection = None
+    if connection is None:
+        connection = get_connection(fail_silently=False)
+        _local.connection = connection
+    # No-op when already open; the backend then keeps it open across send_messages()
+    connection.open()
+    return connection
+
+
+def close_pooled_connection():
+    connection = getattr(_local, 'connection', None)
+    _local.connection = None
+    if connection is not None:
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+
+def send_pooled(messages):
+    """Sends EmailMessages over this thread's persistent connection; returns the number sent."""
+    for attempt in range(2):
+        connection = _pooled_connection()
+        try:
+            sent = connection.send_messages(messages)
+            _local.last_used = time.monotonic()
+            return sent
+        except (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError, ConnectionError, OSError):
+            # Stale session (server timeout / network blip): reconnect once, then give up
+            close_pooled_connection()
+            if attempt:
+                raise
+            logger.info("SMTP connection dropped, reconnecting")
@@ -0,0 +1,69 @@
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage, storages
+from django.core.management.base import BaseCommand
+
+from apps.core.storage import storage_for_name
+
+
+class Command(BaseCommand):
+    help = ('Copies existing media from a local directory into the configured storages (e.g. S3/MinIO) in parallel; '
+            'KYC documents go to the private storage.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--source', default=str(settings.MEDIA_ROOT), help='Local media directory to copy from.')
+        parser.add_argument('--workers', type=int, default=8, help='Parallel upload threads.')
+        parser.add_argument('--overwrite', action='store_true', help='Re-upload files that already exist in the target.')
+        parser.add_argument('--dry-run', action='store_true', help='List what would be copied without uploading.')
+
+    def handle(self, *args, **options):
+        source = FileSystemStorage(location=options['source'])
+        target = storages['default']
+        if isinstance(target, FileSystemStorage) and os.path.abspath(target.location) == os.path.abspath(source.location):
+            self.stderr.write('Default storage is the source directory; set STORAGE_BACKEND=s3 first.')
+            return
+
+        names = list(self._walk(source.location))
+        self.stdout.write(f'Found {len(names)} files under {source.location}')
+        if options['dry_run']:
+            for name in names:
+                self.stdout.write(f'  {name}')
+            return
+
+        copied = skipped = failed = 0
+        with ThreadPoolExecutor(max_workers=options['workers']) as pool:
+            futures = {pool.submit(self._copy, source, name, options['overwrite']): name for name in names}
+            for future in as_completed(futures):
+                try:
+                    if future.result():
+                        copied += 1
+                    else:
+                        skipped += 1
+                except Exception as e:
+                    failed += 1
+                    self.stderr.write(f'Failed {futures[future]}: {e}')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Processed: {copied} copied, {skipped} already present, {failed} failed.'
+        ))
+
+    def _walk(self, root):
+        for dirpath, _, filenames in os.walk(root):
+            for filename in filenames:
+                full_path = os.path.join(dirpath, filename)
+                yield os.path.relpath(full_path, root).replace(os.sep, '/')
+
+    def _copy(self, source, name, overwrite):
+        target = storage_for_name(name)
+        if target.exists(name):
+            if not overwrite:
+                return False
+            target.delete(name)
+        with source.open(name, 'rb') as fh:
+            saved_name = target.save(name, fh)
+        if saved_name != name:
+            # Storage renamed the object (name collision); keys must match the DB rows.
+            raise RuntimeError(f'stored as {saved_name}')
+        return True
@@ -0,0 +1,63 @@
+"""
+Session-free handling for the JSON API.
+
+Everything under settings.SESSIONLESS_PATH_PREFIXES authenticates with JWT or
+API keys, so loading/saving a session (and message storage) there is pure
+overhead. These drop-in replacements for Django's SessionMiddleware and
+MessageMiddleware skip those paths; the Django admin keeps full sessions.
+"""
+from django.conf import settings
+from django.contrib.messages.middleware import MessageMiddleware
+from django.contrib.sessions.backends.base import SessionBase
+from django.contrib.sessions.middleware import SessionMiddleware
+
+
+def is_sessionless(request):
+    return request.path_info.startswith(tuple(settings.SESSIONLESS_PATH_PREFIXES))
+
+
+class NullSession(SessionBase):
+    """
+    Empty, never-persisted session for API requests. Reads find nothing
+    (AuthenticationMiddleware resolves to AnonymousUser without a query) and
+    writes are discarded at the end of the request.
+    """
+    def exists(self, session_key):
+        return False
+
+    def create(self):
+        pass
+
+    def save(self, must_create=False):
+        pass
+
+    def delete(self, session_key=None):
+        pass
+
+    def load(self):
+        return {}
+
+
+class ApiSessionMiddleware(SessionMiddleware):
+    def process_request(self, request):
+        if is_sessionless(request):
+            request.session = NullSession()
+            return
+        super().process_request(request)
+
+    def process_response(self, request, response):
+        if is_sessionless(request):
+            return response
+        return super().process_response(request, response)
+
+
+class ApiMessageMiddleware(MessageMiddleware):
+    def process_request(self, request):
+        if is_sessionless(request):
+            return
+        super().process_request(request)
+
+    def process_response(self, request, response):
+        if is_sessionless(request):
+            return response
+        return super().process_response(request, response)
@@ -0,0 +1,23 @@
+from django.db import migrations
+
+from apps.core.cache_backends import CACHE_TABLE, create_cache_table
+
+
+def create_table(apps, schema_editor):
+    create_cache_table(schema_editor.connection)
+
+
+def drop_table(apps, schema_editor):
+    quote_name = schema_editor.connection.ops.quote_name
+    schema_editor.execute(f"DROP TABLE IF EXISTS {quote_name(CACHE_TABLE)}")
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = []
+
+    operations = [
+        migrations.RunPython(create_table, drop_table),
+    ]
@@ -0,0 +1,23 @@
+from django.db import migrations
+
+from apps.core.ratelimit import RATELIMIT_TABLE, create_ratelimit_table
+
+
+def create_table(apps, schema_editor):
+    create_ratelimit_table(schema_editor.connection)
+
+
+def drop_table(apps, schema_editor):
+    quote_name = schema_editor.connection.ops.quote_name
+    schema_editor.execute(f"DROP TABLE IF EXISTS {quote_name(RATELIMIT_TABLE)}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_cache_table'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_table, drop_table),
+    ]
@@ -0,0 +1,23 @@
+from django.db import migrations
+
+from apps.core.ratelimit import TOKEN_BUCKET_TABLE, create_token_bucket_table
+
+
+def create_table(apps, schema_editor):
+    create_token_bucket_table(schema_editor.connection)
+
+
+def drop_table(apps, schema_editor):
+    quote_name = schema_editor.connection.ops.quote_name
+    schema_editor.execute(f"DROP TABLE IF EXISTS {quote_name(TOKEN_BUCKET_TABLE)}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_ratelimit_table'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_table, drop_table),
+    ]
@@ -0,0 +1,278 @@
+"""
+Atomic sliding-window counters for throttling.
+
+Each throttled identity keeps two numbers: hits in the current fixed window
+and hits in the previous one. The sliding estimate is
+
+    previous * (1 - elapsed_fraction_of_current_window) + current
+
+which needs constant memory per key (unlike DRF's per-request timestamp
+list) and a single atomic round trip per check:
+
+- redis:    INCR + EXPIRE + GET in one pipeline
+- postgres: one INSERT ... ON CONFLICT DO UPDATE ... RETURNING on an UNLOGGED
+            table that rolls the window in place
+- cache:    add()/incr() on CACHES['default'] (atomic for locmem; tests/dev)
+
+token_bucket_take() does the same for per-API-key token buckets, kept as a
+GCRA "theoretical arrival time" per key so the refill, the check and the
+spend are one atomic step (a Lua script on Redis, one upsert on Postgres).
+"""
+import random
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections
+from django.utils.module_loading import import_string
+
+RATELIMIT_TABLE = 'core_ratelimit'
+TOKEN_BUCKET_TABLE = 'core_tokenbucket'
+
+# Expired rows are swept on roughly 1 in CULL_EVERY hits
+CULL_EVERY = 500
+
+
+def create_ratelimit_table(connection, table=RATELIMIT_TABLE):
+    """UNLOGGED on Postgres (counters are disposable), a plain table elsewhere."""
+    quote_name = connection.ops.quote_name
+    unlogged = 'UNLOGGED ' if connection.vendor == 'postgresql' else ''
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"CREATE {unlogged}TABLE IF NOT EXISTS {quote_name(table)} ("
+            f"key varchar(255) NOT NULL PRIMARY KEY, "
+            f"window_index bigint NOT NULL, "
+            f"count integer NOT NULL, "
+            f"prev_count integer NOT NULL, "
+            f"expires bigint NOT NULL)"
+        )
+        cursor.execute(
+            f"CREATE INDEX IF NOT EXISTS {quote_name(table + '_expires')} ON {quote_name(table)} (expires)"
+        )
+
+
+def create_token_bucket_table(connection, table=TOKEN_BUCKET_TABLE):
+    """UNLOGGED on Postgres, a plain table elsewhere."""
+    quote_name = connection.ops.quote_name
+    unlogged = 'UNLOGGED ' if connection.vendor == 'postgresql' else ''
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"CREATE {unlogged}TABLE IF NOT EXISTS {quote_name(table)} ("
+            f"key varchar(255) NOT NULL PRIMARY KEY, "
+            f"tat double precision NOT NULL, "
+            f"expires bigint NOT NULL)"
+        )
+        cursor.execute(
+            f"CREATE INDEX IF NOT EXISTS {quote_name(table + '_expires')} ON {quote_name(table)} (expires)"
+        )
+
+
+class BaseCounterBackend:
+    def hit(self, key, window_index, window_seconds):
+        """Counts one hit; returns (current window count, previous window count)."""
+        raise NotImplementedError
+
+    def undo(self, key, window_index, window_seconds):
+        """Takes back a hit that was refused, so rejected requests don't extend the block."""
+        raise NotImplementedError
+
+    def spend(self, key, now, interval, limit):
+        """
+        GCRA step: the request conforms if max(tat, now) + interval - now <= limit,
+        and then tat moves to max(tat, now) + interval. Returns (allowed, tat after
+        the step), with the unchanged tat when refused.
+        """
+        raise NotImplementedError
+
+
+class CacheCounterBackend(BaseCounterBackend):
+    alias = 'default'
+    _spend_lock = threading.Lock()  # get/set below is only atomic within a process
+
+    def _keys(self, key, window_index):
+        return f"rl:{key}:{window_index}", f"rl:{key}:{window_index - 1}"
+
+    def hit(self, key, window_index, window_seconds):
+        cache = caches[self.alias]
+        current_key, previous_key = self._keys(key, window_index)
+        if cache.add(current_key, 1, window_seconds * 2):
+            current = 1
+        else:
+            try:
+                current = cache.incr(current_key)
+            except ValueError:
+                cache.set(current_key, 1, window_seconds * 2)
+                current = 1
+        return current, cache.get(previous_key, 0)
+
+    def undo(self, key, window_index, window_seconds):
+        try:
+            caches[self.alias].decr(self._keys(key, window_index)[0])
+        except ValueError:
+            pass
+
+    def spend(self, key, now, interval, limit):
+        cache = caches[self.alias]
+        with self._spend_lock:
+            tat = cache.get(f"tb:{key}", now)
+            new_tat = max(tat, now) + interval
+            if new_tat - now > limit:
+                return False, tat
+            cache.set(f"tb:{key}", new_tat, int(new_tat - now) + 1)
+        return True, new_tat
+
+
+# Numbers cross the Lua boundary as strings: Redis truncates Lua floats to integers
+TOKEN_BUCKET_LUA = """
+local now = tonumber(ARGV[1])
+local interval = tonumber(ARGV[2])
+local limit = tonumber(ARGV[3])
+local tat = tonumber(redis.call('GET', KEYS[1])) or now
+local new_tat = math.max(tat, now) + interval
+if new_tat - now > limit then
+    return {0, tostring(tat)}
+end
+redis.call('SET', KEYS[1], tostring(new_tat), 'PX', math.ceil((new_tat - now) * 1000) + 1000)
+return {1, tostring(new_tat)}
+"""
+
+
+class RedisCounterBackend(CacheCounterBackend):
+    """Talks to the redis client behind CACHES['default'] directly for a pipelined INCR."""
+
+    def hit(self, key, window_index, window_seconds):
+        cache = caches[self.alias]
+        current_key, previous_key = (cache.make_and_validate_key(k) for k in self._keys(key, window_index))
+        client = cache._cache.get_client(current_key, write=True)
+        pipe = client.pipeline()
+        pipe.incr(current_key)
+        pipe.expire(current_key, window_seconds * 2)
+        pipe.get(previous_key)
+        current, _, previous = pipe.execute()
+        return int(current), int(previous or 0)
+
+    def spend(self, key, now, interval, limit):
+        cache = caches[self.alias]
+        bucket_key = cache.make_and_validate_key(f"tb:{key}")
+        client = cache._cache.get_client(bucket_key, write=True)
+        allowed, tat = client.register_script(TOKEN_BUCKET_LUA)(
+            keys=[bucket_key], args=[repr(now), repr(interval), repr(limit)],
+        )
+        return bool(allowed), float(tat)
+
+
+class PostgresCounterBackend(BaseCounterBackend):
+    """One row per identity in an UNLOGGED table; the window rolls inside the upsert."""
+
+    def hit(self, key, window_index, window_seconds):
+        connection = connections['default']
+        table = connection.ops.quote_name(RATELIMIT_TABLE)
+        expires = int(time.time()) + window_seconds * 2
+        with connection.cursor() as cursor:
+            # SET expressions see the old row, so prev_count/count are rolled consistently
+            cursor.execute(
+                f"INSERT INTO {table} AS r (key, window_index, count, prev_count, expires) "
+                f"VALUES (%s, %s, 1, 0, %s) "
+                f"ON CONFLICT (key) DO UPDATE SET "
+                f"prev_count = CASE WHEN r.window_index = EXCLUDED.window_index THEN r.prev_count "
+                f"WHEN r.window_index = EXCLUDED.window_index - 1 THEN r.count ELSE 0 END, "
+                f"count = CASE WHEN r.window_index = EXCLUDED.window_index THEN r.count + 1 ELSE 1 END, "
+                f"window_index = EXCLUDED.window_index, expires = EXCLUDED.expires "
+                f"RETURNING count, prev_count",
+                [key, window_index, expires],
+            )
+            current, previous = cursor.fetchone()
+            if random.randrange(CULL_EVERY) == 0:
+                cursor.execute(f"DELETE FROM {table} WHERE expires < %s", [int(time.time())])
+        return current, previous
+
+    def undo(self, key, window_index, window_seconds):
+        connection = connections['default']
+        table = connection.ops.quote_name(RATELIMIT_TABLE)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"UPDATE {table} SET count = count - 1 WHERE key = %s AND window_index = %s AND count > 0",
+                [key, window_index],
+            )
+
+    def spend(self, key, now, interval, limit):
+        connection = connections['default']
+        table = connection.ops.quote_name(TOKEN_BUCKET_TABLE)
+        # A conforming tat is at most now + limit, so the row is stale after that
+        expires = int(now + limit) + 1
+        with connection.cursor() as cursor:
+            # The WHERE refuses the update (no row returned) when the bucket is empty
+            cursor.execute(
+                f"INSERT INTO {table} AS b (key, tat, expires) VALUES (%s, %s, %s) "
+                f"ON CONFLICT (key) DO UPDATE SET "
+                f"tat = GREATEST(b.tat + %s, EXCLUDED.tat), expires = EXCLUDED.expires "
+                f"WHERE GREATEST(b.tat + %s, EXCLUDED.tat) - %s <= %s "
+                f"RETURNING tat",
+                [key, now + interval, expires, interval, interval, now, limit],
+            )
+            row = cursor.fetchone()
+            if row is not None:
+                if random.randrange(CULL_EVERY) == 0:
+                    cursor.execute(f"DELETE FROM {table} WHERE expires < %s", [int(time.time())])
+                return True, row[0]
+            cursor.execute(f"SELECT tat FROM {table} WHERE key = %s", [key])
+            row = cursor.fetchone()
+        return False, row[0] if row else now
+
+
+COUNTER_BACKENDS = {
+    'redis': 'apps.core.ratelimit.RedisCounterBackend',
+    'postgres': 'apps.core.ratelimit.PostgresCounterBackend',
+    'cache': 'apps.core.ratelimit.CacheCounterBackend',
+}
+
+_backend = None
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        _backend = import_string(COUNTER_BACKENDS[settings.RATELIMIT_BACKEND])()
+    return _backend
+
+
+def sliding_window_hit(key, limit, window_seconds, now=None):
+    """
+    Counts a request against `limit` per `window_seconds` for `key`.
+    Returns (allowed, estimated count, seconds until a slot frees up or 0).
+    """
+    now = time.time() if now is None else now
+    window_index = int(now // window_seconds)
+    elapsed = (now % window_seconds) / window_seconds
+
+    backend = get_backend()
+    current, previous = backend.hit(key, window_index, window_seconds)
+    estimate = previous * (1 - elapsed) + current
+    if estimate <= limit:
+        return True, estimate, 0
+
+    backend.undo(key, window_index, window_seconds)
+    current -= 1
+    # Previous-window hits fade out linearly; find when one more request fits
+    if previous and current + 1 <= limit:
+        fraction = 1 - (limit - current - 1) / previous
+        wait = max(0.0, (fraction - elapsed) * window_seconds)
+    else:
+        wait = (1 - elapsed) * window_seconds
+    return False, estimate, wait
+
+
+def token_bucket_take(key, capacity, rate, now=None):
+    """
+    Spends one token from `key`'s bucket, which holds up to `capacity` tokens and
+    refills at `rate` tokens per second. Returns (allowed, seconds until the next
+    token or 0).
+    """
+    now = time.time() if now is None else now
+    interval = 1.0 / rate
+    limit = capacity * interval
+    allowed, tat = get_backend().spend(key, now, interval, limit)
+    if allowed:
+        return True, 0
+    return False, max(0.0, max(tat, now) + interval - limit - now)
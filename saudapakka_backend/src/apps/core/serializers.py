@@ -0,0 +1,54 @@
+from django.db import models
+from rest_framework import serializers
+
+from .storage import UPLOAD_TARGETS, claim_upload_key
+
+
+class PresignUploadSerializer(serializers.Serializer):
+    target = serializers.ChoiceField(choices=sorted(UPLOAD_TARGETS.keys()))
+    filename = serializers.CharField(max_length=255)
+    content_type = serializers.CharField(max_length=100)
+
+
+class StorageKeyMixin:
+    """
+    Lets clients send '<field>_key' (a key returned by /api/uploads/presign/)
+    instead of a multipart file for any FileField/ImageField in Meta.fields.
+    Only the key is recorded; the bytes were already uploaded to storage.
+    """
+
+    def _file_model_fields(self):
+        model = self.Meta.model
+        names = self.Meta.fields
+        return [
+            f for f in model._meta.concrete_fields
+            if isinstance(f, models.FileField) and (names == '__all__' or f.name in names)
+        ]
+
+    def get_fields(self):
+        fields = super().get_fields()
+        for model_field in self._file_model_fields():
+            # A required file may arrive as a key instead; enforced in validate()
+            if model_field.name in fields:
+                fields[model_field.name].required = False
+            fields[f"{model_field.name}_key"] = serializers.CharField(
+                write_only=True, required=False, allow_blank=True, max_length=255
+            )
+        return fields
+
+    def validate(self, attrs):
+        attrs = super().validate(attrs)
+        request = self.context.get('request')
+        for model_field in self._file_model_fields():
+            key = attrs.pop(f"{model_field.name}_key", None)
+            if not key:
+                continue
+            if request is None or not claim_upload_key(key, model_field, request.user):
+                raise serializers.ValidationError({f"{model_field.name}_key": "Unknown or foreign upload key."})
+            attrs[model_field.name] = key
+
+        if self.instance is None:
+            for model_field in self._file_model_fields():
+                if not model_field.blank and not attrs.get(model_field.name):
+                    raise serializers.ValidationError({model_field.name: "A file or upload key is required."})
+        return attrs
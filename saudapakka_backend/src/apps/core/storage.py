@@ -0,0 +1,189 @@
+"""
+Media storage backends.
+
+Every FileField / ImageField in the project writes through Django's default
+storage, except identity documents (KYC), which use storages['private'] via
+``storage=private_storage``; switching STORAGE_BACKEND between 'filesystem' and
+'s3' moves all media at once. On S3 the private storage is a separate prefix
+(AWS_PRIVATE_LOCATION) served only through short-lived signed URLs. Both
+backends expose ``presigned_post()`` so clients can upload straight to
+storage and hand Django back only the object key.
+"""
+import os
+import uuid
+
+from django.apps import apps
+from django.conf import settings
+from django.core import signing
+from django.core.files.storage import FileSystemStorage, default_storage, storages
+from django.urls import reverse
+
+try:
+    from storages.backends.s3 import S3Storage
+except ImportError:  # django-storages is only needed for STORAGE_BACKEND=s3
+    S3Storage = None
+
+DIRECT_UPLOAD_SALT = 'apps.core.direct-upload'
+
+# Upload targets a client may request a presigned POST for.
+# target -> (app_label, model, field, max size in bytes, allowed content types)
+IMAGE_TYPES = ['image/jpeg', 'image/jpg', 'image/png', 'image/webp']
+DOCUMENT_TYPES = IMAGE_TYPES + ['application/pdf']
+
+UPLOAD_TARGETS = {
+    'property_image': ('properties', 'PropertyImage', 'image', 10 * 1024 * 1024, IMAGE_TYPES),
+    'floor_plan': ('properties', 'PropertyFloorPlan', 'image', 10 * 1024 * 1024, IMAGE_TYPES),
+    'property_document': ('properties', 'Property', 'building_commencement_certificate', 15 * 1024 * 1024, DOCUMENT_TYPES),
+    'seller_signature': ('mandates', 'Mandate', 'seller_signature', 5 * 1024 * 1024, IMAGE_TYPES),
+    'broker_signature': ('mandates', 'Mandate', 'broker_signature', 5 * 1024 * 1024, IMAGE_TYPES),
+    'seller_selfie': ('mandates', 'Mandate', 'seller_selfie', 10 * 1024 * 1024, IMAGE_TYPES),
+    'broker_selfie': ('mandates', 'Mandate', 'broker_selfie', 10 * 1024 * 1024, IMAGE_TYPES),
+    'kyc_aadhaar': ('users', 'KYCVerification', 'aadhaar_front_image', 25 * 1024 * 1024, IMAGE_TYPES),
+    'kyc_selfie': ('users', 'KYCVerification', 'selfie_image', 10 * 1024 * 1024, IMAGE_TYPES),
+}
+
+
+# Leading bytes of each allowed content type (checked on claimed keys, whose
+# Content-Type was only declared by the client)
+SIGNATURES = {
+    'image/jpeg': [b'\xff\xd8\xff'],
+    'image/jpg': [b'\xff\xd8\xff'],
+    'image/png': [b'\x89PNG\r\n\x1a\n'],
+    'image/webp': [b'RIFF'],  # plus 'WEBP' at offset 8, see sniff_content_type
+    'application/pdf': [b'%PDF-'],
+}
+SNIFF_BYTES = 16
+
+# upload_to prefixes of the fields on private_storage
+PRIVATE_PREFIXES = ('kyc/',)
+
+
+def private_storage():
+    """Storage for identity documents (model field ``storage=`` callable)."""
+    return storages['private']
+
+
+def sniff_content_type(head, allowed_types):
+    """The first of `allowed_types` whose signature `head` (a file's leading bytes) carries, or None."""
+    for content_type in allowed_types:
+        for signature in SIGNATURES.get(content_type, []):
+            if head.startswith(signature) and (content_type != 'image/webp' or head[8:12] == b'WEBP'):
+                return content_type
+    return None
+
+
+class FileSystemMediaStorage(FileSystemStorage):
+    """
+    Local disk storage (single host / development).
+    Presigned POSTs point at our own DirectUploadView with a signed token.
+    """
+    def presigned_post(self, key, content_type, max_size, expires_in):
+        token = signing.dumps(
+            {'key': key, 'content_type': content_type, 'max_size': max_size},
+            salt=DIRECT_UPLOAD_SALT,
+        )
+        return {
+            'url': reverse('direct-upload'),
+            'fields': {'key': key, 'token': token, 'Content-Type': content_type},
+        }
+
+    def head(self, name, size):
+        with self.open(name, 'rb') as fh:
+            return fh.read(size)
+
+
+if S3Storage is not None:
+    class S3MediaStorage(S3Storage):
+        """
+        S3-compatible object storage (AWS S3, MinIO for local testing).
+        Presigned POSTs go straight to the bucket; Django never sees the bytes.
+        """
+        def presigned_post(self, key, content_type, max_size, expires_in):
+            client = self.connection.meta.client
+            return client.generate_presigned_post(
+                Bucket=self.bucket_name,
+                Key=self._normalize_name(key),
+                Fields={'Content-Type': content_type},
+                Conditions=[
+                    ['content-length-range', 1, max_size],
+                    {'Content-Type': content_type},
+                ],
+                ExpiresIn=expires_in,
+            )
+
+        def head(self, name, size):
+            """The first `size` bytes (a ranged GET, not the whole object)."""
+            response = self.bucket.Object(self._normalize_name(name)).get(Range=f'bytes=0-{size - 1}')
+            return response['Body'].read()
+
+
+def get_upload_field(target):
+    """Returns the model field backing an upload target."""
+    app_label, model_name, field_name = UPLOAD_TARGETS[target][:3]
+    return apps.get_model(app_label, model_name)._meta.get_field(field_name)
+
+
+def upload_limits(model_field):
+    """(max size, allowed content types) for keys under model_field's upload_to, or None if none are granted."""
+    for target, (_, _, _, max_size, allowed_types) in UPLOAD_TARGETS.items():
+        if get_upload_field(target).upload_to == model_field.upload_to:
+            return max_size, allowed_types
+    return None
+
+
+def storage_for_name(name):
+    """The storage a media name belongs to, for code that only has the name (direct uploads, migrate_media)."""
+    return private_storage() if name.startswith(PRIVATE_PREFIXES) else default_storage
+
+
+def key_prefix(model_field, user):
+    """All direct uploads live under '<upload_to><user id>/' so keys can be claimed safely."""
+    return f"{model_field.upload_to}{user.pk}/"
+
+
+def build_upload_key(target, user, filename):
+    _, ext = os.path.splitext(filename or '')
+    return f"{key_prefix(get_upload_field(target), user)}{uuid.uuid4().hex}{ext.lower()[:10]}"
+
+
+def create_presigned_upload(target, user, filename, content_type):
+    """Returns {'key', 'url', 'fields'} the client POSTs the file to."""
+    _, _, _, max_size, allowed_types = UPLOAD_TARGETS[target]
+    if content_type not in allowed_types:
+        raise ValueError(f"Unsupported content type. Allowed: {', '.join(allowed_types)}")
+
+    key = build_upload_key(target, user, filename)
+    post = get_upload_field(target).storage.presigned_post(
+        key, content_type, max_size, settings.DIRECT_UPLOAD_EXPIRY_SECONDS
+    )
+    return {'key': key, 'url': post['url'], 'fields': post['fields'], 'max_size': max_size}
+
+
+def claim_upload_key(key, model_field, user):
+    """
+    Validates a key sent back by a client before it is recorded on a model.
+    The key must sit under the user's prefix for that field and exist in
+    storage, within the target's size limit and with the leading bytes of one
+    of its content types (the Content-Type of the upload was the client's word).
+    """
+    if not key or '..' in key or not key.startswith(key_prefix(model_field, user)):
+        return False
+    limits = upload_limits(model_field)
+    storage = model_field.storage
+    if limits is None or not storage.exists(key):
+        return False
+    max_size, allowed_types = limits
+    if storage.size(key) > max_size:
+        return False
+    return sniff_content_type(storage.head(key, SNIFF_BYTES), allowed_types) is not None
+
+
+def uploaded_file_or_key(request, name, model_field):
+    """Returns the multipart file ``name`` or, failing that, a claimed ``<name>_key``."""
+    upload = request.FILES.get(name)
+    if upload:
+        return upload
+    key = request.data.get(f"{name}_key")
+    if key and claim_upload_key(key, model_field, request.user):
+        return key
+    return None
@@ -0,0 +1,116 @@
+import threading
+import unittest
+from unittest import mock
+
+from django.core.cache import caches
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+
+from .cache import VersionedLoader, add_or_incr_many
+from .cache_backends import CACHE_TABLE, PostgresUnloggedCache
+
+
+class AddOrIncrManyTests(TestCase):
+
+    def test_adds_increments_and_skips_zero(self):
+        cache = caches['default']
+        cache.set('counter:a', 5, timeout=None)
+        add_or_incr_many(cache, {'counter:a': 2, 'counter:b': 3, 'counter:c': 0}, timeout=60)
+        self.assertEqual(cache.get_many(['counter:a', 'counter:b', 'counter:c']), {'counter:a': 7, 'counter:b': 3})
+
+    def test_key_expiring_before_incr_is_set(self):
+        cache = caches['default']
+        cache.set('counter:a', 5, timeout=None)
+        # add() sees the key, then it expires before incr()
+        with mock.patch.object(cache, 'incr', side_effect=ValueError):
+            add_or_incr_many(cache, {'counter:a': 2})
+        self.assertEqual(cache.get('counter:a'), 2)
+
+
+class VersionedLoaderTests(TestCase):
+
+    def test_reloads_after_publish(self):
+        loads = []
+        loader = VersionedLoader('test-loader:version', lambda: loads.append(1) or len(loads), check_interval=60)
+        self.assertEqual(loader.get(), 1)
+        self.assertEqual(loader.get(), 1)
+
+        loader.publish()
+        self.assertEqual(loader.get(), 1)  # not checked again within check_interval
+        loader._checked_at -= 60
+        self.assertEqual(loader.get(), 2)
+        loader._checked_at -= 60
+        self.assertEqual(loader.get(), 2)  # same version: no reload
+        self.assertEqual(len(loads), 2)
+
+
+class PostgresUnloggedCacheTests(TestCase):
+
+    def make_cache(self, max_entries):
+        return PostgresUnloggedCache(CACHE_TABLE, {'OPTIONS': {'MAX_ENTRIES': max_entries, 'CULL_FREQUENCY': 2}})
+
+    def insert(self, cache, keys, timeout):
+        # Raw rows, so no write path gets to cull while the table fills up
+        table = connection.ops.quote_name(CACHE_TABLE)
+        with connection.cursor() as cursor:
+            for key in keys:
+                cursor.execute(
+                    f"INSERT INTO {table} (cache_key, value, expires) VALUES (%s, %s, %s)",
+                    [cache.make_and_validate_key(key), cache._encode(1), cache._expiry(connection, timeout)],
+                )
+
+    def count(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT COUNT(*) FROM {connection.ops.quote_name(CACHE_TABLE)}")
+            return cursor.fetchone()[0]
+
+    def test_incr_keeps_integers_readable(self):
+        cache = self.make_cache(100)
+        cache.set('hits', 41)
+        self.assertEqual(cache.incr('hits'), 42)
+        self.assertEqual(cache.incr('hits', 8), 50)
+        self.assertEqual(cache.get('hits'), 50)
+        with self.assertRaises(ValueError):
+            cache.incr('missing')
+
+    def test_cull_sweeps_expired_rows(self):
+        cache = self.make_cache(10)
+        self.insert(cache, [f'live-{n}' for n in range(5)], timeout=60)
+        self.insert(cache, [f'expired-{n}' for n in range(3)], timeout=-1)
+        cache._cull_to_limit(connection)
+        self.assertEqual(self.count(), 5)
+        self.assertEqual(len(cache.get_many([f'live-{n}' for n in range(5)])), 5)
+
+    def test_cull_enforces_max_entries(self):
+        cache = self.make_cache(10)
+        # Keys without a timeout are culled too once the table is over the limit
+        self.insert(cache, [f'forever-{n}' for n in range(20)], timeout=None)
+        cache._cull_to_limit(connection)
+        self.assertLessEqual(self.count(), 10)
+
+
+@unittest.skipUnless(connection.vendor == 'postgresql', 'single-statement incr() is Postgres only')
+class PostgresUnloggedCacheConcurrencyTests(TransactionTestCase):
+
+    def test_concurrent_incr_loses_nothing(self):
+        cache = PostgresUnloggedCache(CACHE_TABLE, {})
+        cache.set('hits', 0, timeout=None)
+        threads_count, per_thread = 8, 50
+        errors = []
+
+        def bump():
+            try:
+                for _ in range(per_thread):
+                    cache.incr('hits')
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=bump) for _ in range(threads_count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        self.assertEqual(cache.get('hits'), threads_count * per_thread)
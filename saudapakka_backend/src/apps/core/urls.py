@@ -0,0 +1,7 @@
+from django.urls import path
+from .views import PresignUploadView, DirectUploadView
+
+urlpatterns = [
+    path('uploads/presign/', PresignUploadView.as_view(), name='presign-upload'),
+    path('uploads/direct/', DirectUploadView.as_view(), name='direct-upload'),
+]
@@ -0,0 +1,62 @@
+from django.conf import settings
+from django.core import signing
+from rest_framework import permissions, status
+from rest_framework.parsers import FormParser, MultiPartParser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .serializers import PresignUploadSerializer
+from .storage import DIRECT_UPLOAD_SALT, create_presigned_upload, storage_for_name
+
+
+class PresignUploadView(APIView):
+    """
+    Step 1 of a direct upload: hand the client a presigned POST.
+    POST /api/uploads/presign/ { "target": "property_image", "filename": "a.jpg", "content_type": "image/jpeg" }
+    The client POSTs the file to 'url' with 'fields', then sends 'key' back
+    as '<field>_key' on the normal create/update endpoint.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        serializer = PresignUploadSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            upload = create_presigned_upload(user=request.user, **serializer.validated_data)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=400)
+        return Response(upload, status=201)
+
+
+class DirectUploadView(APIView):
+    """
+    Upload target for the filesystem backend (S3 presigned POSTs bypass Django).
+    Authorised by the signed token from PresignUploadView, like an S3 policy.
+    """
+    authentication_classes = []
+    permission_classes = [permissions.AllowAny]
+    parser_classes = [MultiPartParser, FormParser]
+
+    def post(self, request):
+        try:
+            grant = signing.loads(
+                request.data.get('token', ''),
+                salt=DIRECT_UPLOAD_SALT,
+                max_age=settings.DIRECT_UPLOAD_EXPIRY_SECONDS,
+            )
+        except signing.BadSignature:
+            return Response({"error": "Invalid or expired upload token"}, status=403)
+
+        upload = request.FILES.get('file')
+        if not upload or request.data.get('key') != grant['key']:
+            return Response({"error": "File and matching key are required"}, status=400)
+        if upload.size > grant['max_size']:
+            return Response({"error": "File exceeds the allowed size"}, status=400)
+        if upload.content_type != grant['content_type']:
+            return Response({"error": "Content type does not match the upload grant"}, status=400)
+        storage = storage_for_name(grant['key'])
+        if storage.exists(grant['key']):
+            return Response({"error": "Upload key already used"}, status=409)
+
+        storage.save(grant['key'], upload)
+        return Response({"key": grant['key']}, status=status.HTTP_201_CREATED)
@@ -0,0 +1,32 @@
+from django.contrib import admin
+from django.db import transaction
+
+from .models import DeadLetterJob, Job
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'task', 'queue', 'priority', 'run_at', 'attempts', 'max_attempts', 'locked_by', 'created_at')
+    list_filter = ('queue', 'task')
+    search_fields = ('task', 'locked_by')
+    readonly_fields = ('locked_at', 'locked_by', 'last_error', 'created_at')
+
+
+@admin.register(DeadLetterJob)
+class DeadLetterJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'task', 'queue', 'attempts', 'failed_at')
+    list_filter = ('queue', 'task')
+    search_fields = ('task', 'last_error')
+    actions = ['requeue']
+
+    @admin.action(description="Requeue selected jobs")
+    def requeue(self, request, queryset):
+        with transaction.atomic():
+            for dead in queryset:
+                Job.objects.create(
+                    queue=dead.queue, task=dead.task, args=dead.args, kwargs=dead.kwargs,
+                    priority=dead.priority,
+                )
+            count = queryset.count()
+            queryset.delete()
+        self.message_user(request, f"Requeued {count} jobs.")
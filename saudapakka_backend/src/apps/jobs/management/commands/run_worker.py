@@ -0,0 +1,60 @@
+import signal
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.jobs.registry import registered_tasks
+from apps.jobs.worker import Worker
+
+
+class Command(BaseCommand):
+    help = 'Runs background jobs from the database queue (e.g. run_worker --queue default:2 --queue email:1:20).'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--queue', action='append', dest='queues', metavar='NAME[:CONCURRENCY[:BATCH]]',
+            help="Queue to serve, optionally with a thread count and claim batch size. Repeatable. Default: 'default:1'.",
+        )
+        parser.add_argument('--concurrency', type=int, default=1, help='Threads for queues given without a count.')
+        parser.add_argument('--batch-size', type=int, default=1, help='Jobs claimed per round trip.')
+        parser.add_argument('--poll-interval', type=float, default=1.0, help='Max seconds to sleep when idle.')
+        parser.add_argument('--once', action='store_true',
+                            help='Enqueue due recurring tasks, run the jobs that are due now, then exit.')
+
+    def handle(self, *args, **options):
+        queues, batch_sizes = {}, {}
+        for spec in options['queues'] or ['default']:
+            name, _, rest = spec.partition(':')
+            count, _, batch = rest.partition(':')
+            try:
+                queues[name] = int(count) if count else options['concurrency']
+                if batch:
+                    batch_sizes[name] = int(batch)
+            except ValueError:
+                raise CommandError(f"Invalid queue spec '{spec}', expected NAME[:CONCURRENCY[:BATCH]]")
+            if queues[name] < 1 or batch_sizes.get(name, 1) < 1:
+                raise CommandError(f"Concurrency and batch size for '{name}' must be at least 1")
+
+        worker = Worker(
+            queues, batch_size=options['batch_size'], poll_interval=options['poll_interval'],
+            batch_sizes=batch_sizes,
+        )
+
+        if options['once']:
+            worker.housekeeping()
+            total = 0
+            while True:
+                ran = worker.run_once()
+                if not ran:
+                    break
+                total += ran
+            self.stdout.write(self.style.SUCCESS(f'Ran {total} jobs.'))
+            return
+
+        signal.signal(signal.SIGTERM, worker.stop)
+        signal.signal(signal.SIGINT, worker.stop)
+        self.stdout.write(self.style.SUCCESS(
+            f"Worker {worker.name} serving {', '.join(f'{q}:{n}' for q, n in queues.items())} "
+            f"({len(registered_tasks())} tasks registered)"
+        ))
+        worker.run()
+        self.stdout.write('Worker stopped.')
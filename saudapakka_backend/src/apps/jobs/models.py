@@ -0,0 +1,62 @@
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+from django.utils import timezone
+
+
+class Job(models.Model):
+    """
+    A unit of background work waiting to run (or running) in 'manage.py run_worker'.
+    Rows are deleted once the task succeeds; exhausted ones move to DeadLetterJob.
+    """
+    queue = models.CharField(max_length=50, default='default')
+    task = models.CharField(max_length=200)
+    args = models.JSONField(default=list, encoder=DjangoJSONEncoder)
+    kwargs = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+
+    priority = models.SmallIntegerField(default=0, help_text="Higher runs first")
+    run_at = models.DateTimeField(default=timezone.now, help_text="Not picked up before this time")
+
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=5)
+    last_error = models.TextField(blank=True)
+
+    # Set while a worker is executing the job; cleared on retry
+    locked_at = models.DateTimeField(null=True, blank=True)
+    locked_by = models.CharField(max_length=100, blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # Claim query: unlocked jobs of a queue that are due, best priority first
+            models.Index(
+                fields=['queue', '-priority', 'run_at'],
+                name='jobs_job_claim_idx',
+                condition=models.Q(locked_at__isnull=True),
+            ),
+            models.Index(fields=['locked_at'], name='jobs_job_locked_idx',
+                         condition=models.Q(locked_at__isnull=False)),
+        ]
+
+    def __str__(self):
+        return f"{self.task} [{self.queue}] #{self.pk}"
+
+
+class DeadLetterJob(models.Model):
+    """Jobs that failed max_attempts times; kept for inspection and manual requeue."""
+    original_id = models.BigIntegerField()
+    queue = models.CharField(max_length=50)
+    task = models.CharField(max_length=200)
+    args = models.JSONField(default=list, encoder=DjangoJSONEncoder)
+    kwargs = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+    priority = models.SmallIntegerField(default=0)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField()
+    failed_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-failed_at']
+
+    def __str__(self):
+        return f"{self.task} [{self.queue}] failed after {self.attempts} attempts"
@@ -0,0 +1,98 @@
+"""
+Task registry and enqueueing.
+
+    # apps/<app>/jobs.py  (auto-imported at startup)
+    from apps.jobs.registry import task
+
+    @task(queue='email', max_attempts=3)
+    def send_welcome_email(user_id):
+        ...
+
+    # In a view: returns immediately, a worker runs it
+    send_welcome_email.enqueue(str(user.id))
+    send_welcome_email.enqueue_at(timezone.now() + timedelta(hours=1), str(user.id))
+
+    # Recurring: run_worker enqueues it once per hour across all workers
+    @task(queue='default', every=3600)
+    def refresh_scores():
+        ...
+
+Arguments must be JSON-serialisable (ids, strings, numbers) - pass primary
+keys, not model instances. The Job row is written in the caller's transaction,
+so it is only visible to workers if that transaction commits.
+"""
+from datetime import timedelta
+
+from django.utils import timezone
+
+_tasks = {}
+
+
+class Task:
+    def __init__(self, func, name, queue, priority, max_attempts, on_dead_letter=None, every=None):
+        self.func = func
+        self.name = name
+        self.queue = queue
+        self.priority = priority
+        self.max_attempts = max_attempts
+        self.on_dead_letter = on_dead_letter
+        self.every = every
+        self.__doc__ = func.__doc__
+
+    def __call__(self, *args, **kwargs):
+        """Runs the task inline (tests, management commands)."""
+        return self.func(*args, **kwargs)
+
+    def enqueue(self, *args, **kwargs):
+        return enqueue(self.name, args, kwargs)
+
+    def enqueue_at(self, run_at, *args, **kwargs):
+        return enqueue(self.name, args, kwargs, run_at=run_at)
+
+    def __repr__(self):
+        return f"<Task {self.name} queue={self.queue}>"
+
+
+def task(name=None, queue='default', priority=0, max_attempts=5, on_dead_letter=None, every=None):
+    """
+    Registers a function as a background task.
+    `on_dead_letter` is called with the job's arguments once it has failed for good.
+    `every` (seconds) makes it recurring: the workers enqueue it, without
+    arguments, once per period (see worker.enqueue_periodic).
+    """
+    def decorator(func):
+        task_name = name or f"{func.__module__}.{func.__name__}"
+        registered = Task(func, task_name, queue, priority, max_attempts, on_dead_letter, every)
+        _tasks[task_name] = registered
+        return registered
+    return decorator
+
+
+def get_task(name):
+    return _tasks[name]
+
+
+def registered_tasks():
+    return dict(_tasks)
+
+
+def periodic_tasks():
+    return {name: registered for name, registered in _tasks.items() if registered.every}
+
+
+def enqueue(name, args=(), kwargs=None, *, queue=None, priority=None, run_at=None, delay=None, max_attempts=None):
+    """Creates a Job for a registered task. Options override the task's defaults."""
+    from .models import Job
+
+    registered = get_task(name)
+    if run_at is None:
+        run_at = timezone.now() + timedelta(seconds=delay or 0)
+    return Job.objects.create(
+        task=name,
+        queue=queue or registered.queue,
+        priority=registered.priority if priority is None else priority,
+        max_attempts=max_attempts or registered.max_attempts,
+        args=list(args),
+        kwargs=kwargs or {},
+        run_at=run_at,
+    )
@@ -0,0 +1,220 @@
+"""
+Job worker: claims due jobs with SELECT ... FOR UPDATE SKIP LOCKED so any
+number of worker processes/threads can share a queue without double-running
+a job, and without a broker.
+
+A claimed job is marked (locked_at/locked_by) in a short transaction and then
+executed outside it, so long tasks never hold row locks. If a worker dies
+mid-job the lock goes stale after JOBS_LOCK_TIMEOUT and another worker retries it.
+
+Recurring tasks (@task(every=...)) are enqueued by the same housekeeping loop:
+once per period slot, with an add() on the shared cache deciding which of the
+running workers does it.
+"""
+import logging
+import os
+import random
+import socket
+import threading
+import time
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import close_old_connections, connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import DeadLetterJob, Job
+from .registry import enqueue, get_task, periodic_tasks
+
+logger = logging.getLogger(__name__)
+
+# Retry delay: exponential from BACKOFF_BASE, capped at BACKOFF_MAX, with jitter
+BACKOFF_BASE = 5
+BACKOFF_MAX = 3600
+
+RECOVER_EVERY = 60  # seconds between housekeeping rounds (stale locks, recurring tasks)
+
+
+def backoff(attempts):
+    delay = min(BACKOFF_MAX, BACKOFF_BASE * 2 ** max(attempts - 1, 0))
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+def move_to_dead_letter(job, error):
+    with transaction.atomic():
+        DeadLetterJob.objects.create(
+            original_id=job.pk, queue=job.queue, task=job.task, args=job.args, kwargs=job.kwargs,
+            priority=job.priority, attempts=job.attempts, last_error=error, created_at=job.created_at,
+        )
+        Job.objects.filter(pk=job.pk).delete()
+    logger.error("Job %s (%s) moved to dead letter after %s attempts", job.pk, job.task, job.attempts)
+
+    try:
+        registered = get_task(job.task)
+    except KeyError:
+        return
+    if registered.on_dead_letter:
+        try:
+            registered.on_dead_letter(*job.args, **job.kwargs)
+        except Exception:
+            logger.exception("on_dead_letter hook of %s failed", job.task)
+
+
+def claim(queues, worker_id, limit=1):
+    """Locks up to `limit` due jobs for this worker and returns them."""
+    now = timezone.now()
+    with transaction.atomic():
+        jobs = list(
+            Job.objects.select_for_update(skip_locked=True)
+            .filter(queue__in=queues, locked_at__isnull=True, run_at__lte=now)
+            .order_by('-priority', 'run_at', 'id')[:limit]
+        )
+        if jobs:
+            Job.objects.filter(pk__in=[j.pk for j in jobs]).update(
+                locked_at=now, locked_by=worker_id, attempts=F('attempts') + 1
+            )
+    for job in jobs:
+        job.attempts += 1
+        job.locked_at = now
+        job.locked_by = worker_id
+    return jobs
+
+
+def execute(job):
+    """Runs one claimed job and records the outcome. Returns True on success."""
+    try:
+        registered = get_task(job.task)
+    except KeyError:
+        move_to_dead_letter(job, f"Unknown task '{job.task}'")
+        return False
+
+    try:
+        registered.func(*job.args, **job.kwargs)
+    except Exception:
+        error = traceback.format_exc()
+        if job.attempts >= job.max_attempts:
+            move_to_dead_letter(job, error)
+        else:
+            delay = backoff(job.attempts)
+            Job.objects.filter(pk=job.pk).update(
+                locked_at=None, locked_by='', last_error=error,
+                run_at=timezone.now() + timedelta(seconds=delay),
+            )
+            logger.warning("Job %s (%s) failed, retry %s/%s in %.0fs",
+                           job.pk, job.task, job.attempts, job.max_attempts, delay)
+        return False
+
+    Job.objects.filter(pk=job.pk).delete()
+    return True
+
+
+def recover_stale_jobs(lock_timeout=None):
+    """Releases jobs whose worker disappeared (or dead-letters them if out of attempts)."""
+    lock_timeout = lock_timeout or settings.JOBS_LOCK_TIMEOUT
+    cutoff = timezone.now() - timedelta(seconds=lock_timeout)
+    recovered = 0
+    with transaction.atomic():
+        stale = list(Job.objects.select_for_update(skip_locked=True).filter(locked_at__lt=cutoff))
+        for job in stale:
+            error = f"Lock held by {job.locked_by} expired after {lock_timeout}s"
+            if job.attempts >= job.max_attempts:
+                move_to_dead_letter(job, error)
+            else:
+                Job.objects.filter(pk=job.pk).update(locked_at=None, locked_by='', last_error=error)
+                recovered += 1
+    return recovered
+
+
+def enqueue_periodic(now=None):
+    """Enqueues each recurring task whose current period hasn't been enqueued yet; returns their names."""
+    now = time.time() if now is None else now
+    cache = caches['default']
+    enqueued = []
+    for name, registered in periodic_tasks().items():
+        slot = int(now // registered.every)
+        if cache.add(f"jobs:periodic:{name}:{slot}", 1, timeout=int(registered.every) * 2 + RECOVER_EVERY):
+            enqueue(name)
+            enqueued.append(name)
+    return enqueued
+
+
+class Worker:
+    """
+    Executes jobs with a thread pool per queue.
+    `queues` maps queue name -> number of threads (concurrency) for that queue;
+    `batch_sizes` optionally overrides how many jobs a thread claims at once per queue.
+    """
+
+    def __init__(self, queues, batch_size=1, poll_interval=1.0, batch_sizes=None):
+        self.queues = dict(queues)
+        self.batch_size = batch_size
+        self.batch_sizes = batch_sizes or {}
+        self.poll_interval = poll_interval
+        self.stop_event = threading.Event()
+        self.name = f"{socket.gethostname()}:{os.getpid()}"
+
+    def stop(self, *args):
+        self.stop_event.set()
+
+    def run(self):
+        threads = [
+            threading.Thread(
+                target=self._loop, args=([queue], f"{self.name}:{queue}:{i}"),
+                name=f"job-worker-{queue}-{i}", daemon=True,
+            )
+            for queue, concurrency in self.queues.items()
+            for i in range(concurrency)
+        ]
+        for thread in threads:
+            thread.start()
+
+        self.housekeeping()
+        while not self.stop_event.wait(RECOVER_EVERY):
+            self.housekeeping()
+
+        for thread in threads:
+            thread.join()
+        connection.close()
+
+    def housekeeping(self):
+        close_old_connections()
+        try:
+            recovered = recover_stale_jobs()
+            if recovered:
+                logger.warning("Recovered %s stale jobs", recovered)
+        except Exception:
+            logger.exception("Stale job recovery failed")
+        try:
+            for name in enqueue_periodic():
+                logger.info("Enqueued recurring task %s", name)
+        except Exception:
+            logger.exception("Enqueueing recurring tasks failed")
+
+    def run_once(self, queues=None, worker_id=None):
+        """Claims and executes one batch; returns how many jobs ran (used by --once and tests)."""
+        queues = queues or list(self.queues)
+        limit = self.batch_sizes.get(queues[0], self.batch_size) if len(queues) == 1 else self.batch_size
+        jobs = claim(queues, worker_id or f"{self.name}:0", limit)
+        for job in jobs:
+            execute(job)
+        return len(jobs)
+
+    def _loop(self, queues, worker_id):
+        idle = 0
+        while not self.stop_event.is_set():
+            close_old_connections()
+            try:
+                ran = self.run_once(queues, worker_id)
+            except Exception:
+                logger.exception("Worker %s failed to claim jobs", worker_id)
+                ran = 0
+            if ran:
+                idle = 0
+                continue
+            # Back off gently while the queue is empty
+            idle = min(idle + 1, 5)
+            self.stop_event.wait(self.poll_interval * idle / 5)
+        connection.close()
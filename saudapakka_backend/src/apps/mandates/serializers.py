@@ -1,8 +1,10 @@
 from rest_framework import serializers
 from .models import Mandate
 from apps.properties.serializers import PropertySerializer
+from apps.core.serializers import StorageKeyMixin
+from apps.core.fieldsets import SparseFieldsetMixin
 
-class MandateSerializer(serializers.ModelSerializer):
+class MandateSerializer(SparseFieldsetMixin, StorageKeyMixin, serializers.ModelSerializer):
     # 1. Expand property details using the renamed source 'property_item'
     property_details = PropertySerializer(source='property_item', read_only=True)
     
@@ -48,6 +50,16 @@ class MandateSerializer(serializers.ModelSerializer):
             'mandate_number'
         ]
         read_only_fields = ['status', 'acceptance_expires_at', 'end_date', 'signed_at', 'seller']
+        # Only with ?expand= (or named in ?fields=) once ?fields= is given
+        expandable_fields = ['property_details']
+        # Model fields read by method fields/properties (for the ?fields= .only() projection)
+        field_sources = {
+            'seller_name': ['seller'],
+            'seller_role': ['seller'],
+            'broker_name': ['deal_type', 'broker'],
+            'days_remaining': ['status', 'end_date'],
+            'is_expired': ['status', 'end_date'],
+        }
 
     def get_seller_name(self, obj):
         if obj.seller:
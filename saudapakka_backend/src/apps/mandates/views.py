@@ -8,8 +8,11 @@ from .serializers import MandateSerializer
 from rest_framework.exceptions import ValidationError
 from apps.notifications.models import Notification
 from apps.users.models import User
+from apps.core.storage import uploaded_file_or_key
+from apps.core.idempotency import idempotent
+from apps.core.fieldsets import SparseFieldsetViewMixin
 
-class MandateViewSet(viewsets.ModelViewSet):
+class MandateViewSet(SparseFieldsetViewMixin, viewsets.ModelViewSet):
     serializer_class = MandateSerializer
     permission_classes = [permissions.IsAuthenticated]
     
@@ -19,10 +22,12 @@ class MandateViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         user = self.request.user
+        # seller/broker names are on every row
+        mandates = Mandate.objects.select_related('seller', 'broker')
         if user.is_staff:
-            return Mandate.objects.all()
+            return mandates.all()
             
-        return Mandate.objects.filter(
+        return mandates.filter(
             Q(seller=user) | Q(broker=user)
         ).distinct()
 
@@ -52,6 +57,10 @@ class MandateViewSet(viewsets.ModelViewSet):
         # Check cached KYC status (no DB query!)
         return not user.is_kyc_verified
 
+    @idempotent('mandate-create')
+    def create(self, request, *args, **kwargs):
+        return super().create(request, *args, **kwargs)
+
     def perform_create(self, serializer):
         user = self.request.user
         
@@ -91,8 +100,8 @@ class MandateViewSet(viewsets.ModelViewSet):
             
             seller = property_instance.owner
             
-            sys_broker_sig = self.request.FILES.get('broker_signature') or self.request.data.get('broker_signature')
-            sys_broker_selfie = self.request.FILES.get('broker_selfie') or self.request.data.get('broker_selfie')
+            sys_broker_sig = self.request.FILES.get('broker_signature') or serializer.validated_data.get('broker_signature')
+            sys_broker_selfie = self.request.FILES.get('broker_selfie') or serializer.validated_data.get('broker_selfie')
             
             # Validation
             if not sys_broker_sig: raise ValidationError("Broker signature is mandatory.")
@@ -110,8 +119,8 @@ class MandateViewSet(viewsets.ModelViewSet):
         elif initiated_by == 'SELLER':
             deal_type = self.request.data.get('deal_type')
             
-            sys_seller_sig = self.request.FILES.get('seller_signature') or self.request.data.get('seller_signature')
-            sys_seller_selfie = self.request.FILES.get('seller_selfie') or self.request.data.get('seller_selfie')
+            sys_seller_sig = self.request.FILES.get('seller_signature') or serializer.validated_data.get('seller_signature')
+            sys_seller_selfie = self.request.FILES.get('seller_selfie') or serializer.validated_data.get('seller_selfie')
 
             # Validation
             if not sys_seller_sig: raise ValidationError("Seller signature is mandatory.")
@@ -172,8 +181,10 @@ class MandateViewSet(viewsets.ModelViewSet):
         if mandate.status != 'PENDING':
             return Response({"error": "This mandate is not in a pending state."}, status=400)
 
-        signature_file = request.FILES.get('signature')
-        selfie_file = request.FILES.get('selfie')
+        # Files may arrive as multipart or as presigned upload keys ('signature_key', 'selfie_key')
+        signer_side = 'seller' if request.user == mandate.seller else 'broker'
+        signature_file = uploaded_file_or_key(request, 'signature', Mandate._meta.get_field(f'{signer_side}_signature'))
+        selfie_file = uploaded_file_or_key(request, 'selfie', Mandate._meta.get_field(f'{signer_side}_selfie'))
         
         if not signature_file:
             return Response({"error": "Digital signature file is required to accept."}, status=400)
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Property, PropertyImage, PropertyFloorPlan, SavedProperty
+from .models import Property, PropertyImage, PropertyFloorPlan, SavedProperty, City, CityAlias, Locality, LocalityAlias, PointOfInterest, HomeFeedItem
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
@@ -22,6 +22,49 @@ class SavedPropertyAdmin(admin.ModelAdmin):
     readonly_fields = ['saved_at']
     date_hierarchy = 'saved_at'
 
+class CityAliasInline(admin.TabularInline):
+    model = CityAlias
+    extra = 1
+
+class LocalityAliasInline(admin.TabularInline):
+    model = LocalityAlias
+    fk_name = 'locality'
+    exclude = ['city']
+    extra = 1
+
+@admin.register(City)
+class CityAdmin(admin.ModelAdmin):
+    list_display = ['name', 'slug', 'state']
+    search_fields = ['name', 'slug', 'aliases__alias']
+    inlines = [CityAliasInline]
+
+@admin.register(Locality)
+class LocalityAdmin(admin.ModelAdmin):
+    list_display = ['name', 'city', 'slug']
+    list_filter = ['city']
+    search_fields = ['name', 'slug', 'aliases__alias']
+    inlines = [LocalityAliasInline]
+
+    def save_formset(self, request, form, formset, change):
+        # Aliases are unique per city, so they carry the locality's city
+        for alias in formset.save(commit=False):
+            alias.city_id = form.instance.city_id
+            alias.save()
+        for alias in formset.deleted_objects:
+            alias.delete()
+
+@admin.register(PointOfInterest)
+class PointOfInterestAdmin(admin.ModelAdmin):
+    list_display = ['name', 'category', 'latitude', 'longitude', 'osm_id']
+    list_filter = ['category']
+    search_fields = ['name', 'osm_id']
+
+@admin.register(HomeFeedItem)
+class HomeFeedItemAdmin(admin.ModelAdmin):
+    list_display = ['carousel', 'city', 'position', 'property', 'built_at']
+    list_filter = ['carousel', 'city']
+    readonly_fields = ['carousel', 'city', 'position', 'property', 'card', 'built_at']
+
 @admin.register(Property)
 class PropertyAdmin(admin.ModelAdmin):
     inlines = [PropertyImageInline, PropertyFloorPlanInline]
@@ -62,7 +105,10 @@ class PropertyAdmin(admin.ModelAdmin):
             'fields': ('total_price', 'price_per_sqft', 'maintenance_charges', 'maintenance_interval', 'super_builtup_area', 'carpet_area', 'plot_area')
         }),
         ('Location Details', {
-            'fields': ('address_line', 'locality', 'city', 'pincode', 'latitude', 'longitude', 'landmarks')
+            'fields': ('address_line', 'locality', 'city', 'pincode', 'latitude', 'longitude', 'location_precision', 'city_ref', 'locality_ref', 'canonical_locality_id', 'landmarks')
+        }),
+        ('Nearby (km)', {
+            'fields': ('nearest_school_km', 'nearest_hospital_km', 'nearest_metro_km', 'nearest_railway_km', 'nearest_park_km')
         }),
         ('Building & Status', {
             'fields': ('specific_floor', 'total_floors', 'facing', 'availability_status', 'possession_date', 'age_of_construction')
@@ -94,10 +140,16 @@ class PropertyAdmin(admin.ModelAdmin):
         ('Media & Contact', {
             'fields': ('video_url', 'floor_plan', 'whatsapp_number', 'listed_by')
         }),
+        ('Ranking', {
+            'fields': ('is_featured', 'priority_listing', 'views_count', 'rank_score')
+        }),
     )
 
     # 5. Read-only fields
-    readonly_fields = ('created_at',)
+    readonly_fields = (
+        'created_at', 'city_ref', 'locality_ref', 'canonical_locality_id', 'nearest_school_km',
+        'nearest_hospital_km', 'nearest_metro_km', 'nearest_railway_km', 'nearest_park_km', 'rank_score',
+    )
 
     def owner_display(self, obj):
         """
@@ -0,0 +1,175 @@
+"""
+Canonical locality lookup from boundary polygons.
+
+    locality_id = locate(18.559, 73.786)          # 'pune/baner' or None
+    ids = locate_many(lats, lngs)                  # vectorised, NumPy arrays
+
+Ward / locality polygons come from the GeoJSON FeatureCollection at
+LOCALITY_BOUNDARIES_PATH. Each feature needs a stable id (properties.id,
+properties.locality_id or the feature id) and may carry name/city. Polygons are
+bucketed into a uniform lat/lng grid; a lookup tests only the polygons whose
+bounding box overlaps the point's cell, using an even-odd ray cast over all
+rings (so holes and MultiPolygons work). Where polygons overlap (a locality
+inside a ward) the smallest one wins.
+
+The file is loaded once per process and re-read when its mtime changes.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+
+import numpy as np
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+CELL_SIZE = 0.02  # degrees (~2km); a polygon is registered in every cell its bbox touches
+MTIME_CHECK_INTERVAL = 60
+
+_lock = threading.Lock()
+_index = None
+_checked_at = 0.0
+
+
+class Boundary:
+    def __init__(self, locality_id, name, city, rings):
+        self.id = locality_id
+        self.name = name
+        self.city = city
+        edges = []
+        for ring in rings:
+            ring = np.asarray(ring, dtype=np.float64)[:, :2]
+            edges.append(np.hstack([ring[:-1], ring[1:]]))  # x1, y1, x2, y2 (x=lng, y=lat)
+        self.edges = np.vstack(edges)
+        points = self.edges[:, :2]
+        self.bbox = (points[:, 0].min(), points[:, 1].min(), points[:, 0].max(), points[:, 1].max())
+        # Shoelace over all rings (holes are oriented opposite, so they subtract)
+        x1, y1, x2, y2 = self.edges.T
+        self.area = abs(float(np.sum(x1 * y2 - x2 * y1))) / 2
+
+    def contains(self, lngs, lats):
+        """Boolean array: which of the points are inside (even-odd rule)."""
+        lngs = np.asarray(lngs, dtype=np.float64)[:, None]
+        lats = np.asarray(lats, dtype=np.float64)[:, None]
+        x1, y1, x2, y2 = self.edges.T
+        crosses = (y1 > lats) != (y2 > lats)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            x_at = x1 + (lats - y1) * (x2 - x1) / (y2 - y1)
+        return (np.count_nonzero(crosses & (lngs < x_at), axis=1) % 2) == 1
+
+
+def _feature_rings(geometry):
+    if not geometry:
+        return []
+    if geometry['type'] == 'Polygon':
+        return geometry['coordinates']
+    if geometry['type'] == 'MultiPolygon':
+        return [ring for polygon in geometry['coordinates'] for ring in polygon]
+    return []
+
+
+class BoundaryIndex:
+    def __init__(self, boundaries):
+        # Smallest first, so the first match in a cell is the most specific
+        self.boundaries = sorted(boundaries, key=lambda boundary: boundary.area)
+        self.cells = defaultdict(list)
+        for position, boundary in enumerate(self.boundaries):
+            min_x, min_y, max_x, max_y = boundary.bbox
+            for cx in range(int(np.floor(min_x / CELL_SIZE)), int(np.floor(max_x / CELL_SIZE)) + 1):
+                for cy in range(int(np.floor(min_y / CELL_SIZE)), int(np.floor(max_y / CELL_SIZE)) + 1):
+                    self.cells[(cx, cy)].append(position)
+        self.by_id = {boundary.id: boundary for boundary in self.boundaries}
+
+    @classmethod
+    def from_geojson(cls, path):
+        with open(path) as f:
+            data = json.load(f)
+        boundaries = []
+        for feature in data.get('features', []):
+            props = feature.get('properties') or {}
+            locality_id = props.get('id') or props.get('locality_id') or feature.get('id')
+            rings = [ring for ring in _feature_rings(feature.get('geometry')) if len(ring) >= 4]
+            if not locality_id or not rings:
+                continue
+            boundaries.append(Boundary(str(locality_id), props.get('name', ''), props.get('city', ''), rings))
+        return cls(boundaries)
+
+    def __len__(self):
+        return len(self.boundaries)
+
+    def locate(self, lat, lng):
+        if lat is None or lng is None:
+            return None
+        for position in self.cells.get((int(np.floor(lng / CELL_SIZE)), int(np.floor(lat / CELL_SIZE))), ()):
+            boundary = self.boundaries[position]
+            min_x, min_y, max_x, max_y = boundary.bbox
+            if min_x <= lng <= max_x and min_y <= lat <= max_y and boundary.contains([lng], [lat])[0]:
+                return boundary.id
+        return None
+
+    def locate_many(self, lats, lngs):
+        """
+        Object array of locality ids (None where nothing matches) for many points.
+        Works polygon by polygon: each is tested against all still-unassigned
+        points inside its bbox in one vectorised pass.
+        """
+        lats = np.asarray(lats, dtype=np.float64)
+        lngs = np.asarray(lngs, dtype=np.float64)
+        result = np.full(len(lats), None, dtype=object)
+        unassigned = ~(np.isnan(lats) | np.isnan(lngs))
+        for boundary in self.boundaries:
+            min_x, min_y, max_x, max_y = boundary.bbox
+            candidates = np.flatnonzero(
+                unassigned & (lngs >= min_x) & (lngs <= max_x) & (lats >= min_y) & (lats <= max_y)
+            )
+            if not len(candidates):
+                continue
+            # Bounded chunks keep the points x edges matrix small
+            for start in range(0, len(candidates), 2048):
+                chunk = candidates[start:start + 2048]
+                inside = chunk[boundary.contains(lngs[chunk], lats[chunk])]
+                result[inside] = boundary.id
+                unassigned[inside] = False
+        return result
+
+
+def _load():
+    path = settings.LOCALITY_BOUNDARIES_PATH
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return BoundaryIndex([]), None
+    try:
+        index = BoundaryIndex.from_geojson(path)
+    except (OSError, ValueError, KeyError) as e:
+        logger.error(f"Could not load locality boundaries from {path}: {e}")
+        return BoundaryIndex([]), mtime
+    return index, mtime
+
+
+def get_index():
+    global _index, _checked_at
+    now = time.monotonic()
+    if _index is not None and now - _checked_at < MTIME_CHECK_INTERVAL:
+        return _index[0]
+    with _lock:
+        if _index is None or time.monotonic() - _checked_at >= MTIME_CHECK_INTERVAL:
+            try:
+                mtime = os.path.getmtime(settings.LOCALITY_BOUNDARIES_PATH)
+            except OSError:
+                mtime = None
+            if _index is None or mtime != _index[1]:
+                _index = _load()
+            _checked_at = time.monotonic()
+    return _index[0]
+
+
+def locate(lat, lng):
+    return get_index().locate(lat, lng)
+
+
+def locate_many(lats, lngs):
+    return get_index().locate_many(lats, lngs)
@@ -0,0 +1,135 @@
+"""
+Offline approximate coordinates from pincode / locality centroids.
+
+    lat, lng, precision = approximate_location('411045', 'Pune', 'Baner')
+    # precision: 'LOCALITY', 'PINCODE', 'CITY', or None when nothing matched
+
+PincodeCentroid and LocalityCentroid (filled by manage.py import_pincodes) are
+loaded once per process into sorted NumPy key arrays with parallel float32
+coordinate arrays, so a lookup is a binary search (np.searchsorted) with no
+query: a few microseconds. City centroids are derived at load time as the mean
+of the city's pincodes. The import bumps a version key in the shared cache and
+every process reloads on its next lookup after noticing it.
+"""
+import hashlib
+import re
+
+import numpy as np
+
+from apps.core.cache import VersionedLoader
+
+VERSION_KEY = 'centroids:version'
+VERSION_CHECK_INTERVAL = 60  # seconds between shared-cache version checks
+
+# India Post office-name suffixes (Baner S.O, Pune H.O, Mumbai G.P.O, ...)
+_OFFICE_SUFFIX = re.compile(r'\s+(b\.?o|s\.?o|h\.?o|g\.?p\.?o)\.?$')
+
+
+def normalize_place(name):
+    text = ' '.join(str(name or '').lower().split())
+    text = _OFFICE_SUFFIX.sub('', text)
+    return re.sub(r'[^\w ]+', '', text).strip()
+
+
+def place_key(*parts):
+    """Stable 64-bit key for a normalised place name (or city + locality)."""
+    joined = '|'.join(normalize_place(part) for part in parts)
+    return int.from_bytes(hashlib.blake2b(joined.encode(), digest_size=8).digest(), 'big')
+
+
+def _sorted_arrays(keys, coords, dtype):
+    keys = np.asarray(keys, dtype=dtype)
+    coords = np.asarray(coords, dtype=np.float32).reshape(-1, 2)
+    order = np.argsort(keys, kind='stable')
+    return keys[order], coords[order]
+
+
+class CentroidIndex:
+    def __init__(self, pincode_rows, locality_rows):
+        """
+        pincode_rows: [(pincode, lat, lng, district)],
+        locality_rows: [(city, locality, lat, lng)]
+        """
+        pincodes = [int(row[0]) for row in pincode_rows]
+        self.pincodes, self.pincode_coords = _sorted_arrays(
+            pincodes, [row[1:3] for row in pincode_rows], np.int32)
+
+        self.locality_keys, self.locality_coords = _sorted_arrays(
+            [place_key(city, locality) for city, locality, _, _ in locality_rows],
+            [(lat, lng) for _, _, lat, lng in locality_rows], np.uint64)
+
+        # City centroid = mean of its pincode centroids
+        if pincode_rows:
+            city_keys = np.array([place_key(row[3]) for row in pincode_rows], dtype=np.uint64)
+            unique_keys, inverse = np.unique(city_keys, return_inverse=True)
+            counts = np.bincount(inverse)
+            coords = np.array([row[1:3] for row in pincode_rows], dtype=np.float64)
+            city_coords = np.stack([
+                np.bincount(inverse, weights=coords[:, 0]) / counts,
+                np.bincount(inverse, weights=coords[:, 1]) / counts,
+            ], axis=1)
+            self.city_keys, self.city_coords = unique_keys, city_coords.astype(np.float32)
+        else:
+            self.city_keys, self.city_coords = _sorted_arrays([], [], np.uint64)
+
+    @classmethod
+    def from_database(cls):
+        from .models import LocalityCentroid, PincodeCentroid
+
+        return cls(
+            list(PincodeCentroid.objects.values_list('pincode', 'latitude', 'longitude', 'district')),
+            list(LocalityCentroid.objects.values_list('city', 'locality', 'latitude', 'longitude')),
+        )
+
+    def __len__(self):
+        return len(self.pincodes)
+
+    @staticmethod
+    def _find(keys, coords, key):
+        i = int(np.searchsorted(keys, key))
+        if i < len(keys) and keys[i] == key:
+            # float32 keeps ~1m precision; trim the binary noise
+            return round(float(coords[i, 0]), 5), round(float(coords[i, 1]), 5)
+        return None
+
+    def pincode(self, pincode):
+        digits = str(pincode or '').strip()
+        if len(digits) != 6 or not digits.isdigit():
+            return None
+        return self._find(self.pincodes, self.pincode_coords, np.int32(int(digits)))
+
+    def locality(self, city, locality):
+        if not city or not locality:
+            return None
+        return self._find(self.locality_keys, self.locality_coords, np.uint64(place_key(city, locality)))
+
+    def city(self, city):
+        if not city:
+            return None
+        return self._find(self.city_keys, self.city_coords, np.uint64(place_key(city)))
+
+
+_loader = VersionedLoader(VERSION_KEY, CentroidIndex.from_database, VERSION_CHECK_INTERVAL)
+
+
+def get_index():
+    """This process's CentroidIndex, reloaded when import_pincodes publishes new data."""
+    return _loader.get()
+
+
+def publish_new_version():
+    _loader.publish()
+
+
+def approximate_location(pincode=None, city=None, locality=None):
+    """(lat, lng, precision) from the most specific centroid available, or (None, None, None)."""
+    index = get_index()
+    for precision, found in (
+        ('LOCALITY', lambda: index.locality(city, locality)),
+        ('PINCODE', lambda: index.pincode(pincode)),
+        ('CITY', lambda: index.city(city)),
+    ):
+        coords = found()
+        if coords is not None:
+            return coords[0], coords[1], precision
+    return None, None, None
@@ -0,0 +1,234 @@
+"""
+values()-based read path for listing lists (FAST_LIST_SERIALIZATION).
+
+Listing lists spend most of their time building Property instances and
+walking PropertySerializer field by field. serialize() produces the same
+payload as serializer(queryset, many=True).data from values() dicts:
+
+    data = serialize(queryset, self.get_serializer())
+
+The serializer's readable fields (after ?fields=) are compiled once per call
+into column getters: plain model fields pass through or use the DRF field's
+to_representation, *_display fields look up the choice label, file fields
+become storage URLs, and related images/floor plans come from one grouped
+query per relation. PropertySerializer's method fields have batch versions
+in METHOD_FIELDS. Anything else makes serialize() return None and the
+caller uses the serializer. tests.py checks the two give the same JSON.
+"""
+import re
+from collections import defaultdict
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import ForeignKey
+from rest_framework import serializers
+
+# DRF fields whose to_representation is the identity for the values() type
+PASSTHROUGH_FIELDS = (
+    serializers.CharField, serializers.EmailField, serializers.URLField, serializers.SlugField,
+    serializers.IntegerField, serializers.BooleanField, serializers.FloatField,
+)
+
+
+class _Batch:
+    """Per-call data shared by the getters: request, page rows and lazily fetched related rows."""
+
+    def __init__(self, context, rows):
+        self.request = context.get('request')
+        self.rows = rows
+        self.pks = [row['pk'] for row in rows]
+        self._cache = {}
+
+    def once(self, key, load):
+        if key not in self._cache:
+            self._cache[key] = load()
+        return self._cache[key]
+
+    def related_rows(self, relation):
+        """{pk: [values() dicts]} for a reverse FK, ordered like its prefetch."""
+        def load():
+            grouped = defaultdict(list)
+            fk = relation.field
+            for row in relation.related_model.objects.filter(**{f'{fk.name}__in': self.pks}).values():
+                grouped[row[fk.attname]].append(row)
+            return grouped
+        return self.once(('related', relation.name), load)
+
+    def url(self, storage, name):
+        url = storage.url(name)
+        return self.request.build_absolute_uri(url) if self.request is not None else url
+
+
+# --- PropertySerializer method fields ---
+
+def _image_rows(batch, row):
+    from .models import Property
+    return batch.related_rows(Property._meta.get_field('images')).get(row['pk'], [])
+
+
+def _thumbnail(batch, row):
+    from .models import PropertyImage
+    images = _image_rows(batch, row)
+    image = next((img for img in images if img['is_thumbnail']), images[0] if images else None)
+    if image is None:
+        return None
+    return batch.url(PropertyImage._meta.get_field('image').storage, image['image'])
+
+
+def _active_mandates(batch):
+    def load():
+        from apps.mandates.models import Mandate
+        found = {}
+        for property_id, mandate_id in Mandate.objects.filter(
+                property_item__in=batch.pks, status__in=['ACTIVE', 'PENDING']
+        ).order_by('pk').values_list('property_item_id', 'id'):
+            found.setdefault(property_id, mandate_id)
+        return found
+    return batch.once('mandates', load)
+
+
+def _is_saved(batch, row):
+    request = batch.request
+    if not (request and request.user.is_authenticated):
+        return False
+
+    def load():
+        from .models import SavedProperty
+        return set(SavedProperty.objects.filter(
+            user=request.user, property__in=batch.pks
+        ).values_list('property_id', flat=True))
+    return row['pk'] in batch.once('saved', load)
+
+
+def _active_mandate_id(batch, row):
+    mandate_id = _active_mandates(batch).get(row['pk'])
+    return str(mandate_id) if mandate_id else None
+
+
+# name -> (columns read, getter(batch, row))
+METHOD_FIELDS = {
+    'has_7_12': (['doc_7_12_or_pr_card'], lambda batch, row: bool(row['doc_7_12_or_pr_card'])),
+    'has_mojani': (['mojani_nakasha'], lambda batch, row: bool(row['mojani_nakasha'])),
+    'has_active_mandate': ([], lambda batch, row: row['pk'] in _active_mandates(batch)),
+    'active_mandate_id': ([], _active_mandate_id),
+    'is_saved': ([], _is_saved),
+    'thumbnail': ([], _thumbnail),
+}
+
+
+def _inherited_method(serializer, field):
+    """METHOD_FIELDS mirror PropertySerializer's methods; an override elsewhere isn't covered."""
+    from .serializers import PropertySerializer
+    method = getattr(type(serializer), field.method_name, None)
+    return method is not None and method is getattr(PropertySerializer, field.method_name, None)
+
+
+# --- Compiling ---
+
+def _scalar(field, column):
+    if type(field) in PASSTHROUGH_FIELDS:
+        return lambda batch, row: row[column]
+    to_representation = field.to_representation
+    return lambda batch, row: None if row[column] is None else to_representation(row[column])
+
+
+def _file(field, model_field, column):
+    if not getattr(field, 'use_url', True):
+        return lambda batch, row: row[column] or None
+    storage = model_field.storage
+    return lambda batch, row: batch.url(storage, row[column]) if row[column] else None
+
+
+def _nested_list(field, relation):
+    plan = _compile(field.child, relation.related_model, with_methods=False)
+    if plan is None:
+        return None
+    _, steps = plan
+
+    def get(batch, row):
+        return [{name: step(batch, child) for name, step in steps}
+                for child in batch.related_rows(relation).get(row['pk'], [])]
+    return get
+
+
+def _nested_object(field, model_field, column):
+    def get(batch, row):
+        if row[column] is None:
+            return None
+        instances = batch.once(('instances', column), lambda: model_field.related_model.objects.in_bulk(
+            {r[column] for r in batch.rows if r[column] is not None}))
+        cache = batch.once(('nested', column), dict)
+        if row[column] not in cache:
+            cache[row[column]] = field.to_representation(instances[row[column]])
+        return cache[row[column]]
+    return get
+
+
+def _compile(serializer, model, with_methods=True):
+    """(columns, [(name, getter)]) for serializer's readable fields, or None if one isn't supported."""
+    meta = model._meta
+    columns, steps = [], []
+    for name, field in serializer.fields.items():
+        if field.write_only:
+            continue
+        if isinstance(field, serializers.SerializerMethodField):
+            if not with_methods or name not in METHOD_FIELDS or not _inherited_method(serializer, field):
+                return None
+            needed, getter = METHOD_FIELDS[name]
+            columns.extend(needed)
+            steps.append((name, getter))
+            continue
+
+        source = field.source
+        display = re.fullmatch(r'get_(\w+)_display', source)
+        if display:
+            labels = {value: str(label) for value, label in meta.get_field(display.group(1)).flatchoices}
+            column = display.group(1)
+            columns.append(column)
+            steps.append((name, lambda batch, row, column=column, labels=labels:
+                          None if row[column] is None else str(labels.get(row[column], row[column]))))
+            continue
+
+        try:
+            model_field = meta.get_field(source)
+        except FieldDoesNotExist:
+            return None
+        if isinstance(field, serializers.ListSerializer) and model_field.one_to_many and model_field.auto_created:
+            getter = _nested_list(field, model_field)
+        elif isinstance(field, serializers.Serializer) and isinstance(model_field, ForeignKey):
+            columns.append(source)
+            getter = _nested_object(field, model_field, source)
+        elif not model_field.concrete or isinstance(field, serializers.Serializer):
+            return None
+        elif isinstance(field, serializers.RelatedField):
+            if not isinstance(field, serializers.PrimaryKeyRelatedField) or field.pk_field is not None:
+                return None
+            columns.append(source)
+            getter = lambda batch, row, column=source: row[column]
+        elif isinstance(field, serializers.FileField):
+            columns.append(source)
+            getter = _file(field, model_field, source)
+        else:
+            columns.append(source)
+            getter = _scalar(field, source)
+        if getter is None:
+            return None
+        steps.append((name, getter))
+    return columns, steps
+
+
+def serialize(queryset, serializer, pks=None):
+    """
+    serializer(queryset, many=True).data built from values() (rows in pks order
+    when given), or None if the serializer has fields this path can't produce.
+    """
+    plan = _compile(serializer, queryset.model)
+    if plan is None:
+        return None
+    columns, steps = plan
+    rows = list(queryset.prefetch_related(None).values('pk', *dict.fromkeys(columns)))
+    if pks is not None:
+        by_pk = {row['pk']: row for row in rows}
+        rows = [by_pk[pk] for pk in pks if pk in by_pk]
+
+    batch = _Batch(serializer.context, rows)
+    return [{name: step(batch, row) for name, step in steps} for row in rows]
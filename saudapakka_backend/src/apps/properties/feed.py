@@ -0,0 +1,128 @@
+"""
+Homepage feed (/api/feed/home/).
+
+The homepage carousels (featured, new, popular and the largest cities) are
+materialized into HomeFeedItem rows with compact card payloads by build(),
+which the job worker runs every HOME_FEED_REFRESH_INTERVAL seconds
+(jobs.refresh_home_feed; manage.py refresh_home_feed by hand). A request then
+reads them back in one indexed query; the per-request parts are the is_saved
+flag, overlaid with one more query for logged-in users, and the thumbnail URL:
+cards keep the storage key, since presigned URLs expire.
+
+Until the first build (fresh deploy, emptied table) the carousels are computed
+live and a rebuild is enqueued.
+"""
+import logging
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import Count, F
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+CAROUSELS = ('FEATURED', 'NEW', 'POPULAR')
+
+# Empty-feed requests enqueue at most one rebuild per this many seconds
+REBUILD_DEBOUNCE = 60
+
+
+def _carousel_querysets():
+    """[(carousel, city or None, queryset)] in display order."""
+    from .models import City, Property
+
+    verified = Property.objects.filter(verification_status='VERIFIED')
+    ranked = ('-rank_score', '-created_at')
+    querysets = [
+        ('FEATURED', None, verified.filter(is_featured=True).order_by(*ranked)),
+        ('NEW', None, verified.order_by('-created_at')),
+        # Saves count as a stronger signal than views (same as ranking.components)
+        ('POPULAR', None, verified.annotate(
+            popularity=F('views_count') + 10 * Count('savedproperty')
+        ).order_by('-popularity', '-created_at')),
+    ]
+    cities = (City.objects.filter(properties__verification_status='VERIFIED')
+              .annotate(listings=Count('properties')).order_by('-listings', 'name')[:settings.HOME_FEED_CITIES])
+    querysets += [('CITY', city, verified.filter(city_ref=city).order_by(*ranked)) for city in cities]
+    return querysets
+
+
+def _cards():
+    """(carousel, city, position, property, card) for every carousel, in display order."""
+    from .serializers import PropertyCardSerializer
+
+    positions = {}
+    for carousel, city, queryset in _carousel_querysets():
+        listings = list(queryset.prefetch_related('images')[:settings.HOME_FEED_SIZE])
+        for prop, card in zip(listings, PropertyCardSerializer(listings, many=True).data):
+            position = positions[carousel] = positions.get(carousel, -1) + 1
+            yield carousel, city, position, prop, card
+
+
+def build():
+    """Recomputes every carousel and swaps the HomeFeedItem rows in one transaction; returns the row count."""
+    from .models import HomeFeedItem
+
+    now = timezone.now()
+    items = [
+        HomeFeedItem(carousel=carousel, city=city, position=position, property=prop, card=card, built_at=now)
+        for carousel, city, position, prop, card in _cards()
+    ]
+    with transaction.atomic():
+        HomeFeedItem.objects.all().delete()
+        HomeFeedItem.objects.bulk_create(items)
+    return len(items)
+
+
+def _live_rows():
+    """Feed rows computed from the listings directly, for when nothing has been built yet."""
+    from .jobs import refresh_home_feed
+
+    if caches['default'].add('home-feed:rebuild-enqueued', 1, REBUILD_DEBOUNCE):
+        try:
+            refresh_home_feed.enqueue()
+        except Exception:
+            logger.exception("Could not enqueue a home feed rebuild")
+    now = timezone.now()
+    return [
+        (carousel, city and city.pk, city and city.name, city and city.slug, prop.pk, dict(card), now)
+        for carousel, city, _, prop, card in _cards()
+    ]
+
+
+def _thumbnail_url(request, key):
+    from .models import PropertyImage
+    return request.build_absolute_uri(PropertyImage._meta.get_field('image').storage.url(key))
+
+
+def home_feed(request):
+    """The feed payload for this request: cached cards plus the user's is_saved flags."""
+    from .models import HomeFeedItem, SavedProperty
+
+    # Listings rejected or unpublished since the last build drop out here
+    rows = list(HomeFeedItem.objects.filter(property__verification_status='VERIFIED')
+                .values_list('carousel', 'city_id', 'city__name', 'city__slug', 'property_id', 'card', 'built_at'))
+    if not rows and not HomeFeedItem.objects.exists():
+        rows = _live_rows()
+
+    saved = set()
+    if request.user.is_authenticated and rows:
+        saved = set(SavedProperty.objects.filter(
+            user=request.user, property_id__in={row[4] for row in rows}
+        ).values_list('property_id', flat=True))
+
+    feed = {carousel.lower(): [] for carousel in CAROUSELS}
+    feed['cities'] = []
+    for carousel, city_id, city_name, city_slug, property_id, card, _ in rows:
+        if card.get('thumbnail'):
+            card['thumbnail'] = _thumbnail_url(request, card['thumbnail'])
+        card['is_saved'] = property_id in saved
+        if carousel == 'CITY':
+            if not feed['cities'] or feed['cities'][-1]['id'] != city_id:
+                feed['cities'].append({'id': city_id, 'name': city_name, 'slug': city_slug, 'listings': []})
+            feed['cities'][-1]['listings'].append(card)
+        else:
+            feed[carousel.lower()].append(card)
+    feed['built_at'] = max((row[6] for row in rows), default=None)
+    return feed
@@ -0,0 +1,176 @@
+"""
+Address geocoding with a persistent cache.
+
+    lat, lng = geocode('Flat 4, MG Road, Shivaji Nagar, Pune 411005')
+
+Addresses are normalised (case, whitespace, punctuation) and looked up in
+GeocodeCache first; only misses reach the provider. The provider is chosen by
+GEOCODING_BACKEND: 'google' (pooled keep-alive session, hard timeouts) or
+'stub', which derives stable coordinates from the address without any network
+so tests and local development never call Google.
+"""
+import hashlib
+import logging
+import re
+import threading
+from datetime import timedelta
+
+import requests
+from django.conf import settings
+from django.db import IntegrityError
+from django.utils import timezone
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+OK, ZERO_RESULTS = 'OK', 'ZERO_RESULTS'
+
+
+class GeocodingError(Exception):
+    """Provider unreachable or refused the request; nothing is cached."""
+
+
+def normalize_address(address):
+    text = (address or '').lower()
+    text = re.sub(r'[^\w,]+', ' ', text)  # drop punctuation except commas
+    parts = [' '.join(part.split()) for part in text.split(',')]
+    return ', '.join(part for part in parts if part)
+
+
+def address_hash(normalized):
+    return hashlib.sha256(normalized.encode()).hexdigest()
+
+
+# --- Providers: geocode(normalized) -> (status, lat, lng), or raise GeocodingError ---
+
+class GoogleGeocoder:
+    name = 'google'
+
+    def __init__(self, api_key=None, base_url=None, timeout=None, pool_size=10):
+        self.api_key = api_key if api_key is not None else settings.GOOGLE_MAPS_API_KEY
+        self.base_url = base_url or settings.GEOCODING_BASE_URL
+        self.timeout = timeout or settings.GEOCODING_TIMEOUT
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=1)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def geocode(self, normalized):
+        if not self.api_key:
+            raise GeocodingError('GOOGLE_MAPS_API_KEY is not set')
+        try:
+            response = self.session.get(
+                self.base_url,
+                params={'address': normalized, 'region': 'in', 'key': self.api_key},
+                timeout=(3, self.timeout),
+            )
+            data = response.json()
+        except (requests.RequestException, ValueError) as e:
+            raise GeocodingError(str(e))
+
+        if data.get('status') == OK:
+            location = data['results'][0]['geometry']['location']
+            return OK, location['lat'], location['lng']
+        if data.get('status') == ZERO_RESULTS:
+            return ZERO_RESULTS, None, None
+        # OVER_QUERY_LIMIT, REQUEST_DENIED, ... are not facts about the address
+        raise GeocodingError(f"{data.get('status')}: {data.get('error_message', '')}")
+
+
+class StubGeocoder:
+    """Deterministic coordinates inside India's bounding box; 'unknown' addresses miss."""
+    name = 'stub'
+
+    def geocode(self, normalized):
+        if not normalized or 'unknown' in normalized:
+            return ZERO_RESULTS, None, None
+        digest = hashlib.sha256(normalized.encode()).digest()
+        lat = 8.0 + int.from_bytes(digest[:4], 'big') / 2 ** 32 * 29.0
+        lng = 68.0 + int.from_bytes(digest[4:8], 'big') / 2 ** 32 * 29.0
+        return OK, round(lat, 6), round(lng, 6)
+
+
+GEOCODERS = {
+    'google': GoogleGeocoder,
+    'stub': StubGeocoder,
+}
+
+_geocoder = None
+_geocoder_lock = threading.Lock()
+
+
+def get_geocoder():
+    """One provider client per process (its HTTP session is thread-safe for GETs)."""
+    global _geocoder
+    if _geocoder is None:
+        with _geocoder_lock:
+            if _geocoder is None:
+                _geocoder = GEOCODERS[settings.GEOCODING_BACKEND]()
+    return _geocoder
+
+
+# --- Cached lookup ---
+
+def cached_results(normalized_addresses):
+    """
+    Bulk GeocodeCache lookup: normalised address -> (lat, lng), or (None, None)
+    for a cached miss. Addresses not cached (or with an expired miss) are absent.
+    """
+    from .models import GeocodeCache
+
+    hashes = {address_hash(normalized): normalized for normalized in normalized_addresses}
+    negative_cutoff = timezone.now() - timedelta(days=settings.GEOCODING_NEGATIVE_CACHE_DAYS)
+    found = {}
+    entries = GeocodeCache.objects.filter(address_hash__in=hashes).values_list(
+        'address_hash', 'status', 'latitude', 'longitude', 'created_at'
+    )
+    for key, status, lat, lng, created_at in entries:
+        if status == ZERO_RESULTS and created_at < negative_cutoff:
+            continue
+        found[hashes[key]] = (lat, lng)
+    return found
+
+
+def cached_result(normalized):
+    return cached_results([normalized]).get(normalized)
+
+
+def store_result(normalized, status, lat, lng, provider):
+    from .models import GeocodeCache
+
+    key = address_hash(normalized)
+    values = {'normalized_address': normalized, 'status': status, 'latitude': lat,
+              'longitude': lng, 'provider': provider, 'created_at': timezone.now()}
+    try:
+        GeocodeCache.objects.update_or_create(address_hash=key, defaults=values)
+    except IntegrityError:
+        pass  # Another worker stored the same address first
+
+
+def geocode(address, geocoder=None):
+    """
+    Returns (lat, lng) for `address`, or (None, None) if it can't be found or
+    the provider is unavailable. Provider errors are logged, not cached.
+    """
+    normalized = normalize_address(address)
+    if not normalized:
+        return None, None
+
+    cached = cached_result(normalized)
+    if cached is not None:
+        return cached
+
+    geocoder = geocoder or get_geocoder()
+    try:
+        status, lat, lng = geocoder.geocode(normalized)
+    except GeocodingError as e:
+        logger.warning(f"Geocoding failed for '{normalized}': {e}")
+        return None, None
+    store_result(normalized, status, lat, lng, geocoder.name)
+    return lat, lng
+
+
+def property_address(prop):
+    """The address string geocoded for a Property."""
+    parts = [prop.address_line, prop.locality, prop.city, prop.pincode]
+    return ', '.join(str(part) for part in parts if part)
@@ -0,0 +1,55 @@
+import logging
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from apps.jobs.registry import task
+
+from . import feed, ranking
+from .geocoding import geocode, property_address
+from .models import Property
+
+logger = logging.getLogger(__name__)
+
+
+def needs_geocoding_q():
+    """Listings without coordinates, or with only a centroid estimate."""
+    return (
+        Q(latitude__isnull=True) | Q(longitude__isnull=True)
+        | Q(location_precision__in=Property.APPROXIMATE_PRECISIONS)
+    )
+
+
+@task(queue='default', max_attempts=3)
+def geocode_property(property_id):
+    """Replaces missing or centroid-estimated coordinates with the geocoded address."""
+    prop = Property.objects.filter(needs_geocoding_q(), pk=property_id).first()
+    if prop is None:
+        return
+    lat, lng = geocode(property_address(prop))
+    if lat is not None:
+        # Never overwrite coordinates the owner set in the meantime
+        Property.objects.filter(needs_geocoding_q(), pk=property_id).update(
+            latitude=lat, longitude=lng, location_precision='GEOCODED',
+            **Property.derived_location_fields(lat, lng, 'GEOCODED'), updated_at=timezone.now(),
+        )
+
+
+def schedule_geocoding(prop):
+    if prop.latitude is None or prop.longitude is None or prop.location_precision in Property.APPROXIMATE_PRECISIONS:
+        geocode_property.enqueue(str(prop.pk))
+
+
+@task(queue='default', max_attempts=1, every=settings.RANKING_REFRESH_INTERVAL)
+def refresh_rank_scores():
+    """Re-scores every listing so view counts (and changed RANKING_WEIGHTS) reach rank_score."""
+    changed = ranking.refresh()
+    logger.info(f"Rank scores refreshed: {changed} listings changed")
+
+
+@task(queue='default', max_attempts=1, every=settings.HOME_FEED_REFRESH_INTERVAL)
+def refresh_home_feed():
+    """Rebuilds the materialized homepage carousels (HomeFeedItem)."""
+    count = feed.build()
+    logger.info(f"Home feed rebuilt: {count} cards")
@@ -0,0 +1,284 @@
+"""
+In-memory columnar index of verified listings.
+
+Browse requests (PropertyViewSet.list) are mostly filters and counts over a few
+numeric and categorical attributes of the verified listings, which fit easily
+in RAM. Each process keeps a snapshot of them as NumPy columns, so
+
+    ids, total = search(filterset, ['-rank_score', '-created_at'], offset=0, limit=20)
+
+evaluates the PropertyFilter as boolean masks, sorts, and returns the page of
+ids plus the total count without touching Postgres; the view then hydrates
+only the page rows by primary key.
+
+The snapshot is built at worker start (wsgi.py) and refreshed at most every
+LISTING_INDEX_REFRESH_INTERVAL seconds from rows whose updated_at moved past
+the last watermark (re-reading an overlap window, as rows commit out of
+updated_at order). A transaction that commits later than that window is
+missed by the refreshes, so the snapshot is also rebuilt from scratch every
+LISTING_INDEX_REBUILD_INTERVAL seconds. Refreshes build a new snapshot and swap
+it in, so readers never see a half-applied update. Deletes don't show up in
+that stream; Property's post_delete bumps a shared-cache key (on commit) and
+every process rebuilds.
+
+Filters the index can't evaluate (unknown lookups or methods) return None and
+the caller falls back to the database, as it does when the index can't be
+built or refreshed at all (database or shared cache unreachable).
+"""
+import logging
+import threading
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import caches
+
+logger = logging.getLogger(__name__)
+
+RESET_KEY = 'listing-index:reset'
+CHANGE_OVERLAP = timedelta(seconds=30)
+COMPACT_RATIO = 0.25  # rebuild arrays once this share of rows is dead
+
+NUMERIC_FIELDS = (
+    'total_price', 'carpet_area', 'super_builtup_area', 'bhk_config', 'rank_score',
+    'nearest_school_km', 'nearest_hospital_km', 'nearest_metro_km', 'nearest_railway_km', 'nearest_park_km',
+)
+ID_FIELDS = ('city_ref', 'locality_ref')
+CATEGORICAL_FIELDS = (
+    'listing_type', 'property_type', 'sub_type', 'furnishing_status', 'availability_status', 'facing',
+    'canonical_locality_id',
+)
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+_build_lock = threading.Lock()
+_refresh_lock = threading.Lock()
+_snapshot = None
+_refreshed_at = 0.0
+
+
+def _load_fields():
+    from .models import Property
+    return ('pk', 'verification_status', 'created_at', 'updated_at',
+            *NUMERIC_FIELDS, *ID_FIELDS, *CATEGORICAL_FIELDS, *Property.AMENITY_FIELDS)
+
+
+def amenity_bits(names):
+    """Bitmask for the given Property.AMENITY_FIELDS names."""
+    from .models import Property
+    return sum(1 << Property.AMENITY_FIELDS.index(name) for name in names)
+
+
+class Snapshot:
+    def __init__(self, ids, columns, vocab, watermark, reset_version):
+        self.ids = ids  # object array of UUIDs
+        self.columns = columns  # name -> ndarray, all the same length as ids
+        self.vocab = vocab  # categorical field -> {value: code}
+        self.watermark = watermark
+        self.reset_version = reset_version
+        self.built_at = time.monotonic()  # refreshed() copies it; only full builds move it
+        self.row_of = {pk: i for i, pk in enumerate(ids)}
+        self.dead = int(np.count_nonzero(~columns['alive']))
+
+    def __len__(self):
+        return len(self.ids) - self.dead
+
+    # --- Building ---
+
+    @staticmethod
+    def _columns(rows, vocab):
+        """Column arrays for rows from values_list(*_load_fields())."""
+        from .models import Property
+
+        fields = _load_fields()
+        at = {name: i for i, name in enumerate(fields)}
+        columns = {
+            'alive': np.array([row[at['verification_status']] == 'VERIFIED' for row in rows], dtype=bool),
+            'created_at': np.array([(row[at['created_at']] - _EPOCH) // timedelta(microseconds=1) for row in rows],
+                                   dtype=np.int64),
+        }
+        for name in NUMERIC_FIELDS:
+            columns[name] = np.array([np.nan if row[at[name]] is None else float(row[at[name]]) for row in rows],
+                                     dtype=np.float64)
+        for name in ID_FIELDS:
+            columns[name] = np.array([-1 if row[at[name]] is None else row[at[name]] for row in rows], dtype=np.int64)
+        for name in CATEGORICAL_FIELDS:
+            codes = vocab.setdefault(name, {})
+            columns[name] = np.array(
+                [-1 if row[at[name]] is None else codes.setdefault(row[at[name]], len(codes)) for row in rows],
+                dtype=np.int32)
+        bits = np.zeros(len(rows), dtype=np.uint32)
+        for i, name in enumerate(Property.AMENITY_FIELDS):
+            bits |= np.array([bool(row[at[name]]) for row in rows], dtype=np.uint32) << np.uint32(i)
+        columns['amenities'] = bits
+        return columns
+
+    @classmethod
+    def build(cls, reset_version=None):
+        from .models import Property
+
+        rows = list(Property.objects.filter(verification_status='VERIFIED')
+                    .values_list(*_load_fields()).iterator(chunk_size=5000))
+        watermark = max((row[3] for row in rows), default=_EPOCH)
+        vocab = {}
+        columns = cls._columns(rows, vocab)
+        return cls(np.array([row[0] for row in rows], dtype=object), columns, vocab, watermark, reset_version)
+
+    def refreshed(self):
+        """A new Snapshot with the rows changed since the watermark applied (self if none)."""
+        from .models import Property
+
+        rows = list(Property.objects.filter(updated_at__gte=self.watermark - CHANGE_OVERLAP)
+                    .values_list(*_load_fields()))
+        changed = [row for row in rows if row[0] in self.row_of or row[1] == 'VERIFIED']
+        watermark = max([self.watermark, *(row[3] for row in rows)])
+        if not changed:
+            self.watermark = watermark
+            return self
+
+        vocab = {name: dict(codes) for name, codes in self.vocab.items()}
+        updates = self._columns(changed, vocab)
+        positions = np.array([self.row_of.get(row[0], -1) for row in changed], dtype=np.int64)
+        existing, new = positions >= 0, positions < 0
+
+        columns = {name: column.copy() for name, column in self.columns.items()}
+        for name, column in columns.items():
+            column[positions[existing]] = updates[name][existing]
+        ids = self.ids
+        if new.any():
+            columns = {name: np.concatenate([column, updates[name][new]]) for name, column in columns.items()}
+            ids = np.concatenate([ids, np.array([row[0] for row in changed], dtype=object)[new]])
+
+        alive = columns['alive']
+        if np.count_nonzero(~alive) > COMPACT_RATIO * len(alive):
+            columns = {name: column[alive] for name, column in columns.items()}
+            ids = ids[alive]
+        snapshot = Snapshot(ids, columns, vocab, watermark, self.reset_version)
+        snapshot.built_at = self.built_at
+        return snapshot
+
+    # --- Querying ---
+
+    def _mask(self, filterset):
+        """Boolean mask for the bound PropertyFilter, or None if a filter isn't supported."""
+        from .locations import match_locality_ids
+
+        mask = self.columns['alive'].copy()
+        values = filterset.form.cleaned_data
+        for name, flt in filterset.filters.items():
+            value = values.get(name)
+            if value in (None, '', [], ()):
+                continue
+            if flt.method == 'filter_city':
+                mask &= np.isin(self.columns['city_ref'], filterset._city_ids())
+            elif flt.method == 'filter_locality':
+                city_ids = filterset._city_ids() if filterset.data.get('city') else None
+                mask &= np.isin(self.columns['locality_ref'], match_locality_ids(value, city_ids))
+            elif flt.method == 'filter_amenities':
+                bits = np.uint32(amenity_bits(filterset.amenity_fields(value)))
+                mask &= (self.columns['amenities'] & bits) == bits
+            elif flt.method is None and not flt.exclude and flt.field_name in self.columns:
+                column = self.columns[flt.field_name]
+                if flt.field_name in CATEGORICAL_FIELDS:
+                    if flt.lookup_expr != 'exact':
+                        return None
+                    code = self.vocab[flt.field_name].get(value)
+                    mask &= column == (-2 if code is None else code)
+                    continue
+                value = float(value)
+                if flt.lookup_expr == 'exact':
+                    mask &= column == value
+                elif flt.lookup_expr == 'gte':
+                    mask &= column >= value
+                elif flt.lookup_expr == 'lte':
+                    mask &= column <= value
+                elif flt.lookup_expr == 'gt':
+                    mask &= column > value
+                elif flt.lookup_expr == 'lt':
+                    mask &= column < value
+                else:
+                    return None
+            else:
+                return None
+        return mask
+
+    def _sort_key(self, term, rows):
+        descending = term.startswith('-')
+        column = self.columns[term.lstrip('-')][rows]
+        if column.dtype.kind == 'f':
+            # Postgres: NULLs last ascending, first descending
+            return np.where(np.isnan(column), -np.inf, -column) if descending else np.where(np.isnan(column), np.inf, column)
+        return -column if descending else column
+
+    def search(self, filterset, ordering, offset=0, limit=None):
+        mask = self._mask(filterset)
+        if mask is None:
+            return None
+        rows = np.flatnonzero(mask)
+        keys = [self._sort_key(term, rows) for term in ordering]
+        # lexsort sorts by the last key first; row position breaks ties
+        order = np.lexsort([rows] + keys[::-1]) if keys else np.arange(len(rows))
+        end = None if limit is None else offset + limit
+        page = rows[order[offset:end]]
+        return list(self.ids[page]), len(rows)
+
+
+# --- Per-process snapshot ---
+
+def _reset_version():
+    return caches['default'].get(RESET_KEY)
+
+
+def publish_reset():
+    caches['default'].set(RESET_KEY, time.time(), timeout=None)
+
+
+def get_snapshot():
+    """This process's Snapshot, built on first use and refreshed in the background of requests."""
+    global _snapshot, _refreshed_at
+    if _snapshot is None:
+        with _build_lock:
+            if _snapshot is None:
+                started = time.monotonic()
+                _snapshot = Snapshot.build(_reset_version())
+                _refreshed_at = time.monotonic()
+                logger.info(f"Listing index: {len(_snapshot)} listings in {time.monotonic() - started:.2f}s")
+        return _snapshot
+
+    if time.monotonic() - _refreshed_at >= settings.LISTING_INDEX_REFRESH_INTERVAL and _refresh_lock.acquire(blocking=False):
+        # One thread refreshes; the others keep serving the current snapshot
+        try:
+            version = _reset_version()
+            stale = time.monotonic() - _snapshot.built_at >= settings.LISTING_INDEX_REBUILD_INTERVAL
+            if stale or version != _snapshot.reset_version:
+                _snapshot = Snapshot.build(version)
+            else:
+                _snapshot = _snapshot.refreshed()
+            _refreshed_at = time.monotonic()
+        finally:
+            _refresh_lock.release()
+    return _snapshot
+
+
+def search(filterset, ordering, offset=0, limit=None):
+    """(page ids, total) for a bound PropertyFilter over verified listings, or None to use the database."""
+    if not settings.LISTING_INDEX_ENABLED:
+        return None
+    try:
+        return get_snapshot().search(filterset, ordering, offset, limit)
+    except Exception:
+        # Never fail a browse request over the index; the database can answer it
+        logger.exception("Listing index unavailable, using the database")
+        return None
+
+
+def warm_up():
+    """Builds the snapshot at worker start so the first browse request doesn't pay for it."""
+    if not settings.LISTING_INDEX_ENABLED:
+        return
+    try:
+        get_snapshot()
+    except Exception:
+        # Runs while wsgi.py is imported: a failure here must not stop the worker booting
+        logger.exception("Listing index not built at startup")
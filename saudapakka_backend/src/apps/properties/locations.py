@@ -0,0 +1,241 @@
+"""
+Canonical cities and localities.
+
+Listings keep the city/locality text the lister typed; Property.save() maps it
+onto City/Locality rows through the alias tables, so 'Pune', ' pune', 'Poona'
+all land on one City, 'Banner' on its Baner, and the list filters compare
+integer ids:
+
+    city_ids = match_city_ids('poona')                 # [3] (substring matches too)
+    locality_ids = match_locality_ids('baner', city_ids)
+
+A spelling seen for the first time is matched against the existing names
+(difflib; numbers and words like east/west must agree, so 'Sector 14' never
+merges into 'Sector 15' nor 'Andheri East' into 'Andheri West') and recorded
+as an alias, so each spelling is resolved fuzzily only once.
+
+Search terms are resolved once per normalised term and kept in the shared
+location_cache, which any City/Locality/alias write invalidates. A term that
+matches no alias is compared only against names of a compatible length
+(capped at FUZZY_CANDIDATE_LIMIT), never against every locality.
+"""
+import difflib
+import hashlib
+import math
+import re
+
+from django.db import IntegrityError, transaction
+from django.db.models.functions import Length
+
+from apps.core.cache import location_cache
+
+from .centroids import normalize_place
+
+SIMILARITY = 0.85
+MIN_FUZZY_LENGTH = 5  # shorter names only match exactly
+FUZZY_CANDIDATE_LIMIT = 1000
+
+# Renamed cities; the spelling on the left is recorded as an alias of the right
+KNOWN_CITY_ALIASES = {
+    'bombay': 'mumbai',
+    'bangalore': 'bengaluru',
+    'poona': 'pune',
+    'gurgaon': 'gurugram',
+    'calcutta': 'kolkata',
+    'madras': 'chennai',
+    'new delhi': 'delhi',
+    'baroda': 'vadodara',
+}
+
+
+# Words that tell neighbouring places apart rather than being typos
+DISTINGUISHING_WORDS = {
+    'east', 'west', 'north', 'south', 'central', 'new', 'old', 'upper', 'lower',
+    'i', 'ii', 'iii', 'iv', 'v', 'phase', 'nagar', 'gaon', 'peth',
+}
+
+
+def _markers(slug):
+    return re.findall(r'\d+', slug), sorted(set(slug.split()) & DISTINGUISHING_WORDS)
+
+
+def closest(slug, candidates):
+    """Closest existing slug to `slug`, or None."""
+    if len(slug) < MIN_FUZZY_LENGTH:
+        return None
+    markers = _markers(slug)
+    candidates = [c for c in candidates if len(c) >= MIN_FUZZY_LENGTH and _markers(c) == markers]
+    match = difflib.get_close_matches(slug, candidates, n=1, cutoff=SIMILARITY)
+    return match[0] if match else None
+
+
+def display_name(raw):
+    name = ' '.join(str(raw).split())
+    return name.title() if name.islower() or name.isupper() else name
+
+
+def cluster_names(counts, known=None):
+    """
+    Groups spellings of the same place. `counts` maps raw spelling -> number of
+    listings using it. Returns {canonical slug: (display name, set of alias
+    slugs)}; the most common spelling in each group becomes canonical.
+    """
+    known = known or {}
+    slug_counts, spellings = {}, {}
+    for raw, count in counts.items():
+        slug = normalize_place(raw)
+        if not slug:
+            continue
+        slug_counts[slug] = slug_counts.get(slug, 0) + count
+        best = spellings.get(slug)
+        if best is None or count > best[1]:
+            spellings[slug] = (raw, count)
+
+    groups = {}
+    for slug in sorted(slug_counts, key=lambda s: (-slug_counts[s], s)):
+        target = known.get(slug)
+        if target is None:
+            target = slug if slug in groups else closest(slug, groups)
+        if target is None:
+            target = slug
+        if target not in groups:
+            name = spellings[slug][0] if target == slug else target
+            groups[target] = (display_name(name), set())
+        groups[target][1].add(slug)
+    for slug, (_, aliases) in groups.items():
+        aliases.add(slug)
+    return groups
+
+
+# --- Resolution ---
+
+def _get_or_create(model, **kwargs):
+    try:
+        with transaction.atomic():
+            return model.objects.get_or_create(**kwargs)[0]
+    except IntegrityError:
+        # Lost a race on a unique key; the other writer's row is there now
+        lookup = {k: v for k, v in kwargs.items() if k != 'defaults'}
+        return model.objects.get(**lookup)
+
+
+def resolve_city_id(name, create=False):
+    from .models import City, CityAlias
+
+    slug = normalize_place(name)
+    if not slug:
+        return None
+    city_id = CityAlias.objects.filter(alias=slug).values_list('city_id', flat=True).first()
+    if city_id is not None or not create:
+        return city_id
+
+    target = KNOWN_CITY_ALIASES.get(slug) or closest(slug, City.objects.values_list('slug', flat=True)) or slug
+    city = _get_or_create(City, slug=target, defaults={'name': display_name(name if target == slug else target)})
+    return _get_or_create(CityAlias, alias=slug, defaults={'city': city}).city_id
+
+
+def resolve_locality_id(city_id, name, create=False):
+    from .models import Locality, LocalityAlias
+
+    slug = normalize_place(name)
+    if city_id is None or not slug:
+        return None
+    locality_id = LocalityAlias.objects.filter(city_id=city_id, alias=slug).values_list('locality_id', flat=True).first()
+    if locality_id is not None or not create:
+        return locality_id
+
+    target = closest(slug, Locality.objects.filter(city_id=city_id).values_list('slug', flat=True)) or slug
+    locality = _get_or_create(Locality, city_id=city_id, slug=target, defaults={'name': display_name(name)})
+    return _get_or_create(LocalityAlias, city_id=city_id, alias=slug, defaults={'locality': locality}).locality_id
+
+
+def assign_location_refs(prop):
+    """Points prop.city_ref/locality_ref at the canonical rows; returns the changed field names."""
+    city_id = resolve_city_id(prop.city, create=True)
+    locality_id = resolve_locality_id(city_id, prop.locality, create=True)
+    changed = []
+    if prop.city_ref_id != city_id:
+        prop.city_ref_id = city_id
+        changed.append('city_ref')
+    if prop.locality_ref_id != locality_id:
+        prop.locality_ref_id = locality_id
+        changed.append('locality_ref')
+    return changed
+
+
+# --- Search ---
+
+def _fuzzy_candidates(queryset, slug):
+    """
+    Rows of `queryset` whose slug could be within SIMILARITY of `slug`: difflib's
+    ratio is 2*matches / (len(a) + len(b)), so the shorter name must be at least
+    SIMILARITY / (2 - SIMILARITY) of the longer one.
+    """
+    if len(slug) < MIN_FUZZY_LENGTH:
+        return queryset.none()
+    factor = SIMILARITY / (2 - SIMILARITY)
+    return queryset.annotate(slug_length=Length('slug')).filter(
+        slug_length__gte=max(MIN_FUZZY_LENGTH, math.ceil(len(slug) * factor)),
+        slug_length__lte=math.floor(len(slug) / factor),
+    ).order_by('slug')[:FUZZY_CANDIDATE_LIMIT]
+
+
+def _term_key(*parts):
+    return hashlib.sha1(repr(parts).encode()).hexdigest()
+
+
+def match_city_ids(text):
+    """
+    City ids for a search term: its alias or closest typo match, plus every
+    city whose name or alias contains it, as the old icontains filter did
+    ('mumbai' -> Mumbai and Navi Mumbai, 'pun' -> Pune).
+    """
+    slug = normalize_place(text)
+    if not slug:
+        return []
+    return location_cache.get_or_set(f"city:{_term_key(slug)}", lambda: _match_city_ids(slug))
+
+
+def _match_city_ids(slug):
+    from .models import City, CityAlias
+
+    ids = set(CityAlias.objects.filter(alias__contains=slug).values_list('city_id', flat=True))
+    ids.update(City.objects.filter(slug__contains=slug).values_list('id', flat=True))
+    if not ids:
+        known = KNOWN_CITY_ALIASES.get(slug)
+        slugs = dict(City.objects.filter(slug=known).values_list('slug', 'id')) if known else {}
+        if not slugs:
+            slugs = dict(_fuzzy_candidates(City.objects.all(), slug).values_list('slug', 'id'))
+            match = closest(slug, slugs)
+            slugs = {match: slugs[match]} if match else {}
+        ids.update(slugs.values())
+    return sorted(ids)
+
+
+def match_locality_ids(text, city_ids=None):
+    """Locality ids for a search term, optionally within the given cities."""
+    slug = normalize_place(text)
+    if not slug:
+        return []
+    scope = None if city_ids is None else sorted(city_ids)
+    return location_cache.get_or_set(
+        f"locality:{_term_key(slug, scope)}", lambda: _match_locality_ids(slug, scope)
+    )
+
+
+def _match_locality_ids(slug, city_ids):
+    from .models import Locality, LocalityAlias
+
+    aliases = LocalityAlias.objects.filter(alias=slug)
+    localities = Locality.objects.all()
+    if city_ids is not None:
+        aliases = aliases.filter(city_id__in=city_ids)
+        localities = localities.filter(city_id__in=city_ids)
+    ids = list(aliases.values_list('locality_id', flat=True))
+    if ids:
+        return ids
+    slugs = {}
+    for locality_slug, locality_id in _fuzzy_candidates(localities, slug).values_list('slug', 'id'):
+        slugs.setdefault(locality_slug, []).append(locality_id)
+    match = closest(slug, slugs)
+    return slugs[match] if match else []
@@ -0,0 +1,74 @@
+from collections import defaultdict
+
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Q
+from django.utils import timezone
+
+from apps.properties import boundaries
+from apps.properties.models import Property
+
+
+class Command(BaseCommand):
+    help = (
+        'Recomputes canonical_locality_id for all listings from the boundary polygons '
+        'in LOCALITY_BOUNDARIES_PATH. Coordinates are tested in vectorised batches and '
+        'only listings whose locality changed are written, one UPDATE per locality.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', default=None, help='GeoJSON file (default LOCALITY_BOUNDARIES_PATH).')
+        parser.add_argument('--batch-size', type=int, default=20000)
+        parser.add_argument('--dry-run', action='store_true', help='Report changes without saving them.')
+
+    def handle(self, *args, **options):
+        if options['path']:
+            try:
+                index = boundaries.BoundaryIndex.from_geojson(options['path'])
+            except (OSError, ValueError) as e:
+                raise CommandError(f"Could not read {options['path']}: {e}")
+        else:
+            index = boundaries.get_index()
+        if not len(index):
+            raise CommandError('No boundary polygons loaded.')
+        self.stdout.write(f"{len(index)} boundary polygons loaded.")
+
+        # Pincode/city centroids are too coarse to place inside a locality (same rule as Property.save)
+        located = Q(latitude__isnull=False, longitude__isnull=False) & ~Q(location_precision__in=('PINCODE', 'CITY'))
+        stats = {'checked': 0, 'changed': 0, 'unmatched': 0}
+        last_pk = None
+        while True:
+            rows = Property.objects.filter(located).order_by('pk')
+            if last_pk is not None:
+                rows = rows.filter(pk__gt=last_pk)
+            rows = list(rows.values_list('pk', 'latitude', 'longitude', 'canonical_locality_id')[:options['batch_size']])
+            if not rows:
+                break
+            last_pk = rows[-1][0]
+            stats['checked'] += len(rows)
+
+            pks, lats, lngs, current = zip(*rows)
+            found = index.locate_many(np.array(lats, dtype=np.float64), np.array(lngs, dtype=np.float64))
+            changes = defaultdict(list)
+            for pk, old, new in zip(pks, current, found):
+                if new is None:
+                    stats['unmatched'] += 1
+                if new != old:
+                    changes[new].append(pk)
+            stats['changed'] += sum(len(ids) for ids in changes.values())
+
+            if not options['dry_run']:
+                for locality_id, ids in changes.items():
+                    Property.objects.filter(pk__in=ids).update(
+                        canonical_locality_id=locality_id, updated_at=timezone.now())
+            self.stdout.write(f"... {stats['checked']} listings checked, {stats['changed']} changed")
+
+        if not options['dry_run']:
+            # Listings that lost (or never had) usable coordinates
+            stats['changed'] += Property.objects.exclude(located).filter(
+                canonical_locality_id__isnull=False
+            ).update(canonical_locality_id=None, updated_at=timezone.now())
+
+        self.stdout.write(self.style.SUCCESS(
+            'Done: ' + ', '.join(f"{name}={value}" for name, value in stats.items())
+        ))
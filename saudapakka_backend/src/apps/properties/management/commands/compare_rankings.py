@@ -0,0 +1,111 @@
+import json
+from collections import Counter
+
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from apps.properties import ranking
+from apps.properties.models import City, Property
+
+# Used when no --variants file is given; the first variant is the baseline
+DEFAULT_VARIANTS = {
+    'current': {},
+    'recency_only': {'priority': 0, 'featured': 0, 'completeness': 0, 'engagement': 0},
+    'no_engagement': {'engagement': 0},
+    'completeness_x2': {'completeness': 2.0},
+    'half_life_15d': {'freshness_half_life_days': 15},
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Offline comparison of ranking weight variants over the verified listings. '
+        'For each segment (all listings, then the largest cities) it ranks with every '
+        'variant and reports, for the top k: NDCG against saves (or views), the share '
+        'of featured/priority listings, mean completeness, median age, and overlap '
+        'with the first (baseline) variant. Nothing is written. Note that variants '
+        'weighting engagement are favoured by NDCG by construction.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--variants', default=None,
+                            help='JSON file of {"name": {weight overrides}}; the first entry is the baseline.')
+        parser.add_argument('--k', type=int, default=20)
+        parser.add_argument('--segments', type=int, default=5, help='Number of largest cities to report separately.')
+        parser.add_argument('--label', choices=['saves', 'views'], default='saves')
+
+    def handle(self, *args, **options):
+        variants = self.load_variants(options['variants'])
+        k = options['k']
+
+        rows = list(ranking.component_rows(Property.objects.filter(verification_status='VERIFIED'), 'city_ref'))
+        if not rows:
+            raise CommandError('No verified listings.')
+        parts = [ranking.components(row) for row in rows]
+        now = timezone.now()
+        data = {
+            'age_days': np.array([part['age_days'] for part in parts]),
+            'featured': np.array([part['featured'] for part in parts]),
+            'priority': np.array([part['priority'] for part in parts]),
+            'completeness': np.array([part['completeness'] for part in parts]),
+            'listed_days': np.array([((now - row['created_at']).total_seconds() / 86400) for row in rows]),
+            'label': np.array([row['save_count' if options['label'] == 'saves' else 'views_count'] for row in rows],
+                              dtype=np.float64),
+        }
+        scores = {
+            name: np.array([ranking.score(part, ranking.weights(overrides)) for part in parts])
+            for name, overrides in variants.items()
+        }
+        self.stdout.write(f"{len(rows)} verified listings, {len(variants)} variants, k={k}, label={options['label']}")
+
+        city_refs = np.array([row['city_ref'] or -1 for row in rows])
+        largest = [city_id for city_id, _ in Counter(city_refs[city_refs >= 0].tolist()).most_common(options['segments'])]
+        names = dict(City.objects.filter(pk__in=largest).values_list('pk', 'name'))
+        segments = [('all', np.arange(len(rows)))]
+        segments += [(names.get(city_id, city_id), np.flatnonzero(city_refs == city_id)) for city_id in largest]
+
+        for segment, members in segments:
+            self.stdout.write(f"\n== {segment} ({len(members)} listings)")
+            self.stdout.write(f"{'variant':<20} {'ndcg':>6} {'featured':>8} {'priority':>8} "
+                              f"{'complete':>8} {'med age':>8} {'overlap':>8}")
+            baseline = None
+            for name, variant_scores in scores.items():
+                top = self.top_k(variant_scores, data['age_days'], members, k)
+                if baseline is None:
+                    baseline = top
+                overlap = len(set(top) & set(baseline)) / len(top)
+                self.stdout.write(
+                    f"{name:<20} {self.ndcg(data['label'], members, top):>6.3f} "
+                    f"{data['featured'][top].mean():>8.2f} {data['priority'][top].mean():>8.2f} "
+                    f"{data['completeness'][top].mean():>8.2f} {np.median(data['listed_days'][top]):>7.0f}d "
+                    f"{overlap:>8.2f}"
+                )
+
+    def load_variants(self, path):
+        if not path:
+            return DEFAULT_VARIANTS
+        try:
+            with open(path) as f:
+                variants = json.load(f)
+        except (OSError, ValueError) as e:
+            raise CommandError(f"Could not read {path}: {e}")
+        if not isinstance(variants, dict) or not variants:
+            raise CommandError('The variants file must be a non-empty JSON object of name -> weight overrides.')
+        unknown = {key for overrides in variants.values() for key in overrides} - set(ranking.weights())
+        if unknown:
+            raise CommandError(f"Unknown weights: {', '.join(sorted(unknown))}")
+        return variants
+
+    @staticmethod
+    def top_k(scores, age_days, members, k):
+        """Members ordered like the API (-rank_score, -created_at), first k."""
+        order = np.lexsort((-age_days[members], -scores[members]))
+        return members[order[:k]]
+
+    @staticmethod
+    def ndcg(label, members, top):
+        gains = np.log1p(label)
+        discounts = 1 / np.log2(np.arange(2, len(top) + 2))
+        ideal = (np.sort(gains[members])[::-1][:len(top)] * discounts).sum()
+        return (gains[top] * discounts).sum() / ideal if ideal else 0.0
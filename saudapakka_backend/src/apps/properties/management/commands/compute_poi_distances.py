@@ -0,0 +1,55 @@
+import numpy as np
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.properties import pois
+from apps.properties.models import Property
+
+
+class Command(BaseCommand):
+    help = (
+        'Recomputes the nearest_*_km distances for all listings from the imported '
+        'points of interest, in vectorised batches, writing only rows that changed.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--dry-run', action='store_true', help='Report changes without saving them.')
+
+    def handle(self, *args, **options):
+        index = pois.get_index()
+        self.stdout.write(f"{len(index)} points of interest loaded.")
+        fields = list(pois.DISTANCE_FIELDS.values())
+        stats = {'checked': 0, 'changed': 0}
+        last_pk = None
+        while True:
+            rows = Property.objects.order_by('pk')
+            if last_pk is not None:
+                rows = rows.filter(pk__gt=last_pk)
+            rows = list(rows.values('pk', 'latitude', 'longitude', 'location_precision', *fields)[:options['batch_size']])
+            if not rows:
+                break
+            last_pk = rows[-1]['pk']
+            stats['checked'] += len(rows)
+
+            # Same rule as Property.derived_location_fields: no distances from coarse centroids
+            usable = [row['latitude'] is not None and row['longitude'] is not None
+                      and row['location_precision'] not in ('PINCODE', 'CITY') for row in rows]
+            lats = np.array([row['latitude'] if ok else np.nan for row, ok in zip(rows, usable)], dtype=np.float64)
+            lngs = np.array([row['longitude'] if ok else np.nan for row, ok in zip(rows, usable)], dtype=np.float64)
+            distances = index.nearest_many(lats, lngs)
+
+            changed = []
+            now = timezone.now()
+            for i, row in enumerate(rows):
+                values = {field: pois.to_km(distances[field][i]) for field in fields}
+                if any(row[field] != value for field, value in values.items()):
+                    changed.append(Property(pk=row['pk'], updated_at=now, **values))
+            stats['changed'] += len(changed)
+            if changed and not options['dry_run']:
+                Property.objects.bulk_update(changed, [*fields, 'updated_at'], batch_size=500)
+            self.stdout.write(f"... {stats['checked']} listings checked, {stats['changed']} changed")
+
+        self.stdout.write(self.style.SUCCESS(
+            'Done: ' + ', '.join(f"{name}={value}" for name, value in stats.items())
+        ))
@@ -0,0 +1,110 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.properties.geocoding import (
+    GeocodingError, cached_results, get_geocoder, normalize_address, property_address, store_result,
+)
+from apps.properties.jobs import needs_geocoding_q
+from apps.properties.models import Property
+
+
+class RateLimiter:
+    """Spaces calls at least 1/rate seconds apart across all threads."""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate > 0 else 0
+        self.next_slot = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_slot)
+            self.next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class Command(BaseCommand):
+    help = (
+        'Geocodes listings that have no (or only centroid-estimated) coordinates. '
+        'Identical addresses are resolved once, cached results are reused, and provider '
+        'calls run on a bounded thread pool under a requests-per-second limit.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4)
+        parser.add_argument('--rate', type=float, default=None,
+                            help='Provider requests per second (default GEOCODING_RATE_LIMIT).')
+        parser.add_argument('--batch-size', type=int, default=200)
+        parser.add_argument('--limit', type=int, default=None, help='Stop after this many listings.')
+        parser.add_argument('--dry-run', action='store_true', help='Count what would be geocoded.')
+
+    def handle(self, *args, **options):
+        geocoder = get_geocoder()
+        limiter = RateLimiter(options['rate'] or settings.GEOCODING_RATE_LIMIT)
+        missing = Property.objects.filter(needs_geocoding_q())
+
+        if options['dry_run']:
+            self.stdout.write(f"{missing.count()} listings without precise coordinates.")
+            return
+
+        def lookup(normalized):
+            limiter.acquire()
+            return geocoder.geocode(normalized)
+
+        stats = {'listings': 0, 'updated': 0, 'from_cache': 0, 'provider_calls': 0, 'not_found': 0, 'errors': 0}
+        last_pk = None
+        with ThreadPoolExecutor(max_workers=options['workers']) as pool:
+            while options['limit'] is None or stats['listings'] < options['limit']:
+                batch_size = options['batch_size']
+                if options['limit'] is not None:
+                    batch_size = min(batch_size, options['limit'] - stats['listings'])
+                batch = missing.order_by('pk').only('pk', 'address_line', 'locality', 'city', 'pincode')
+                if last_pk is not None:
+                    batch = batch.filter(pk__gt=last_pk)
+                batch = list(batch[:batch_size])
+                if not batch:
+                    break
+                last_pk = batch[-1].pk
+                stats['listings'] += len(batch)
+
+                by_address = {}
+                for prop in batch:
+                    by_address.setdefault(normalize_address(property_address(prop)), []).append(prop.pk)
+                by_address.pop('', None)
+
+                results = cached_results(by_address)
+                stats['from_cache'] += len(results)
+                uncached = [address for address in by_address if address not in results]
+                futures = {address: pool.submit(lookup, address) for address in uncached}
+                for address, future in futures.items():
+                    stats['provider_calls'] += 1
+                    try:
+                        status, lat, lng = future.result()
+                    except GeocodingError as e:
+                        stats['errors'] += 1
+                        self.stderr.write(f"{address}: {e}")
+                        continue
+                    store_result(address, status, lat, lng, geocoder.name)
+                    results[address] = (lat, lng)
+
+                for address, (lat, lng) in results.items():
+                    if lat is None:
+                        stats['not_found'] += 1
+                        continue
+                    stats['updated'] += Property.objects.filter(
+                        needs_geocoding_q(), pk__in=by_address[address]
+                    ).update(latitude=lat, longitude=lng, location_precision='GEOCODED',
+                             **Property.derived_location_fields(lat, lng, 'GEOCODED'), updated_at=timezone.now())
+
+                self.stdout.write(f"... {stats['listings']} listings checked, {stats['updated']} updated")
+
+        self.stdout.write(self.style.SUCCESS(
+            'Done: ' + ', '.join(f"{name}={value}" for name, value in stats.items())
+        ))
@@ -0,0 +1,98 @@
+import csv
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from apps.properties.centroids import normalize_place, publish_new_version
+from apps.properties.models import LocalityCentroid, PincodeCentroid
+
+# Accepted column names (case-insensitive); the first set matches the India
+# Post "All India Pincode Directory" CSV published on data.gov.in
+COLUMNS = {
+    'pincode': ('pincode', 'pin', 'postal_code'),
+    'locality': ('officename', 'office_name', 'locality', 'area'),
+    'city': ('district', 'districtname', 'city'),
+    'state': ('statename', 'state'),
+    'latitude': ('latitude', 'lat'),
+    'longitude': ('longitude', 'lng', 'lon'),
+}
+
+# Rough bounding box of India; the source data has swapped and zero coordinates
+LAT_RANGE = (6.0, 38.0)
+LNG_RANGE = (68.0, 98.0)
+
+
+class Command(BaseCommand):
+    help = (
+        'Replaces the pincode and locality centroid tables from a post-office CSV '
+        '(one row per office with pincode, office name, district, state, latitude, '
+        'longitude). Centroids are the mean of the offices in each pincode / locality.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('csv_path')
+        parser.add_argument('--encoding', default='utf-8-sig')
+
+    def _columns(self, header):
+        lowered = {name.strip().lower(): name for name in header}
+        found = {}
+        for column, aliases in COLUMNS.items():
+            match = next((lowered[alias] for alias in aliases if alias in lowered), None)
+            if match is None and column != 'locality':
+                raise CommandError(f"CSV has no {column} column (tried: {', '.join(aliases)})")
+            found[column] = match
+        return found
+
+    def handle(self, *args, **options):
+        pincodes = {}    # pincode -> [lat_sum, lng_sum, count, district, state]
+        localities = {}  # (city, locality) -> [lat_sum, lng_sum, count, pincode]
+        skipped = 0
+
+        with open(options['csv_path'], newline='', encoding=options['encoding']) as f:
+            reader = csv.DictReader(f)
+            columns = self._columns(reader.fieldnames or [])
+            for row in reader:
+                pincode = (row[columns['pincode']] or '').strip()
+                try:
+                    lat = float(row[columns['latitude']])
+                    lng = float(row[columns['longitude']])
+                except (TypeError, ValueError):
+                    skipped += 1
+                    continue
+                if not (len(pincode) == 6 and pincode.isdigit()
+                        and LAT_RANGE[0] <= lat <= LAT_RANGE[1] and LNG_RANGE[0] <= lng <= LNG_RANGE[1]):
+                    skipped += 1
+                    continue
+
+                city = normalize_place(row[columns['city']])
+                entry = pincodes.setdefault(pincode, [0.0, 0.0, 0, city, normalize_place(row[columns['state']])])
+                entry[0] += lat
+                entry[1] += lng
+                entry[2] += 1
+
+                locality = normalize_place(row[columns['locality']]) if columns['locality'] else ''
+                if city and locality:
+                    entry = localities.setdefault((city, locality), [0.0, 0.0, 0, pincode])
+                    entry[0] += lat
+                    entry[1] += lng
+                    entry[2] += 1
+
+        if not pincodes:
+            raise CommandError('No usable rows found.')
+
+        with transaction.atomic():
+            PincodeCentroid.objects.all().delete()
+            LocalityCentroid.objects.all().delete()
+            PincodeCentroid.objects.bulk_create([
+                PincodeCentroid(pincode=pincode, latitude=lat / n, longitude=lng / n, district=district, state=state)
+                for pincode, (lat, lng, n, district, state) in pincodes.items()
+            ], batch_size=5000)
+            LocalityCentroid.objects.bulk_create([
+                LocalityCentroid(city=city, locality=locality, pincode=pincode, latitude=lat / n, longitude=lng / n)
+                for (city, locality), (lat, lng, n, pincode) in localities.items()
+            ], batch_size=5000)
+            transaction.on_commit(publish_new_version)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {len(pincodes)} pincodes and {len(localities)} localities ({skipped} rows skipped)."
+        ))
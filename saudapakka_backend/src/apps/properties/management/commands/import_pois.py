@@ -0,0 +1,111 @@
+import bz2
+import gzip
+import xml.etree.ElementTree as ET
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from apps.properties.models import PointOfInterest
+from apps.properties.pois import publish_new_version
+
+
+def classify(tags):
+    """PointOfInterest.category for an OSM element's tags, or None."""
+    amenity = tags.get('amenity')
+    if amenity == 'school':
+        return 'SCHOOL'
+    if amenity == 'hospital':
+        return 'HOSPITAL'
+    if tags.get('leisure') == 'park':
+        return 'PARK'
+    if tags.get('railway') in ('station', 'halt') or (
+            tags.get('public_transport') == 'station' and tags.get('train') == 'yes'):
+        if tags.get('station') in ('subway', 'light_rail', 'monorail') or tags.get('subway') == 'yes':
+            return 'METRO'
+        return 'RAILWAY'
+    return None
+
+
+def open_extract(path):
+    if path.endswith('.bz2'):
+        return bz2.open(path, 'rb')
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rb')
+    return open(path, 'rb')
+
+
+def iter_elements(path, tags):
+    """Streams the extract's top-level elements of the given tag names, freeing each after use."""
+    with open_extract(path) as f:
+        context = ET.iterparse(f, events=('start', 'end'))
+        _, root = next(context)
+        for event, elem in context:
+            if event == 'end' and elem.tag in ('node', 'way', 'relation'):
+                if elem.tag in tags:
+                    yield elem
+                root.clear()
+
+
+class Command(BaseCommand):
+    help = (
+        'Replaces the points-of-interest table from an OpenStreetMap XML extract '
+        '(.osm, .osm.gz or .osm.bz2; convert .pbf with `osmium cat x.osm.pbf -o x.osm`). '
+        'Tagged nodes are used as-is, tagged ways (hospital campuses, parks, ...) at '
+        'the mean of their nodes. Run compute_poi_distances afterwards.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('extract_path')
+
+    def handle(self, *args, **options):
+        path = options['extract_path']
+        pois = {}  # osm_id -> [category, name, lat, lng]
+        ways = {}  # osm_id -> (category, name, node ids)
+        try:
+            # Pass 1: tagged nodes and ways
+            for elem in iter_elements(path, ('node', 'way')):
+                tags = {tag.get('k'): tag.get('v') for tag in elem.iter('tag')}
+                category = classify(tags) if tags else None
+                if category is None:
+                    continue
+                name = (tags.get('name:en') or tags.get('name') or '')[:255]
+                if elem.tag == 'node':
+                    pois[f"n{elem.get('id')}"] = [category, name, float(elem.get('lat')), float(elem.get('lon'))]
+                else:
+                    ways[f"w{elem.get('id')}"] = (category, name, [nd.get('ref') for nd in elem.iter('nd')])
+
+            # Pass 2: coordinates of the nodes those ways reference
+            needed = {ref for _, _, refs in ways.values() for ref in refs}
+            coords = {}
+            if needed:
+                for elem in iter_elements(path, ('node',)):
+                    if elem.get('id') in needed:
+                        coords[elem.get('id')] = (float(elem.get('lat')), float(elem.get('lon')))
+        except (OSError, ET.ParseError) as e:
+            raise CommandError(f"Could not read {path}: {e}")
+
+        for osm_id, (category, name, refs) in ways.items():
+            points = [coords[ref] for ref in set(refs) if ref in coords]
+            if points:
+                pois[osm_id] = [category, name,
+                                sum(lat for lat, _ in points) / len(points),
+                                sum(lng for _, lng in points) / len(points)]
+
+        if not pois:
+            raise CommandError('No points of interest found.')
+
+        with transaction.atomic():
+            PointOfInterest.objects.all().delete()
+            PointOfInterest.objects.bulk_create([
+                PointOfInterest(osm_id=osm_id, category=category, name=name, latitude=lat, longitude=lng)
+                for osm_id, (category, name, lat, lng) in pois.items()
+            ], batch_size=5000)
+            transaction.on_commit(publish_new_version)
+
+        counts = {}
+        for category, *_ in pois.values():
+            counts[category] = counts.get(category, 0) + 1
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {len(pois)} points of interest ("
+            + ', '.join(f"{category}={n}" for category, n in sorted(counts.items())) + ')'
+        ))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from apps.properties import feed
+
+
+class Command(BaseCommand):
+    help = (
+        'Rebuilds the materialized homepage feed (HomeFeedItem) served by '
+        '/api/feed/home/. The job worker also runs it every HOME_FEED_REFRESH_INTERVAL.'
+    )
+
+    def handle(self, *args, **options):
+        count = feed.build()
+        self.stdout.write(self.style.SUCCESS(f'Done: {count} feed cards built.'))
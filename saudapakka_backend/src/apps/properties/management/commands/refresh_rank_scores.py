@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from apps.properties import ranking
+
+
+class Command(BaseCommand):
+    help = (
+        'Recomputes Property.rank_score for all listings from the current '
+        'RANKING_WEIGHTS, writing only rows whose score changed. Run it after '
+        'changing the weights; the job worker also runs it every RANKING_REFRESH_INTERVAL.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        changed = ranking.refresh(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Done: {changed} listings re-scored.'))
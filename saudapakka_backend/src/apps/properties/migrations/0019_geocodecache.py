@@ -0,0 +1,25 @@
+# Generated by Django 5.0.2 on 2026-10-19 05:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0018_property_views_count'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GeocodeCache',
+            fields=[
+                ('address_hash', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('normalized_address', models.TextField()),
+                ('latitude', models.FloatField(blank=True, null=True)),
+                ('longitude', models.FloatField(blank=True, null=True)),
+                ('status', models.CharField(choices=[('OK', 'Found'), ('ZERO_RESULTS', 'Not found')], max_length=20)),
+                ('provider', models.CharField(max_length=20)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+    ]
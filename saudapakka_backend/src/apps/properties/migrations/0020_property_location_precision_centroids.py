@@ -0,0 +1,42 @@
+# Generated by Django 5.0.2 on 2026-10-19 05:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0019_geocodecache'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PincodeCentroid',
+            fields=[
+                ('pincode', models.CharField(max_length=6, primary_key=True, serialize=False)),
+                ('latitude', models.FloatField()),
+                ('longitude', models.FloatField()),
+                ('district', models.CharField(max_length=100)),
+                ('state', models.CharField(max_length=100)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='property',
+            name='location_precision',
+            field=models.CharField(blank=True, choices=[('EXACT', 'Set by lister'), ('GEOCODED', 'Geocoded address'), ('LOCALITY', 'Locality centroid'), ('PINCODE', 'Pincode centroid'), ('CITY', 'City centroid')], max_length=10, null=True),
+        ),
+        migrations.CreateModel(
+            name='LocalityCentroid',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('city', models.CharField(max_length=100)),
+                ('locality', models.CharField(max_length=255)),
+                ('pincode', models.CharField(max_length=6)),
+                ('latitude', models.FloatField()),
+                ('longitude', models.FloatField()),
+            ],
+            options={
+                'unique_together': {('city', 'locality')},
+            },
+        ),
+    ]
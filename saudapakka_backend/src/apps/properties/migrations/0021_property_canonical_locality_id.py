@@ -0,0 +1,18 @@
+# Generated by Django 5.0.2 on 2026-10-19 05:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0020_property_location_precision_centroids'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='property',
+            name='canonical_locality_id',
+            field=models.CharField(blank=True, db_index=True, max_length=100, null=True),
+        ),
+    ]
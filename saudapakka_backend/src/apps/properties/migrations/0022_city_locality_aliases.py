@@ -0,0 +1,70 @@
+# Generated by Django 5.0.2 on 2026-10-19 05:39
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0021_property_canonical_locality_id'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='City',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('slug', models.CharField(max_length=100, unique=True)),
+                ('state', models.CharField(blank=True, max_length=100)),
+            ],
+            options={
+                'verbose_name_plural': 'Cities',
+                'ordering': ['name'],
+            },
+        ),
+        migrations.AddField(
+            model_name='property',
+            name='city_ref',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='properties', to='properties.city'),
+        ),
+        migrations.CreateModel(
+            name='CityAlias',
+            fields=[
+                ('alias', models.CharField(max_length=100, primary_key=True, serialize=False)),
+                ('city', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='aliases', to='properties.city')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Locality',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255)),
+                ('slug', models.CharField(max_length=255)),
+                ('city', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='localities', to='properties.city')),
+            ],
+            options={
+                'verbose_name_plural': 'Localities',
+                'ordering': ['name'],
+                'unique_together': {('city', 'slug')},
+            },
+        ),
+        migrations.AddField(
+            model_name='property',
+            name='locality_ref',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='properties', to='properties.locality'),
+        ),
+        migrations.CreateModel(
+            name='LocalityAlias',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('alias', models.CharField(max_length=255)),
+                ('city', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='locality_aliases', to='properties.city')),
+                ('locality', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='aliases', to='properties.locality')),
+            ],
+            options={
+                'unique_together': {('city', 'alias')},
+            },
+        ),
+    ]
@@ -0,0 +1,133 @@
+import difflib
+import re
+from collections import Counter, defaultdict
+
+from django.db import migrations
+from django.db.models import Count
+
+# A frozen copy of the matching rules in apps.properties.centroids/locations as
+# they stood when this migration was written, so later edits there (or their
+# numpy import) can't change what it does.
+
+SIMILARITY = 0.85
+MIN_FUZZY_LENGTH = 5
+
+CITY_ALIASES = {
+    'bombay': 'mumbai',
+    'bangalore': 'bengaluru',
+    'poona': 'pune',
+    'gurgaon': 'gurugram',
+    'calcutta': 'kolkata',
+    'madras': 'chennai',
+    'new delhi': 'delhi',
+    'baroda': 'vadodara',
+}
+
+DISTINGUISHING_WORDS = {
+    'east', 'west', 'north', 'south', 'central', 'new', 'old', 'upper', 'lower',
+    'i', 'ii', 'iii', 'iv', 'v', 'phase', 'nagar', 'gaon', 'peth',
+}
+
+_OFFICE_SUFFIX = re.compile(r'\s+(b\.?o|s\.?o|h\.?o|g\.?p\.?o)\.?$')
+
+
+def normalize_place(name):
+    text = ' '.join(str(name or '').lower().split())
+    text = _OFFICE_SUFFIX.sub('', text)
+    return re.sub(r'[^\w ]+', '', text).strip()
+
+
+def _markers(slug):
+    return re.findall(r'\d+', slug), sorted(set(slug.split()) & DISTINGUISHING_WORDS)
+
+
+def closest(slug, candidates):
+    if len(slug) < MIN_FUZZY_LENGTH:
+        return None
+    markers = _markers(slug)
+    candidates = [c for c in candidates if len(c) >= MIN_FUZZY_LENGTH and _markers(c) == markers]
+    match = difflib.get_close_matches(slug, candidates, n=1, cutoff=SIMILARITY)
+    return match[0] if match else None
+
+
+def display_name(raw):
+    name = ' '.join(str(raw).split())
+    return name.title() if name.islower() or name.isupper() else name
+
+
+def cluster_names(counts, known=None):
+    """{canonical slug: (display name, alias slugs)}; the most common spelling in a group wins."""
+    known = known or {}
+    slug_counts, spellings = {}, {}
+    for raw, count in counts.items():
+        slug = normalize_place(raw)
+        if not slug:
+            continue
+        slug_counts[slug] = slug_counts.get(slug, 0) + count
+        best = spellings.get(slug)
+        if best is None or count > best[1]:
+            spellings[slug] = (raw, count)
+
+    groups = {}
+    for slug in sorted(slug_counts, key=lambda s: (-slug_counts[s], s)):
+        target = known.get(slug)
+        if target is None:
+            target = slug if slug in groups else closest(slug, groups)
+        if target is None:
+            target = slug
+        if target not in groups:
+            name = spellings[slug][0] if target == slug else target
+            groups[target] = (display_name(name), set())
+        groups[target][1].add(slug)
+    for slug, (_, aliases) in groups.items():
+        aliases.add(slug)
+    return groups
+
+
+def cluster_locations(apps, schema_editor):
+    """Builds City/Locality (+ aliases) from the existing free text and links every listing."""
+    Property = apps.get_model('properties', 'Property')
+    City = apps.get_model('properties', 'City')
+    CityAlias = apps.get_model('properties', 'CityAlias')
+    Locality = apps.get_model('properties', 'Locality')
+    LocalityAlias = apps.get_model('properties', 'LocalityAlias')
+
+    city_counts = dict(Property.objects.values('city').annotate(n=Count('pk')).values_list('city', 'n'))
+    city_by_alias = {}
+    for slug, (name, aliases) in cluster_names(city_counts, CITY_ALIASES).items():
+        city = City.objects.create(name=name, slug=slug)
+        CityAlias.objects.bulk_create([CityAlias(alias=alias, city=city) for alias in aliases])
+        city_by_alias.update(dict.fromkeys(aliases, city))
+
+    raw_cities = defaultdict(list)
+    for raw in city_counts:
+        city = city_by_alias.get(normalize_place(raw))
+        if city is not None:
+            raw_cities[city.pk].append(raw)
+    for city_id, spellings in raw_cities.items():
+        Property.objects.filter(city__in=spellings).update(city_ref_id=city_id)
+
+    locality_counts = defaultdict(Counter)
+    rows = Property.objects.filter(city_ref__isnull=False).values('city_ref', 'locality').annotate(n=Count('pk'))
+    for city_id, raw, n in rows.values_list('city_ref', 'locality', 'n'):
+        locality_counts[city_id][raw] += n
+
+    for city_id, counts in locality_counts.items():
+        for slug, (name, aliases) in cluster_names(counts).items():
+            locality = Locality.objects.create(city_id=city_id, name=name, slug=slug)
+            LocalityAlias.objects.bulk_create([
+                LocalityAlias(city_id=city_id, alias=alias, locality=locality) for alias in aliases
+            ])
+            spellings = [raw for raw in counts if normalize_place(raw) in aliases]
+            Property.objects.filter(city_ref_id=city_id, locality__in=spellings).update(locality_ref=locality)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0022_city_locality_aliases'),
+    ]
+
+    operations = [
+        migrations.RunPython(cluster_locations, migrations.RunPython.noop),
+    ]
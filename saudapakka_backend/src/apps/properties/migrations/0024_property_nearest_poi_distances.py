@@ -0,0 +1,52 @@
+# Generated by Django 5.0.2 on 2026-10-19 05:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0023_cluster_property_locations'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PointOfInterest',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('osm_id', models.CharField(max_length=30, unique=True)),
+                ('category', models.CharField(choices=[('SCHOOL', 'School'), ('HOSPITAL', 'Hospital'), ('METRO', 'Metro station'), ('RAILWAY', 'Railway station'), ('PARK', 'Park')], db_index=True, max_length=10)),
+                ('name', models.CharField(blank=True, max_length=255)),
+                ('latitude', models.FloatField()),
+                ('longitude', models.FloatField()),
+            ],
+            options={
+                'verbose_name_plural': 'Points of interest',
+            },
+        ),
+        migrations.AddField(
+            model_name='property',
+            name='nearest_hospital_km',
+            field=models.FloatField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='property',
+            name='nearest_metro_km',
+            field=models.FloatField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='property',
+            name='nearest_park_km',
+            field=models.FloatField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='property',
+            name='nearest_railway_km',
+            field=models.FloatField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='property',
+            name='nearest_school_km',
+            field=models.FloatField(blank=True, db_index=True, null=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.2 on 2026-10-19 05:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0025_property_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='property',
+            name='rank_score',
+            field=models.FloatField(db_index=True, default=0),
+        ),
+    ]
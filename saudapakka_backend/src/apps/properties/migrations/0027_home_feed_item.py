@@ -0,0 +1,31 @@
+# Generated by Django 5.0.2 on 2026-10-19 05:58
+
+import django.core.serializers.json
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0026_property_rank_score'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HomeFeedItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('carousel', models.CharField(choices=[('FEATURED', 'Featured'), ('NEW', 'New'), ('POPULAR', 'Popular'), ('CITY', 'City')], max_length=20)),
+                ('position', models.PositiveIntegerField()),
+                ('card', models.JSONField(encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('built_at', models.DateTimeField()),
+                ('city', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='properties.city')),
+                ('property', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='properties.property')),
+            ],
+            options={
+                'ordering': ['carousel', 'position'],
+                'indexes': [models.Index(fields=['carousel', 'position'], name='properties__carouse_f4e886_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,91 @@
+import math
+from datetime import datetime, timezone as dt_timezone
+
+from django.db import migrations
+from django.db.models import Count
+from django.utils import timezone
+
+# A frozen copy of apps.properties.ranking's scorer, with the default
+# RANKING_WEIGHTS, as they stood when this migration was written, so later
+# edits there (or to the model) can't break or change it. Deployments with
+# other weights get them on the job worker's first refresh_rank_scores run.
+
+SCORE_EPOCH = datetime(2024, 1, 1, tzinfo=dt_timezone.utc)
+
+WEIGHTS = {
+    'freshness_half_life_days': 30.0,
+    'priority': 2.0,
+    'featured': 1.0,
+    'completeness': 1.0,
+    'engagement': 0.5,
+}
+
+DOCUMENT_FIELDS = (
+    'building_commencement_certificate', 'building_completion_certificate', 'layout_sanction',
+    'layout_order', 'na_order_or_gunthewari', 'mojani_nakasha', 'doc_7_12_or_pr_card',
+    'title_search_report', 'rera_project_certificate', 'gst_registration',
+    'sale_deed_registration_copy', 'electricity_bill', 'sale_deed',
+)
+
+FIELDS = (
+    'pk', 'created_at', 'priority_listing', 'is_featured', 'views_count', 'description',
+    'video_url', 'floor_plan', 'carpet_area', 'location_precision', 'rank_score',
+)
+
+
+def _counts(model):
+    return dict(model.objects.order_by().values_list('property_id').annotate(n=Count('pk')))
+
+
+def _score(row, image_count, floor_plan_count, save_count):
+    document_count = sum(1 for name in DOCUMENT_FIELDS if row[name])
+    checks = (
+        image_count >= 1,
+        image_count >= 5,
+        len(row['description'] or '') >= 100,
+        bool(row['video_url']),
+        bool(row['floor_plan']) or floor_plan_count > 0,
+        document_count >= 1,
+        document_count >= 3,
+        row['carpet_area'] is not None,
+        row['location_precision'] in ('EXACT', 'GEOCODED'),
+    )
+    age_days = ((row['created_at'] or timezone.now()) - SCORE_EPOCH).total_seconds() / 86400
+    return round(
+        age_days / WEIGHTS['freshness_half_life_days']
+        + WEIGHTS['priority'] * (1.0 if row['priority_listing'] else 0.0)
+        + WEIGHTS['featured'] * (1.0 if row['is_featured'] else 0.0)
+        + WEIGHTS['completeness'] * sum(checks) / len(checks)
+        + WEIGHTS['engagement'] * math.log1p(row['views_count'] + 10 * save_count) / math.log1p(1000),
+        6,
+    )
+
+
+def backfill_rank_scores(apps, schema_editor):
+    """
+    Scores the listings that existed before rank_score did; left at 0 they would
+    sort below every listing saved after the deploy until the first refresh.
+    """
+    Property = apps.get_model('properties', 'Property')
+    images = _counts(apps.get_model('properties', 'PropertyImage'))
+    floor_plans = _counts(apps.get_model('properties', 'PropertyFloorPlan'))
+    saves = _counts(apps.get_model('properties', 'SavedProperty'))
+
+    changed = []
+    for row in Property.objects.values(*FIELDS, *DOCUMENT_FIELDS).iterator(chunk_size=1000):
+        pk = row['pk']
+        rank_score = _score(row, images.get(pk, 0), floor_plans.get(pk, 0), saves.get(pk, 0))
+        if rank_score != row['rank_score']:
+            changed.append(Property(pk=pk, rank_score=rank_score))
+    Property.objects.bulk_update(changed, ['rank_score'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0027_home_feed_item'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_rank_scores, migrations.RunPython.noop, elidable=True),
+    ]
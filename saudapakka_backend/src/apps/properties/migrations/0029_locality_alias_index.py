@@ -0,0 +1,17 @@
+# Generated by Django 5.0.2 on 2026-10-19 06:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0028_backfill_rank_score'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='localityalias',
+            index=models.Index(fields=['alias'], name='properties__alias_1258f8_idx'),
+        ),
+    ]
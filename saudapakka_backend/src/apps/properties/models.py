@@ -1,8 +1,9 @@
 import uuid
-from django.db import models
+from django.db import models, transaction
 from pgvector.django import VectorField
 from django.conf import settings
-from django.db.models.signals import post_delete
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 
 class Property(models.Model):
@@ -83,9 +84,34 @@ class Property(models.Model):
     address_line = models.TextField()
     locality = models.CharField(max_length=255)
     city = models.CharField(max_length=100)
+    # Canonical City/Locality the free-text city/locality resolve to (see locations.py);
+    # filters compare these ids instead of matching text
+    city_ref = models.ForeignKey('City', on_delete=models.SET_NULL, null=True, blank=True, related_name='properties')
+    locality_ref = models.ForeignKey('Locality', on_delete=models.SET_NULL, null=True, blank=True, related_name='properties')
     pincode = models.CharField(max_length=10)
     latitude = models.FloatField(null=True, blank=True)
     longitude = models.FloatField(null=True, blank=True)
+    # How latitude/longitude were obtained; centroid values are placeholders until geocoded
+    LOCATION_PRECISION_CHOICES = [
+        ('EXACT', 'Set by lister'),
+        ('GEOCODED', 'Geocoded address'),
+        ('LOCALITY', 'Locality centroid'),
+        ('PINCODE', 'Pincode centroid'),
+        ('CITY', 'City centroid'),
+    ]
+    APPROXIMATE_PRECISIONS = ('LOCALITY', 'PINCODE', 'CITY')
+    # canonical_locality_id and nearest_*_km are derived from these
+    LOCATION_FIELDS = ('latitude', 'longitude', 'location_precision')
+    location_precision = models.CharField(max_length=10, choices=LOCATION_PRECISION_CHOICES, null=True, blank=True)
+    # Id of the ward/locality boundary polygon containing the coordinates (see boundaries.py)
+    canonical_locality_id = models.CharField(max_length=100, null=True, blank=True, db_index=True)
+    # Distance to the nearest point of interest per category (see pois.py);
+    # null when none is within pois.MAX_DISTANCE_KM or the location is too coarse
+    nearest_school_km = models.FloatField(null=True, blank=True, db_index=True)
+    nearest_hospital_km = models.FloatField(null=True, blank=True, db_index=True)
+    nearest_metro_km = models.FloatField(null=True, blank=True, db_index=True)
+    nearest_railway_km = models.FloatField(null=True, blank=True, db_index=True)
+    nearest_park_km = models.FloatField(null=True, blank=True, db_index=True)
     landmarks = models.TextField(blank=True, help_text="Nearby Schools, Metro, etc.")
 
     # --- 4. Floor & Building ---
@@ -129,6 +155,20 @@ class Property(models.Model):
     has_street_light = models.BooleanField(default=False)
     has_internal_roads = models.BooleanField(default=False)
 
+    AMENITY_FIELDS = (
+        'has_power_backup', 'has_lift', 'has_swimming_pool', 'has_club_house', 'has_gym', 'has_park',
+        'has_reserved_parking', 'has_security', 'is_vastu_compliant', 'has_intercom', 'has_piped_gas',
+        'has_wifi', 'has_drainage_line', 'has_one_gate_entry', 'has_jogging_park', 'has_children_park',
+        'has_temple', 'has_water_line', 'has_street_light', 'has_internal_roads',
+    )
+
+    DOCUMENT_FIELDS = (
+        'building_commencement_certificate', 'building_completion_certificate', 'layout_sanction',
+        'layout_order', 'na_order_or_gunthewari', 'mojani_nakasha', 'doc_7_12_or_pr_card',
+        'title_search_report', 'rera_project_certificate', 'gst_registration',
+        'sale_deed_registration_copy', 'electricity_bill', 'sale_deed',
+    )
+
     # --- 7. Media & Docs ---
     video_url = models.URLField(blank=True, null=True, help_text="YouTube/Hosted link")
     floor_plan = models.ImageField(upload_to='properties/floor_plans/', null=True, blank=True)
@@ -167,16 +207,99 @@ class Property(models.Model):
     
     # Metrics
     views_count = models.IntegerField(default=0, help_text="Total number of views")
+    # Default result order (see ranking.py): freshness + boosts + completeness + engagement
+    rank_score = models.FloatField(default=0, db_index=True)
 
     created_at = models.DateTimeField(auto_now_add=True)
+    # Bumped on every save; bulk .update() callers set it too, since the
+    # in-memory listing index (listing_index.py) refreshes from it
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    @staticmethod
+    def derived_location_fields(latitude, longitude, precision):
+        """
+        canonical_locality_id and nearest_*_km for a location. Pincode/city
+        centroids are too coarse to place a listing in a locality or measure
+        walking distances, so those get nulls. Without boundary polygons
+        (LOCALITY_BOUNDARIES_PATH missing or unreadable) canonical_locality_id
+        is left out, so it keeps whatever assign_localities stored.
+        """
+        from . import boundaries
+        from .pois import nearest_distances
+
+        if latitude is None or longitude is None or precision in ('PINCODE', 'CITY'):
+            latitude = longitude = None
+        fields = {}
+        index = boundaries.get_index()
+        if len(index):
+            fields['canonical_locality_id'] = index.locate(latitude, longitude)
+        fields.update(nearest_distances(latitude, longitude))
+        return fields
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # What the row held, so save() only re-derives location fields when it moved
+        loaded = instance.__dict__
+        if all(name in loaded for name in cls.LOCATION_FIELDS):
+            instance._loaded_location = tuple(loaded[name] for name in cls.LOCATION_FIELDS)
+        return instance
+
+    def _location_changed(self):
+        loaded = getattr(self, '_loaded_location', None)
+        return loaded is None or loaded != tuple(getattr(self, name) for name in self.LOCATION_FIELDS)
 
     def save(self, *args, **kwargs):
         # Auto-set whatsapp_number from owner's phone if not provided
         if not self.whatsapp_number and self.owner and self.owner.phone_number:
             self.whatsapp_number = self.owner.phone_number
         
+        # Missing (or still approximate) coordinates: instant offline estimate
+        # from pincode/locality centroids until geocode_property refines them
+        if self.latitude is None or self.longitude is None or self.location_precision in self.APPROXIMATE_PRECISIONS:
+            from .centroids import approximate_location
+            lat, lng, precision = approximate_location(self.pincode, self.city, self.locality)
+            if precision:
+                self.latitude, self.longitude, self.location_precision = lat, lng, precision
+                update_fields = kwargs.get('update_fields')
+                if update_fields is not None:
+                    kwargs['update_fields'] = {*update_fields, 'latitude', 'longitude', 'location_precision'}
+
+        # Map the free-text city/locality onto canonical rows (skipped for
+        # partial saves that don't touch them)
+        update_fields = kwargs.get('update_fields')
+        if (update_fields is None or {'city', 'locality'} & set(update_fields)
+                or self.city_ref_id is None or self.locality_ref_id is None):
+            from .locations import assign_location_refs
+            changed = assign_location_refs(self)
+            if changed and update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, *changed}
+
+        # Boundary locality and nearby-POI distances follow the coordinates
+        update_fields = kwargs.get('update_fields')
+        if ((update_fields is None or set(self.LOCATION_FIELDS) & set(update_fields))
+                and self._location_changed()):
+            derived = self.derived_location_fields(self.latitude, self.longitude, self.location_precision)
+            changed = [name for name, value in derived.items() if getattr(self, name) != value]
+            for name in changed:
+                setattr(self, name, derived[name])
+            if changed and update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, *changed}
+
+        # Default result order (see ranking.py); image/floor plan/save counts
+        # refresh it through their own signals, views via refresh_rank_scores
+        update_fields = kwargs.get('update_fields')
+        from .ranking import COMPONENT_FIELDS, instance_score
+        if update_fields is None or {*COMPONENT_FIELDS, *self.DOCUMENT_FIELDS} & set(update_fields):
+            rank_score = instance_score(self)
+            if rank_score != self.rank_score:
+                self.rank_score = rank_score
+                if update_fields is not None:
+                    kwargs['update_fields'] = {*update_fields, 'rank_score'}
+
         # Auto-calculation logic removed to allow manual entry
         super().save(*args, **kwargs)
+        self._loaded_location = tuple(getattr(self, name) for name in self.LOCATION_FIELDS)
 
 
 
@@ -212,6 +335,145 @@ class RecentlyViewed(models.Model):
     property = models.ForeignKey(Property, on_delete=models.CASCADE)
     viewed_at = models.DateTimeField(auto_now=True)
 
+class GeocodeCache(models.Model):
+    """
+    Persistent geocoding results keyed on a normalised address (see
+    apps.properties.geocoding). Misses (ZERO_RESULTS) are cached too, with
+    null coordinates, so unknown addresses aren't re-queried on every save.
+    """
+    STATUS_CHOICES = [
+        ('OK', 'Found'),
+        ('ZERO_RESULTS', 'Not found'),
+    ]
+    address_hash = models.CharField(max_length=64, primary_key=True)  # sha256 of the normalised address
+    normalized_address = models.TextField()
+    latitude = models.FloatField(null=True, blank=True)
+    longitude = models.FloatField(null=True, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES)
+    provider = models.CharField(max_length=20)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.normalized_address} -> {self.latitude},{self.longitude}"
+
+class PincodeCentroid(models.Model):
+    """Mean post-office location per Indian pincode (manage.py import_pincodes)."""
+    pincode = models.CharField(max_length=6, primary_key=True)
+    latitude = models.FloatField()
+    longitude = models.FloatField()
+    district = models.CharField(max_length=100)  # normalised, lower case
+    state = models.CharField(max_length=100)
+
+    def __str__(self):
+        return f"{self.pincode} ({self.district})"
+
+class LocalityCentroid(models.Model):
+    """Mean location of a post-office locality within a district (manage.py import_pincodes)."""
+    city = models.CharField(max_length=100)  # normalised, lower case
+    locality = models.CharField(max_length=255)  # normalised, lower case
+    pincode = models.CharField(max_length=6)
+    latitude = models.FloatField()
+    longitude = models.FloatField()
+
+    class Meta:
+        unique_together = ('city', 'locality')
+
+    def __str__(self):
+        return f"{self.locality}, {self.city}"
+
+class PointOfInterest(models.Model):
+    """Schools, hospitals, stations, ... from an OpenStreetMap extract (manage.py import_pois)."""
+    CATEGORY_CHOICES = [
+        ('SCHOOL', 'School'),
+        ('HOSPITAL', 'Hospital'),
+        ('METRO', 'Metro station'),
+        ('RAILWAY', 'Railway station'),
+        ('PARK', 'Park'),
+    ]
+    osm_id = models.CharField(max_length=30, unique=True)  # 'n123' (node) / 'w456' (way)
+    category = models.CharField(max_length=10, choices=CATEGORY_CHOICES, db_index=True)
+    name = models.CharField(max_length=255, blank=True)
+    latitude = models.FloatField()
+    longitude = models.FloatField()
+
+    class Meta:
+        verbose_name_plural = 'Points of interest'
+
+    def __str__(self):
+        return f"{self.name or self.osm_id} ({self.get_category_display()})"
+
+class City(models.Model):
+    """Canonical city; every spelling seen for it (incl. its own) is a CityAlias."""
+    name = models.CharField(max_length=100)
+    slug = models.CharField(max_length=100, unique=True)  # normalize_place(name)
+    state = models.CharField(max_length=100, blank=True)
+
+    class Meta:
+        verbose_name_plural = 'Cities'
+        ordering = ['name']
+
+    def __str__(self):
+        return self.name
+
+class CityAlias(models.Model):
+    alias = models.CharField(max_length=100, primary_key=True)  # normalised spelling
+    city = models.ForeignKey(City, on_delete=models.CASCADE, related_name='aliases')
+
+    def __str__(self):
+        return f"{self.alias} -> {self.city}"
+
+class Locality(models.Model):
+    """Canonical locality within a city; spellings map to it through LocalityAlias."""
+    city = models.ForeignKey(City, on_delete=models.CASCADE, related_name='localities')
+    name = models.CharField(max_length=255)
+    slug = models.CharField(max_length=255)
+
+    class Meta:
+        verbose_name_plural = 'Localities'
+        unique_together = ('city', 'slug')
+        ordering = ['name']
+
+    def __str__(self):
+        return f"{self.name}, {self.city}"
+
+class LocalityAlias(models.Model):
+    city = models.ForeignKey(City, on_delete=models.CASCADE, related_name='locality_aliases')
+    alias = models.CharField(max_length=255)  # normalised spelling
+    locality = models.ForeignKey(Locality, on_delete=models.CASCADE, related_name='aliases')
+
+    class Meta:
+        unique_together = ('city', 'alias')
+        # ?locality= without ?city= looks aliases up across all cities
+        indexes = [models.Index(fields=['alias'])]
+
+    def __str__(self):
+        return f"{self.alias} -> {self.locality}"
+
+class HomeFeedItem(models.Model):
+    """
+    One card of a homepage carousel, with its serialized payload
+    (apps.properties.feed; rebuilt periodically by the job worker).
+    """
+    CAROUSEL_CHOICES = [
+        ('FEATURED', 'Featured'),
+        ('NEW', 'New'),
+        ('POPULAR', 'Popular'),
+        ('CITY', 'City'),
+    ]
+    carousel = models.CharField(max_length=20, choices=CAROUSEL_CHOICES)
+    city = models.ForeignKey(City, on_delete=models.CASCADE, null=True, blank=True, related_name='+')
+    position = models.PositiveIntegerField()  # order within the carousel (city carousels: across all of them)
+    property = models.ForeignKey(Property, on_delete=models.CASCADE, related_name='+')
+    card = models.JSONField(encoder=DjangoJSONEncoder)
+    built_at = models.DateTimeField()
+
+    class Meta:
+        ordering = ['carousel', 'position']
+        indexes = [models.Index(fields=['carousel', 'position'])]
+
+    def __str__(self):
+        return f"{self.carousel} #{self.position}: {self.property_id}"
+
 @receiver(post_delete, sender=PropertyImage)
 def delete_image_file(sender, instance, **kwargs):
     """Deletes physical image files from storage when the database record is deleted."""
@@ -221,23 +483,38 @@ def delete_image_file(sender, instance, **kwargs):
 @receiver(post_delete, sender=Property)
 def delete_property_files(sender, instance, **kwargs):
     """Deletes all document files and floor plans when a Property record is deleted."""
-    file_fields = [
-        'floor_plan',
-        'building_commencement_certificate',
-        'building_completion_certificate',
-        'layout_sanction',
-        'layout_order',
-        'na_order_or_gunthewari',
-        'mojani_nakasha',
-        'doc_7_12_or_pr_card',
-        'title_search_report',
-        'rera_project_certificate',
-        'gst_registration',
-        'sale_deed_registration_copy',
-        'electricity_bill',
-        'sale_deed'
-    ]
+    file_fields = ['floor_plan', *Property.DOCUMENT_FIELDS]
     for field_name in file_fields:
         file_field = getattr(instance, field_name)
         if file_field:
-            file_field.delete(save=False)
\ No newline at end of file
+            file_field.delete(save=False)
+
+@receiver(post_delete, sender=Property)
+def reset_listing_index(sender, instance, **kwargs):
+    """Deletes leave nothing in the updated_at change stream; have every process rebuild its index."""
+    from .listing_index import publish_reset
+    transaction.on_commit(publish_reset)
+
+@receiver(post_save, sender=PropertyImage)
+@receiver(post_delete, sender=PropertyImage)
+@receiver(post_save, sender=PropertyFloorPlan)
+@receiver(post_delete, sender=PropertyFloorPlan)
+@receiver(post_save, sender=SavedProperty)
+@receiver(post_delete, sender=SavedProperty)
+def refresh_rank_score(sender, instance, **kwargs):
+    """Image, floor plan and save counts feed into the listing's rank_score."""
+    from .ranking import refresh_on_commit
+    refresh_on_commit([instance.property_id])
+
+@receiver(post_save, sender=City)
+@receiver(post_delete, sender=City)
+@receiver(post_save, sender=CityAlias)
+@receiver(post_delete, sender=CityAlias)
+@receiver(post_save, sender=Locality)
+@receiver(post_delete, sender=Locality)
+@receiver(post_save, sender=LocalityAlias)
+@receiver(post_delete, sender=LocalityAlias)
+def invalidate_location_matches(sender, instance, **kwargs):
+    """Cached ?city=/?locality= resolutions may now map to other ids."""
+    from apps.core.cache import location_cache
+    transaction.on_commit(location_cache.invalidate)
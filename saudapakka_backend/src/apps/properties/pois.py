@@ -0,0 +1,157 @@
+"""
+Distance from a listing to the nearest school, hospital, metro station, ...
+
+    nearest_distances(18.559, 73.786)
+    # {'nearest_school_km': 0.42, 'nearest_hospital_km': 1.3, ..., 'nearest_park_km': None}
+
+PointOfInterest rows (manage.py import_pois) are loaded once per process into
+per-category NumPy arrays bucketed on a CELL_SIZE-degree grid. A query only
+measures (haversine) against POIs in the grid cells within MAX_DISTANCE_KM,
+and points sharing a cell are measured together as one matrix, so the
+compute_poi_distances backfill is vectorised over thousands of listings at a
+time. Anything further than MAX_DISTANCE_KM is reported as None. As with the
+centroids, the import bumps a version key and processes reload on their next
+lookup after noticing it.
+"""
+import math
+
+import numpy as np
+
+from apps.core.cache import VersionedLoader
+
+VERSION_KEY = 'pois:version'
+VERSION_CHECK_INTERVAL = 60
+
+MAX_DISTANCE_KM = 10.0
+CELL_SIZE = 0.05  # degrees; ~5.5km north-south
+EARTH_RADIUS_KM = 6371.0
+
+# PointOfInterest.category -> Property field
+DISTANCE_FIELDS = {
+    'SCHOOL': 'nearest_school_km',
+    'HOSPITAL': 'nearest_hospital_km',
+    'METRO': 'nearest_metro_km',
+    'RAILWAY': 'nearest_railway_km',
+    'PARK': 'nearest_park_km',
+}
+
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    lat1, lng1, lat2, lng2 = (np.radians(v) for v in (lat1, lng1, lat2, lng2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def _cells(lats, lngs):
+    return np.floor(lats / CELL_SIZE).astype(np.int64), np.floor(lngs / CELL_SIZE).astype(np.int64)
+
+
+class _CategoryGrid:
+    def __init__(self, lats, lngs):
+        cy, cx = _cells(lats, lngs)
+        order = np.lexsort((cx, cy))
+        self.lats, self.lngs = lats[order], lngs[order]
+        cy, cx = cy[order], cx[order]
+        # cell -> slice into the sorted arrays
+        self.cells = {}
+        if len(order):
+            starts = np.flatnonzero(np.r_[True, (cy[1:] != cy[:-1]) | (cx[1:] != cx[:-1])])
+            ends = np.r_[starts[1:], len(order)]
+            for start, end in zip(starts, ends):
+                self.cells[(int(cy[start]), int(cx[start]))] = slice(int(start), int(end))
+
+    def candidates(self, cell_y, cell_x):
+        """POIs in every cell that can hold one within MAX_DISTANCE_KM of cell (y, x)."""
+        ny = math.ceil(MAX_DISTANCE_KM / (111.32 * CELL_SIZE))
+        # Cells are narrower east-west away from the equator; size for the cell's far edge
+        far_lat = max(abs(cell_y * CELL_SIZE), abs((cell_y + 1) * CELL_SIZE)) + ny * CELL_SIZE
+        nx = math.ceil(MAX_DISTANCE_KM / (111.32 * CELL_SIZE * max(math.cos(math.radians(min(far_lat, 89.0))), 0.01)))
+        slices = [
+            self.cells[(y, x)]
+            for y in range(cell_y - ny, cell_y + ny + 1)
+            for x in range(cell_x - nx, cell_x + nx + 1)
+            if (y, x) in self.cells
+        ]
+        if not slices:
+            return None, None
+        return (np.concatenate([self.lats[s] for s in slices]),
+                np.concatenate([self.lngs[s] for s in slices]))
+
+
+class POIIndex:
+    def __init__(self, rows):
+        """rows: [(category, latitude, longitude)]"""
+        by_category = {category: ([], []) for category in DISTANCE_FIELDS}
+        for category, lat, lng in rows:
+            if category in by_category:
+                by_category[category][0].append(lat)
+                by_category[category][1].append(lng)
+        self.grids = {
+            category: _CategoryGrid(np.array(lats, dtype=np.float64), np.array(lngs, dtype=np.float64))
+            for category, (lats, lngs) in by_category.items()
+        }
+        self.size = sum(len(grid.lats) for grid in self.grids.values())
+
+    @classmethod
+    def from_database(cls):
+        from .models import PointOfInterest
+
+        return cls(PointOfInterest.objects.values_list('category', 'latitude', 'longitude').iterator(chunk_size=10000))
+
+    def __len__(self):
+        return self.size
+
+    def nearest_km(self, category, lats, lngs):
+        """Distance (km) from each point to the category's nearest POI; NaN beyond MAX_DISTANCE_KM."""
+        lats = np.asarray(lats, dtype=np.float64)
+        lngs = np.asarray(lngs, dtype=np.float64)
+        result = np.full(len(lats), np.nan)
+        grid = self.grids[category]
+        valid = np.flatnonzero(~(np.isnan(lats) | np.isnan(lngs)))
+        if not grid.cells or not len(valid):
+            return result
+
+        cy, cx = _cells(lats[valid], lngs[valid])
+        keys, inverse = np.unique(np.stack([cy, cx], axis=1), axis=0, return_inverse=True)
+        inverse = inverse.reshape(-1)
+        for group, (cell_y, cell_x) in enumerate(keys):
+            poi_lats, poi_lngs = grid.candidates(int(cell_y), int(cell_x))
+            if poi_lats is None:
+                continue
+            members = valid[inverse == group]
+            # Bounded chunks keep the points x candidates matrix small
+            for start in range(0, len(members), 256):
+                chunk = members[start:start + 256]
+                distances = haversine_km(lats[chunk, None], lngs[chunk, None], poi_lats[None, :], poi_lngs[None, :])
+                result[chunk] = distances.min(axis=1)
+        result[result > MAX_DISTANCE_KM] = np.nan
+        return result
+
+    def nearest_many(self, lats, lngs):
+        """{Property field: distances array} for many points."""
+        return {field: self.nearest_km(category, lats, lngs) for category, field in DISTANCE_FIELDS.items()}
+
+
+_loader = VersionedLoader(VERSION_KEY, POIIndex.from_database, VERSION_CHECK_INTERVAL)
+
+
+def get_index():
+    """This process's POIIndex, reloaded when import_pois publishes new data."""
+    return _loader.get()
+
+
+def publish_new_version():
+    _loader.publish()
+
+
+def to_km(value):
+    """Array element -> rounded km for storage (None for NaN)."""
+    return None if np.isnan(value) else round(float(value), 2)
+
+
+def nearest_distances(latitude, longitude):
+    """{nearest_*_km: km or None} for one location (all None without coordinates)."""
+    if latitude is None or longitude is None:
+        return dict.fromkeys(DISTANCE_FIELDS.values())
+    distances = get_index().nearest_many([latitude], [longitude])
+    return {field: to_km(values[0]) for field, values in distances.items()}
@@ -0,0 +1,198 @@
+"""
+Relevance ranking for listing results.
+
+Each listing carries a precomputed Property.rank_score, so the default order
+is a single indexed sort on it. The score is measured in freshness half-lives:
+
+    rank_score = age term + priority/featured boosts
+                 + completeness (images, documents, details)
+                 + engagement (views, saves)
+
+Freshness decays exponentially: listing A outranks B when its boosts exceed
+B's by more than the (A.created - B.created) / half-life difference. That
+ordering doesn't change with the clock, so the decay is folded into the
+stored score as created_at / half-life rather than recomputed per query.
+With ?search=, text relevance (which fields matched) is added on top at
+query time (search_score).
+
+Weights come from settings.RANKING_WEIGHTS; after changing them run
+manage.py refresh_rank_scores. The job worker re-scores everything every
+RANKING_REFRESH_INTERVAL seconds (jobs.refresh_rank_scores) so view counts
+feed in. manage.py compare_rankings evaluates weight variants offline.
+"""
+import math
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, Count, F, FloatField, IntegerField, OuterRef, Q, Subquery, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+# Start of the age term; keeps scores small
+SCORE_EPOCH = datetime(2024, 1, 1, tzinfo=dt_timezone.utc)
+
+# Field -> weight of a ?search= term match in it (SearchFilter's search_fields)
+TEXT_FIELD_WEIGHTS = {
+    'title': 3.0,
+    'project_name': 2.0,
+    'locality': 1.5,
+    'city': 1.0,
+    'landmarks': 1.0,
+    'address_line': 0.5,
+}
+
+COMPONENT_FIELDS = (
+    'pk', 'created_at', 'priority_listing', 'is_featured', 'views_count', 'description',
+    'video_url', 'floor_plan', 'carpet_area', 'location_precision',
+)
+
+
+def weights(overrides=None):
+    return {**settings.RANKING_WEIGHTS, **(overrides or {})}
+
+
+def _count(model, **filters):
+    """Correlated COUNT(*) subquery (no join fan-out between several counts)."""
+    return Coalesce(Subquery(
+        model.objects.filter(**filters).order_by().values(*filters).annotate(n=Count('pk')).values('n')[:1],
+        output_field=IntegerField(),
+    ), 0)
+
+
+def with_counts(queryset):
+    from .models import PropertyFloorPlan, PropertyImage, SavedProperty
+
+    return queryset.annotate(
+        image_count=_count(PropertyImage, property=OuterRef('pk')),
+        floor_plan_count=_count(PropertyFloorPlan, property=OuterRef('pk')),
+        save_count=_count(SavedProperty, property=OuterRef('pk')),
+        document_count=sum(
+            (Case(When(~Q(**{name: ''}) & Q(**{f'{name}__isnull': False}), then=1), default=0)
+             for name in _document_fields()),
+            Value(0),
+        ),
+    )
+
+
+def _document_fields():
+    from .models import Property
+    return Property.DOCUMENT_FIELDS
+
+
+def components(row):
+    """Score components (each 0..~1, or half-lives for 'age') for a with_counts() values row."""
+    created_at = row['created_at'] or timezone.now()
+    checks = (
+        row['image_count'] >= 1,
+        row['image_count'] >= 5,
+        len(row['description'] or '') >= 100,
+        bool(row['video_url']),
+        bool(row['floor_plan']) or row['floor_plan_count'] > 0,
+        row['document_count'] >= 1,
+        row['document_count'] >= 3,
+        row['carpet_area'] is not None,
+        row['location_precision'] in ('EXACT', 'GEOCODED'),
+    )
+    return {
+        'age_days': (created_at - SCORE_EPOCH).total_seconds() / 86400,
+        'priority': 1.0 if row['priority_listing'] else 0.0,
+        'featured': 1.0 if row['is_featured'] else 0.0,
+        'completeness': sum(checks) / len(checks),
+        # Saves count as a stronger signal than views; log-scaled, ~1 at 1000 views
+        'engagement': math.log1p(row['views_count'] + 10 * row['save_count']) / math.log1p(1000),
+    }
+
+
+def score(parts, weights):
+    return round(
+        parts['age_days'] / weights['freshness_half_life_days']
+        + weights['priority'] * parts['priority']
+        + weights['featured'] * parts['featured']
+        + weights['completeness'] * parts['completeness']
+        + weights['engagement'] * parts['engagement'],
+        6,
+    )
+
+
+def component_rows(queryset, *extra):
+    return with_counts(queryset).values(
+        *COMPONENT_FIELDS, 'image_count', 'floor_plan_count', 'save_count', 'document_count', *extra
+    )
+
+
+def instance_score(prop):
+    """rank_score for an in-memory Property (save() path; counts queried unless it is new)."""
+    row = {name: getattr(prop, name) for name in COMPONENT_FIELDS}
+    row['document_count'] = sum(1 for name in _document_fields() if getattr(prop, name))
+    if prop._state.adding:
+        row.update(image_count=0, floor_plan_count=0, save_count=0)
+    else:
+        row.update(
+            image_count=prop.images.count(),
+            floor_plan_count=prop.floor_plans.count(),
+            save_count=prop.savedproperty_set.count(),
+        )
+    return score(components(row), weights())
+
+
+def refresh(property_ids=None, batch_size=1000):
+    """Recomputes rank_score for the given listings (all when None); returns how many changed."""
+    from .models import Property
+
+    current_weights = weights()
+    queryset = Property.objects.all() if property_ids is None else Property.objects.filter(pk__in=property_ids)
+    changed = []
+    now = timezone.now()
+    for row in component_rows(queryset, 'rank_score').iterator(chunk_size=batch_size):
+        new_score = score(components(row), current_weights)
+        if row['rank_score'] != new_score:
+            changed.append(Property(pk=row['pk'], rank_score=new_score, updated_at=now))
+    Property.objects.bulk_update(changed, ['rank_score', 'updated_at'], batch_size=500)
+    return len(changed)
+
+
+class _PendingRefresh:
+    """Listing ids touched in the current transaction, re-scored once it commits."""
+
+    def __init__(self):
+        self.ids = set()
+
+    def __call__(self):
+        refresh(self.ids)
+
+
+def refresh_on_commit(property_ids):
+    """
+    refresh() for image/floor plan/save changes, coalesced per transaction: a
+    bulk upload or cascade delete re-scores each listing once, after commit.
+    """
+    connection = transaction.get_connection()
+    if not connection.in_atomic_block:
+        refresh(property_ids)
+        return
+    pending = getattr(connection, '_pending_rank_refresh', None)
+    # Gone from run_on_commit once its transaction (or savepoint) rolled back or committed
+    if pending is None or not any(entry[1] is pending for entry in connection.run_on_commit):
+        pending = connection._pending_rank_refresh = _PendingRefresh()
+        transaction.on_commit(pending)
+    pending.ids.update(property_ids)
+
+
+def search_score(terms, weights=None):
+    """rank_score plus the weighted share of search_fields matching any term."""
+    weights = weights or settings.RANKING_WEIGHTS
+    total = sum(TEXT_FIELD_WEIGHTS.values())
+    matched = sum(
+        (Case(When(_any_term(field, terms), then=Value(weight)), default=Value(0.0), output_field=FloatField())
+         for field, weight in TEXT_FIELD_WEIGHTS.items()),
+        Value(0.0),
+    )
+    return F('rank_score') + weights['text'] * matched / total
+
+
+def _any_term(field, terms):
+    condition = Q()
+    for term in terms:
+        condition |= Q(**{f'{field}__icontains': term})
+    return condition
@@ -1,8 +1,10 @@
 from rest_framework import serializers
 from .models import Property, PropertyImage, PropertyFloorPlan
 from apps.users.serializers import UserSerializer, PublicUserSerializer
+from apps.core.serializers import StorageKeyMixin
+from apps.core.fieldsets import SparseFieldsetMixin
 
-class PropertyImageSerializer(serializers.ModelSerializer):
+class PropertyImageSerializer(StorageKeyMixin, serializers.ModelSerializer):
     class Meta:
         model = PropertyImage
         fields = ['id', 'image', 'is_thumbnail']
@@ -12,7 +14,12 @@ class PropertyFloorPlanSerializer(serializers.ModelSerializer):
         model = PropertyFloorPlan
         fields = ['id', 'image', 'floor_number', 'floor_name', 'order', 'created_at']
 
-class PropertySerializer(serializers.ModelSerializer):
+def thumbnail_image(prop):
+    """First image marked as thumbnail, else the first upload (images prefetched)."""
+    images = list(prop.images.all())
+    return next((img for img in images if img.is_thumbnail), images[0] if images else None)
+
+class PropertySerializer(SparseFieldsetMixin, StorageKeyMixin, serializers.ModelSerializer):
     images = PropertyImageSerializer(many=True, read_only=True)
     floor_plans = PropertyFloorPlanSerializer(many=True, read_only=True)
     owner_details = PublicUserSerializer(source='owner', read_only=True)
@@ -27,6 +34,14 @@ class PropertySerializer(serializers.ModelSerializer):
     has_active_mandate = serializers.SerializerMethodField()
     active_mandate_id = serializers.SerializerMethodField()
     is_saved = serializers.SerializerMethodField()
+    thumbnail = serializers.SerializerMethodField()
+
+    # ?fields=card: what a listing card needs
+    field_presets = {
+        'card': ['id', 'title', 'listing_type', 'property_type', 'property_type_display', 'sub_type', 'bhk_config',
+                 'total_price', 'super_builtup_area', 'carpet_area', 'locality', 'city', 'thumbnail', 'is_saved',
+                 'created_at'],
+    }
 
     class Meta:
         model = Property
@@ -34,8 +49,9 @@ class PropertySerializer(serializers.ModelSerializer):
             'property_type_display', 'sub_type', 'sub_type_display', 'verification_status', 'created_at',
             'bhk_config', 'bathrooms', 'balconies', 'furnishing_status', 'furnishing_status_display',
             'total_price', 'price_per_sqft', 'maintenance_charges', 'maintenance_interval', 'super_builtup_area', 
-            'carpet_area', 'plot_area', 'address_line', 'locality', 'city', 'pincode', 'latitude', 'longitude', 
-            'landmarks', 'specific_floor', 'total_floors', 'facing', 'facing_display', 'availability_status', 
+            'carpet_area', 'plot_area', 'address_line', 'locality', 'city', 'city_ref', 'locality_ref', 'pincode', 'latitude', 'longitude', 
+            'location_precision', 'canonical_locality_id', 'nearest_school_km', 'nearest_hospital_km',
+            'nearest_metro_km', 'nearest_railway_km', 'nearest_park_km', 'landmarks', 'specific_floor', 'total_floors', 'facing', 'facing_display', 'availability_status', 
             'availability_status_display', 'possession_date', 'age_of_construction', 'has_power_backup', 'has_lift', 
             'has_swimming_pool', 'has_club_house', 'has_gym', 'has_park', 'has_reserved_parking', 'has_security',
             'is_vastu_compliant', 'has_intercom', 'has_piped_gas', 'has_wifi', 'images', 'video_url', 'floor_plan', 
@@ -43,8 +59,37 @@ class PropertySerializer(serializers.ModelSerializer):
             'building_completion_certificate', 'layout_sanction', 'layout_order', 'na_order_or_gunthewari',
             'mojani_nakasha', 'doc_7_12_or_pr_card', 'title_search_report', 'has_7_12', 'has_mojani', 
             'has_active_mandate', 'active_mandate_id', 'is_saved', 'views_count', 'rera_project_certificate',
-            'gst_registration', 'sale_deed_registration_copy', 'electricity_bill', 'sale_deed']
-        read_only_fields = ['id', 'owner', 'verification_status', 'created_at']
+            'gst_registration', 'sale_deed_registration_copy', 'electricity_bill', 'sale_deed', 'thumbnail']
+        read_only_fields = ['id', 'owner', 'verification_status', 'created_at', 'location_precision', 'city_ref', 'locality_ref', 'canonical_locality_id',
+            'nearest_school_km', 'nearest_hospital_km', 'nearest_metro_km', 'nearest_railway_km', 'nearest_park_km']
+        # Only with ?expand= (or named in ?fields=) once ?fields= is given
+        expandable_fields = ['owner_details', 'images', 'floor_plans']
+        # Model fields read by method fields (for the ?fields= .only() projection)
+        field_sources = {
+            'has_7_12': ['doc_7_12_or_pr_card'],
+            'has_mojani': ['mojani_nakasha'],
+            'has_active_mandate': [],
+            'active_mandate_id': [],
+            'is_saved': [],
+            'thumbnail': ['images'],
+        }
+
+    def validate(self, attrs):
+        attrs = super().validate(attrs)
+        # Coordinates set by the lister win over centroid estimates and geocoding.
+        # Edit forms send the stored lat/lng back on every PATCH, so only new ones count.
+        latitude, longitude = attrs.get('latitude'), attrs.get('longitude')
+        if latitude is not None and longitude is not None:
+            if self.instance is None or self._moved(self.instance, latitude, longitude):
+                attrs['location_precision'] = 'EXACT'
+        return attrs
+
+    @staticmethod
+    def _moved(instance, latitude, longitude):
+        """True unless (latitude, longitude) is the stored point, give or take form rounding (~10 cm)."""
+        if instance.latitude is None or instance.longitude is None:
+            return True
+        return abs(latitude - instance.latitude) > 1e-6 or abs(longitude - instance.longitude) > 1e-6
 
     def get_has_7_12(self, obj):
         return bool(obj.doc_7_12_or_pr_card)
@@ -52,22 +97,77 @@ class PropertySerializer(serializers.ModelSerializer):
     def get_has_mojani(self, obj):
         return bool(obj.mojani_nakasha)
 
+    def _batched(self, name, obj, load):
+        """
+        load(rows) for everything serialized alongside obj, run once per list
+        when many=True. Otherwise (a single object, or nested in another
+        serializer, where one field instance serves every parent row) it runs
+        for obj alone on each call.
+        """
+        if not (isinstance(self.parent, serializers.ListSerializer) and self.parent.instance is not None):
+            return load([obj])
+        batches = self.__dict__.setdefault('_batches', {})
+        if name not in batches:
+            batches[name] = load(self.parent.instance)
+        return batches[name]
+
+    def _active_mandates(self, obj):
+        """{property id: active/pending mandate id}, fetched once per list."""
+        def load(rows):
+            from apps.mandates.models import Mandate
+            found = {}
+            # Lowest id per listing, same as .first() on the unordered queryset
+            for property_id, mandate_id in Mandate.objects.filter(
+                    property_item__in=rows, status__in=['ACTIVE', 'PENDING']
+            ).order_by('pk').values_list('property_item_id', 'id'):
+                found.setdefault(property_id, mandate_id)
+            return found
+        return self._batched('active_mandates', obj, load)
+
     def get_has_active_mandate(self, obj):
-        from apps.mandates.models import Mandate
-        return Mandate.objects.filter(property_item=obj, status__in=['ACTIVE', 'PENDING']).exists()
+        return obj.pk in self._active_mandates(obj)
 
     def get_active_mandate_id(self, obj):
-        from apps.mandates.models import Mandate
-        mandate = Mandate.objects.filter(property_item=obj, status__in=['ACTIVE', 'PENDING']).first()
-        return str(mandate.id) if mandate else None
+        mandate_id = self._active_mandates(obj).get(obj.pk)
+        return str(mandate_id) if mandate_id else None
+
+    def get_thumbnail(self, obj):
+        image = thumbnail_image(obj)
+        if image is None:
+            return None
+        request = self.context.get('request')
+        return request.build_absolute_uri(image.image.url) if request else image.image.url
 
     def get_is_saved(self, obj):
         request = self.context.get('request')
         if request and request.user.is_authenticated:
-            from .models import SavedProperty
-            return SavedProperty.objects.filter(user=request.user, property=obj).exists()
+            def load(rows):
+                from .models import SavedProperty
+                return set(SavedProperty.objects.filter(
+                    user=request.user, property__in=rows
+                ).values_list('property_id', flat=True))
+            return obj.pk in self._batched('saved', obj, load)
         return False
 
+class PropertyCardSerializer(serializers.ModelSerializer):
+    """
+    Compact listing card for the homepage feed. Built offline (no request), so
+    thumbnail is the storage key and apps.properties.feed turns it into a URL,
+    and overlays is_saved, per request.
+    """
+    property_type_display = serializers.CharField(source='get_property_type_display', read_only=True)
+    thumbnail = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Property
+        fields = ['id', 'title', 'listing_type', 'property_type', 'property_type_display', 'sub_type',
+                  'bhk_config', 'total_price', 'super_builtup_area', 'carpet_area', 'locality', 'city',
+                  'is_featured', 'priority_listing', 'thumbnail', 'created_at']
+
+    def get_thumbnail(self, obj):
+        image = thumbnail_image(obj)
+        return image.image.name if image else None
+
 class AdminPropertySerializer(PropertySerializer):
     owner_details = UserSerializer(source='owner', read_only=True)
 
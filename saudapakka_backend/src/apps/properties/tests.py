@@ -1,3 +1,398 @@
-from django.test import TestCase
+import unittest
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework import serializers
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient, APIRequestFactory
+
+from apps.admin_panel.views import AdminPropertyList
+from apps.mandates.models import Mandate
+
+from . import fast_read, geocoding, listing_index
+from .jobs import geocode_property
+from .models import GeocodeCache, Property, PropertyFloorPlan, PropertyImage, SavedProperty
+from .serializers import AdminPropertySerializer, PropertySerializer
+from .views import PropertyViewSet
+
+User = get_user_model()
+
+
+class FastReadParityTests(TestCase):
+    """fast_read must produce exactly what the serializers produce."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user(
+            username='owner', email='owner@example.com', password='x', first_name='Asha', last_name='Patil',
+            phone_number='9000000001', is_active_seller=True, avatar_small='profile_pictures/avatars/a.jpg',
+        )
+        cls.buyer = User.objects.create_user(
+            username='buyer', email='buyer@example.com', password='x', first_name='Ravi', last_name='K',
+            phone_number='9000000002',
+        )
+        cls.staff = User.objects.create_user(
+            username='staff', email='staff@example.com', password='x', first_name='Admin', last_name='User',
+            phone_number='9000000003', is_staff=True,
+        )
+        base = dict(owner=cls.owner, address_line='12 MG Road', pincode='411045', verification_status='VERIFIED')
+        cls.flat = Property.objects.create(
+            **base, title='2 BHK in Baner', listing_type='SALE', property_type='FLAT', sub_type='2BHK',
+            bhk_config=2, total_price=Decimal('7500000.50'), carpet_area=Decimal('900'), locality='Baner', city='Pune',
+            furnishing_status='SEMI_FURNISHED', facing='EAST', has_lift=True, description='d' * 120,
+            doc_7_12_or_pr_card='properties/docs/712.pdf', video_url='https://example.com/v',
+        )
+        cls.villa = Property.objects.create(
+            **base, title='Villa', listing_type='RENT', property_type='VILLA_BUNGALOW', total_price=Decimal('45000'),
+            locality='Wakad', city='Pune', floor_plan='properties/floor_plans/v.png', is_featured=True,
+        )
+        cls.plot = Property.objects.create(
+            **{**base, 'verification_status': 'PENDING'}, title='Plot', listing_type='SALE', property_type='PLOT',
+            total_price=Decimal('1200000'), locality='Nashik Road', city='Nashik', mojani_nakasha='properties/docs/m.pdf',
+        )
+        PropertyImage.objects.create(property=cls.flat, image='properties/f1.jpg')
+        PropertyImage.objects.create(property=cls.flat, image='properties/f2.jpg', is_thumbnail=True)
+        PropertyImage.objects.create(property=cls.villa, image='properties/v1.jpg')
+        PropertyFloorPlan.objects.create(property=cls.villa, image='properties/floor_plans/g.png', floor_number=0,
+                                         floor_name='Ground', order=1)
+        PropertyFloorPlan.objects.create(property=cls.villa, image='properties/floor_plans/1.png', floor_number=1, order=0)
+        SavedProperty.objects.create(user=cls.buyer, property=cls.villa)
+        Mandate.objects.create(property_item=cls.flat, seller=cls.owner, deal_type='WITH_PLATFORM',
+                               initiated_by='SELLER', status='ACTIVE')
+
+    def setUp(self):
+        listing_index._snapshot = None
+        throttles = mock.patch.object(PropertyViewSet, 'throttle_classes', [])
+        throttles.start()
+        self.addCleanup(throttles.stop)
+
+    def get_both(self, url, params=None, user=None):
+        """Response bodies with the fast path off and on."""
+        client = APIClient()
+        client.force_authenticate(user)
+        bodies = []
+        for enabled in (False, True):
+            with override_settings(FAST_LIST_SERIALIZATION=enabled):
+                response = client.get(url, params or {})
+            self.assertEqual(response.status_code, 200, response.content)
+            bodies.append(response.content)
+        return bodies
+
+    def test_property_list_is_identical(self):
+        cases = [
+            {},
+            {'limit': 1, 'offset': 1},
+            {'ordering': 'total_price'},
+            {'city': 'pune', 'min_price': 50000},
+            {'search': 'baner'},
+            {'fields': 'card'},
+            {'fields': 'card', 'expand': 'owner_details,images,floor_plans'},
+            {'fields': 'id,title,has_7_12,has_active_mandate,active_mandate_id,floor_plan,total_price'},
+        ]
+        for user in (None, self.buyer, self.owner, self.staff):
+            for params in cases:
+                with self.subTest(user=user and user.username, params=params):
+                    slow, fast = self.get_both('/api/properties/', params, user)
+                    self.assertEqual(slow, fast)
+
+    def test_index_path_is_identical(self):
+        with override_settings(LISTING_INDEX_ENABLED=True):
+            slow, fast = self.get_both('/api/properties/', {'limit': 5}, self.buyer)
+        self.assertEqual(slow, fast)
+        self.assertIn(b'"is_saved":true', fast)
+
+    def test_my_listings_is_identical(self):
+        slow, fast = self.get_both('/api/properties/my_listings/', user=self.owner)
+        self.assertEqual(slow, fast)
+        self.assertIn(b'Nashik Road', fast)
+
+    def test_admin_list_is_identical(self):
+        with mock.patch.object(AdminPropertyList, 'throttle_classes', []):
+            for params in ({'status': 'ALL'}, {'status': 'PENDING'}, {'status': 'ALL', 'fields': 'card'}):
+                with self.subTest(params=params):
+                    slow, fast = self.get_both('/api/admin/properties/', params, self.staff)
+                    self.assertEqual(slow, fast)
+
+    def test_serialize_matches_serializer(self):
+        request = APIRequestFactory().get('/')
+        request.user = self.buyer
+        queryset = Property.objects.order_by('created_at')
+        for serializer_class in (PropertySerializer, AdminPropertySerializer):
+            with self.subTest(serializer=serializer_class.__name__):
+                context = {'request': request}
+                expected = serializer_class(queryset, many=True, context=context).data
+                data = fast_read.serialize(queryset, serializer_class(context=context))
+                self.assertEqual(JSONRenderer().render(data), JSONRenderer().render(expected))
+
+    def test_unsupported_field_falls_back(self):
+        class ExtraSerializer(PropertySerializer):
+            score = serializers.SerializerMethodField()
+
+            class Meta(PropertySerializer.Meta):
+                fields = ['id', 'score']
+
+            def get_score(self, obj):
+                return 1
+
+        self.assertIsNone(fast_read.serialize(Property.objects.all(), ExtraSerializer()))
+
+        class OverriddenSerializer(PropertySerializer):
+            def get_is_saved(self, obj):
+                return True
+
+        self.assertIsNone(fast_read.serialize(Property.objects.all(), OverriddenSerializer()))
+
+
+class NestedPropertySerializerTests(TestCase):
+    """PropertySerializer nested in another list must not share per-list lookups across rows."""
+
+    def test_mandate_list_property_details(self):
+        staff = User.objects.create_user(
+            username='reviewer', email='reviewer@example.com', password='x', phone_number='9000000010', is_staff=True,
+        )
+        mandates = {}
+        for n, name in enumerate(('Asha', 'Ravi', 'Meera')):
+            seller = User.objects.create_user(
+                username=name.lower(), email=f'{name.lower()}@example.com', password='x', first_name=name,
+                last_name='Patil', phone_number=f'900000002{n}', is_active_seller=True,
+            )
+            prop = Property.objects.create(
+                owner=seller, title=f'Flat {n}', listing_type='SALE', property_type='FLAT',
+                total_price=Decimal('5000000'), address_line='1 FC Road', locality='Deccan', city='Pune',
+                pincode='411004', verification_status='VERIFIED',
+            )
+            SavedProperty.objects.create(user=staff, property=prop)
+            mandates[str(prop.pk)] = Mandate.objects.create(
+                property_item=prop, seller=seller, deal_type='WITH_PLATFORM', initiated_by='SELLER', status='ACTIVE',
+            )
+
+        client = APIClient()
+        client.force_authenticate(staff)
+        response = client.get('/api/mandates/')
+        self.assertEqual(response.status_code, 200, response.content)
+        rows = response.data['results'] if isinstance(response.data, dict) else response.data
+        self.assertEqual(len(rows), 3)
+        for row in rows:
+            details = row['property_details']
+            with self.subTest(property=details['id']):
+                self.assertTrue(details['has_active_mandate'])
+                self.assertEqual(details['active_mandate_id'], str(mandates[details['id']].pk))
+                self.assertTrue(details['is_saved'])
+
+
+
+@override_settings(LISTING_INDEX_REFRESH_INTERVAL=0)
+class ListingIndexParityTests(TestCase):
+    """The in-memory listing index must page and count exactly like the database."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user(
+            username='lister', email='lister@example.com', password='x', phone_number='9000000040',
+        )
+        rows = [
+            # city, locality, listing_type, bhk, price, carpet, super built-up, amenities
+            ('Pune', 'Baner', 'SALE', 2, 7500000, 900, 1100, {'has_lift', 'has_gym'}),
+            ('Pune', 'Baner', 'SALE', 3, 9800000, None, 1450, {'has_lift'}),
+            ('Pune', 'Wakad', 'RENT', 2, 32000, 850, None, {'has_gym', 'is_vastu_compliant'}),
+            ('Pune', 'Wakad', 'SALE', 1, 4200000, 520, None, set()),
+            ('Mumbai', 'Baner', 'SALE', 2, 15500000, 700, 980, {'has_lift', 'has_gym', 'has_wifi'}),
+            ('Mumbai', 'Andheri', 'RENT', 1, 55000, None, 600, {'has_lift'}),
+            ('Nashik', 'Gangapur', 'SALE', 3, 6100000, 1200, 1500, {'is_vastu_compliant'}),
+        ]
+        cls.properties = []
+        for n, (city, locality, listing_type, bhk, price, carpet, built_up, amenities) in enumerate(rows):
+            cls.properties.append(Property.objects.create(
+                owner=cls.owner, title=f'Listing {n}', listing_type=listing_type, property_type='FLAT',
+                bhk_config=bhk, total_price=Decimal(price), carpet_area=carpet, super_builtup_area=built_up,
+                address_line=f'{n} Main Road', locality=locality, city=city, verification_status='VERIFIED',
+                **dict.fromkeys(amenities, True),
+            ))
+        Property.objects.create(
+            owner=cls.owner, title='Pending', listing_type='SALE', property_type='FLAT', bhk_config=2,
+            total_price=Decimal('7000000'), locality='Baner', city='Pune', verification_status='PENDING',
+        )
+        Property.objects.filter(pk=cls.properties[0].pk).update(nearest_school_km=0.8)
+        Property.objects.filter(pk=cls.properties[4].pk).update(nearest_school_km=2.5)
+
+    def setUp(self):
+        listing_index._snapshot = None
+        throttles = mock.patch.object(PropertyViewSet, 'throttle_classes', [])
+        throttles.start()
+        self.addCleanup(throttles.stop)
+
+    def get_both(self, params):
+        """(database, index) responses as (body, X-Total-Count), checking the index answered."""
+        answers = []
+        real_search = listing_index.search
+
+        def search(*args, **kwargs):
+            answers.append(real_search(*args, **kwargs))
+            return answers[-1]
+
+        results = []
+        for enabled in (False, True):
+            with override_settings(LISTING_INDEX_ENABLED=enabled), mock.patch.object(listing_index, 'search', search):
+                response = APIClient().get('/api/properties/', params)
+            self.assertEqual(response.status_code, 200, response.content)
+            results.append((response.content, response['X-Total-Count']))
+        self.assertEqual(len(answers), 2)
+        self.assertIsNone(answers[0])
+        self.assertIsNotNone(answers[1], 'the index declined the query')
+        return results
+
+    def assert_parity(self, cases):
+        for params in cases:
+            with self.subTest(params=params):
+                database, index = self.get_both(params)
+                self.assertEqual(database, index)
+
+    def test_location_filters(self):
+        self.assert_parity([
+            {'city': 'pune'},
+            {'city': 'Mumbai', 'limit': 1, 'offset': 1},
+            {'city': 'nowhere'},
+            {'locality': 'baner'},
+            {'city': 'pune', 'locality': 'baner'},
+            {'city': 'mumbai', 'locality': 'wakad'},
+        ])
+
+    def test_amenity_filters(self):
+        self.assert_parity([
+            {'amenities': 'lift'},
+            {'amenities': 'lift,gym'},
+            {'amenities': 'vastu_compliant,gym'},
+            {'amenities': 'lift,gym,wifi', 'city': 'mumbai'},
+        ])
+
+    def test_numeric_and_categorical_filters(self):
+        self.assert_parity([
+            {'min_price': 5000000},
+            {'min_price': 40000, 'max_price': 9800000},
+            {'min_area': 800},  # NULL carpet areas never match
+            {'bhk': 2, 'listing_type': 'SALE'},
+            {'max_school_km': 1},
+            {'listing_type': 'RENT', 'ordering': 'total_price'},
+            {'ordering': '-total_price', 'limit': 3, 'offset': 2},
+        ])
+
+    def test_null_ordering_in_index(self):
+        # Postgres order: NULLs last ascending, first descending
+        nulls = {str(self.properties[2].pk), str(self.properties[3].pk)}
+        for ordering, position in (('super_builtup_area,-created_at', slice(-2, None)),
+                                   ('-super_builtup_area,-created_at', slice(0, 2))):
+            with self.subTest(ordering=ordering), override_settings(LISTING_INDEX_ENABLED=True):
+                response = APIClient().get('/api/properties/', {'ordering': ordering, 'fields': 'id'})
+                self.assertEqual({row['id'] for row in response.data[position]}, nulls)
+
+    @unittest.skipUnless(connection.features.nulls_order_largest, 'the index sorts NULLs as Postgres does')
+    def test_null_ordering_matches_database(self):
+        self.assert_parity([
+            {'ordering': 'super_builtup_area,-created_at'},
+            {'ordering': '-super_builtup_area,-created_at'},
+            {'ordering': 'super_builtup_area,created_at', 'limit': 2, 'offset': 4},
+        ])
+
+    def test_delete_reaches_index_after_reset(self):
+        params = {'city': 'pune', 'fields': 'id'}
+        with override_settings(LISTING_INDEX_ENABLED=True):
+            self.assertEqual(len(APIClient().get('/api/properties/', params).data), 4)  # builds the snapshot
+        deleted = self.properties[1]
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            deleted.delete()
+        self.assertIn(listing_index.publish_reset, callbacks)
+
+        database, index = self.get_both(params)
+        self.assertEqual(database, index)
+        self.assertNotIn(str(deleted.pk).encode(), index[0])
+        self.assertEqual(index[1], '3')
+
+@override_settings(GEOCODING_BACKEND='stub', GEOCODING_NEGATIVE_CACHE_DAYS=30)
+class GeocodingTests(TestCase):
+    """GeocodeCache in front of the provider, and geocode_property's overwrite rules."""
+
+    def setUp(self):
+        geocoding._geocoder = None
+        self.addCleanup(setattr, geocoding, '_geocoder', None)
+        stub = geocoding.get_geocoder()
+        self.assertIsInstance(stub, geocoding.StubGeocoder)
+        patcher = mock.patch.object(stub, 'geocode', wraps=stub.geocode)
+        self.provider = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_miss_then_hit(self):
+        lat, lng = geocoding.geocode('12 MG Road, Pune 411001')
+        self.assertIsNotNone(lat)
+        self.assertEqual(self.provider.call_count, 1)
+        # Same address after normalisation: answered from GeocodeCache
+        self.assertEqual(geocoding.geocode('12  mg road , PUNE 411001.'), (lat, lng))
+        self.assertEqual(self.provider.call_count, 1)
+        entry = GeocodeCache.objects.get()
+        self.assertEqual((entry.status, entry.provider), (geocoding.OK, 'stub'))
+
+    def test_negative_cache_expires(self):
+        address = 'Unknown Lane, Pune'
+        self.assertEqual(geocoding.geocode(address), (None, None))
+        self.assertEqual(geocoding.geocode(address), (None, None))
+        self.assertEqual(self.provider.call_count, 1)
+        self.assertEqual(GeocodeCache.objects.get().status, geocoding.ZERO_RESULTS)
+
+        GeocodeCache.objects.update(created_at=timezone.now() - timedelta(days=31))
+        self.assertEqual(geocoding.geocode(address), (None, None))
+        self.assertEqual(self.provider.call_count, 2)
+        # The fresh miss is cached again
+        self.assertEqual(geocoding.geocode(address), (None, None))
+        self.assertEqual(self.provider.call_count, 2)
+
+    def test_provider_error_is_not_cached(self):
+        address = '5 FC Road, Pune'
+        self.provider.side_effect = geocoding.GeocodingError('OVER_QUERY_LIMIT')
+        self.assertEqual(geocoding.geocode(address), (None, None))
+        self.assertFalse(GeocodeCache.objects.exists())
+
+        self.provider.side_effect = None
+        lat, lng = geocoding.geocode(address)
+        self.assertIsNotNone(lat)
+        self.assertEqual(self.provider.call_count, 2)
+        self.assertEqual(GeocodeCache.objects.get().latitude, lat)
+
+    def create_property(self, **fields):
+        owner = User.objects.create_user(username='geo', email='geo@example.com', password='x', phone_number='9000000030')
+        return Property.objects.create(
+            owner=owner, title='Flat', listing_type='SALE', property_type='FLAT', total_price=Decimal('5000000'),
+            address_line='7 Law College Road', locality='Erandwane', city='Pune', pincode='411004', **fields,
+        )
+
+    def test_geocode_property_fills_missing_coordinates(self):
+        prop = self.create_property()
+        Property.objects.filter(pk=prop.pk).update(latitude=None, longitude=None, location_precision=None)
+        geocode_property(str(prop.pk))
+        prop.refresh_from_db()
+        self.assertEqual(prop.location_precision, 'GEOCODED')
+        self.assertEqual((prop.latitude, prop.longitude), geocoding.geocode(geocoding.property_address(prop)))
+
+    def test_geocode_property_keeps_exact_coordinates(self):
+        prop = self.create_property(latitude=18.51, longitude=73.83, location_precision='EXACT')
+        geocode_property(str(prop.pk))
+        prop.refresh_from_db()
+        self.assertEqual((prop.latitude, prop.longitude, prop.location_precision), (18.51, 73.83, 'EXACT'))
+        self.provider.assert_not_called()
+
+    def test_geocode_property_keeps_coordinates_set_meanwhile(self):
+        prop = self.create_property()
+        Property.objects.filter(pk=prop.pk).update(latitude=None, longitude=None, location_precision=None)
+
+        def owner_sets_pin(normalized):
+            # The lister drops a pin while the provider call is in flight
+            Property.objects.filter(pk=prop.pk).update(latitude=18.52, longitude=73.84, location_precision='EXACT')
+            return geocoding.OK, 10.0, 70.0
+
+        self.provider.side_effect = owner_sets_pin
+        geocode_property(str(prop.pk))
+        prop.refresh_from_db()
+        self.assertEqual((prop.latitude, prop.longitude, prop.location_precision), (18.52, 73.84, 'EXACT'))
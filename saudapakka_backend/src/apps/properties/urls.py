@@ -1,11 +1,12 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import PropertyViewSet, ExternalPropertyCreateView
+from .views import PropertyViewSet, ExternalPropertyCreateView, HomeFeedView
 
 router = DefaultRouter()
 router.register(r'properties', PropertyViewSet, basename='property')
 
 urlpatterns = [
     path('properties/external/create/', ExternalPropertyCreateView.as_view(), name='external-property-create'),
+    path('feed/home/', HomeFeedView.as_view(), name='home-feed'),
     path('', include(router.urls)),
 ]
\ No newline at end of file
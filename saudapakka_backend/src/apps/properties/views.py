@@ -1,15 +1,26 @@
 from rest_framework import viewsets, permissions, status, filters, exceptions, generics
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from rest_framework.views import APIView
 from rest_framework.parsers import MultiPartParser, FormParser
+from rest_framework.settings import api_settings
 from django_filters.rest_framework import DjangoFilterBackend
+from django.conf import settings
 from django.db.models import Q
 import django_filters
 
 from .models import Property, PropertyImage, SavedProperty, RecentlyViewed
 
 from .serializers import PropertySerializer, PropertyImageSerializer, ExternalPropertySerializer
+from .jobs import schedule_geocoding
+from .locations import match_city_ids, match_locality_ids
+from . import fast_read, feed, listing_index, ranking
 from apps.users.authentication import APIKeyAuthentication
+from apps.users.throttling import APIKeyRateThrottle
+from apps.users import usage
+from apps.core.storage import claim_upload_key
+from apps.core.idempotency import idempotent
+from apps.core.fieldsets import SparseFieldsetViewMixin
 
 from rest_framework.renderers import JSONRenderer
 
@@ -17,7 +28,7 @@ class ExternalPropertyCreateView(generics.CreateAPIView):
     """
     Dedicated endpoint for WhatsApp Bots / Automation.
     Authentication: X-API-KEY header (APIKeyAuthentication).
-    Rate Limit: None.
+    Rate Limit: Token bucket per key (ExternalAPIKey.rate_limit_per_minute / burst_limit).
     Parser: Multipart (Images involved).
     """
     authentication_classes = [APIKeyAuthentication]
@@ -25,11 +36,17 @@ class ExternalPropertyCreateView(generics.CreateAPIView):
     serializer_class = ExternalPropertySerializer
     parser_classes = [MultiPartParser, FormParser]
     renderer_classes = [JSONRenderer]
-    throttle_classes = [] # No rate limit
+    throttle_classes = [APIKeyRateThrottle] # Also meters requests/bytes per key
+
+    @idempotent('external-property-create')
+    def create(self, request, *args, **kwargs):
+        return super().create(request, *args, **kwargs)
 
     def perform_create(self, serializer):
         # Additional logic if needed, but serializer handles mostly
-        serializer.save()
+        property_instance = serializer.save()
+        schedule_geocoding(property_instance)
+        usage.record(self.request.auth.pk, listings_created=1)
 from .permissions import IsOwnerOrReadOnly
 
 # --- ADVANCED FILTERING LOGIC ---
@@ -42,20 +59,70 @@ class PropertyFilter(django_filters.FilterSet):
     # Area Filters
     min_area = django_filters.NumberFilter(field_name="carpet_area", lookup_expr='gte')
     
+    # Location: the text is resolved to canonical City/Locality ids once
+    # (aliases, typos, substrings) and filtered on the indexed foreign keys
+    city = django_filters.CharFilter(method='filter_city')
+    locality = django_filters.CharFilter(method='filter_locality')
+    city_id = django_filters.NumberFilter(field_name="city_ref")
+    locality_ref = django_filters.NumberFilter(field_name="locality_ref")
+    # Canonical locality from the boundary polygons (indexed, unlike the free-text locality)
+    locality_id = django_filters.CharFilter(field_name="canonical_locality_id")
+
+    # Nearby amenities, e.g. ?max_school_km=2&max_metro_km=1
+    max_school_km = django_filters.NumberFilter(field_name="nearest_school_km", lookup_expr='lte')
+    max_hospital_km = django_filters.NumberFilter(field_name="nearest_hospital_km", lookup_expr='lte')
+    max_metro_km = django_filters.NumberFilter(field_name="nearest_metro_km", lookup_expr='lte')
+    max_railway_km = django_filters.NumberFilter(field_name="nearest_railway_km", lookup_expr='lte')
+    max_park_km = django_filters.NumberFilter(field_name="nearest_park_km", lookup_expr='lte')
+
+    # Amenities, e.g. ?amenities=lift,gym,vastu_compliant (all required)
+    amenities = django_filters.CharFilter(method='filter_amenities')
+
     # Exact Match Filters
-    city = django_filters.CharFilter(field_name="city", lookup_expr='icontains')
     bhk = django_filters.NumberFilter(field_name="bhk_config")
     
     class Meta:
         model = Property
         fields = [
-            'listing_type', 'property_type', 'sub_type', 'bhk_config', 'city', 'locality', 
+            'listing_type', 'property_type', 'sub_type', 'bhk_config',
             'furnishing_status', 'availability_status', 'facing'
         ]
 
+    def _city_ids(self):
+        if not hasattr(self, '_resolved_city_ids'):
+            self._resolved_city_ids = match_city_ids(self.data.get('city'))
+        return self._resolved_city_ids
+
+    def filter_city(self, queryset, name, value):
+        return queryset.filter(city_ref__in=self._city_ids())
+
+    def filter_locality(self, queryset, name, value):
+        city_ids = self._city_ids() if self.data.get('city') else None
+        return queryset.filter(locality_ref__in=match_locality_ids(value, city_ids))
+
+    @staticmethod
+    def amenity_fields(value):
+        names = {name.strip().lower() for name in value.split(',')}
+        return [field for field in Property.AMENITY_FIELDS if field.split('_', 1)[1] in names]
+
+    def filter_amenities(self, queryset, name, value):
+        return queryset.filter(**dict.fromkeys(self.amenity_fields(value), True))
+
+class RankedOrderingFilter(filters.OrderingFilter):
+    """
+    OrderingFilter whose default (the view's rank_score ordering) also weighs
+    in text relevance for ?search= queries; an explicit ?ordering= wins.
+    """
+    def filter_queryset(self, request, queryset, view):
+        terms = filters.SearchFilter().get_search_terms(request)
+        ordering = self.get_ordering(request, queryset, view)
+        if terms and ordering == self.get_default_ordering(view):
+            return queryset.annotate(search_score=ranking.search_score(terms)).order_by('-search_score', '-created_at')
+        return super().filter_queryset(request, queryset, view)
+
 # --- MAIN VIEWSET ---
 
-class PropertyViewSet(viewsets.ModelViewSet):
+class PropertyViewSet(SparseFieldsetViewMixin, viewsets.ModelViewSet):
     queryset = Property.objects.all()
     serializer_class = PropertySerializer
     queryset = Property.objects.all()
@@ -63,10 +130,11 @@ class PropertyViewSet(viewsets.ModelViewSet):
     parser_classes = [MultiPartParser, FormParser] 
     
     # Filtering & Search Configuration
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, filters.SearchFilter, RankedOrderingFilter]
     filterset_class = PropertyFilter
     search_fields = ['title', 'project_name', 'address_line', 'locality', 'city', 'landmarks']
-    ordering_fields = ['total_price', 'created_at', 'super_builtup_area']
+    ordering_fields = ['total_price', 'created_at', 'super_builtup_area', 'rank_score']
+    ordering = ['-rank_score', '-created_at']
 
     def get_queryset(self):
         """
@@ -76,7 +144,7 @@ class PropertyViewSet(viewsets.ModelViewSet):
         3. Public: Verified Only.
         """
         user = self.request.user
-        base_query = Property.objects.all().prefetch_related('images').select_related('owner')
+        base_query = Property.objects.all().prefetch_related('images', 'floor_plans').select_related('owner')
 
         if user.is_staff:
             return base_query.order_by('-created_at')
@@ -89,6 +157,70 @@ class PropertyViewSet(viewsets.ModelViewSet):
             
         return base_query.filter(verification_status='VERIFIED').order_by('-created_at')
 
+    def _page_bounds(self):
+        """Optional ?limit=&offset= paging (the list is unpaginated without them)."""
+        try:
+            limit = self.request.query_params.get('limit')
+            limit = int(limit) if limit not in (None, '') else None
+            offset = int(self.request.query_params.get('offset') or 0)
+        except ValueError:
+            raise exceptions.ValidationError({"limit": "limit and offset must be integers."})
+        if (limit is not None and limit < 1) or offset < 0:
+            raise exceptions.ValidationError({"limit": "limit must be positive and offset non-negative."})
+        return offset, limit
+
+    def _indexed_page(self, offset, limit):
+        """
+        (page ids, total) from the in-memory listing index, or None when this
+        request needs the database: staff, owners with unverified listings of
+        their own (they see those too), text search, or unsupported filters.
+        """
+        request = self.request
+        user = request.user
+        if user.is_staff or request.query_params.get(api_settings.SEARCH_PARAM):
+            return None
+        if user.is_authenticated and Property.objects.filter(owner=user).exclude(verification_status='VERIFIED').exists():
+            return None
+        filterset = PropertyFilter(request.query_params, queryset=Property.objects.none(), request=request)
+        if not filterset.is_valid():
+            return None
+        terms = [term.strip() for term in request.query_params.get(api_settings.ORDERING_PARAM, '').split(',')]
+        ordering = [term for term in terms if term.lstrip('-') in self.ordering_fields] or self.ordering
+        return listing_index.search(filterset, ordering, offset, limit)
+
+    def list(self, request, *args, **kwargs):
+        offset, limit = self._page_bounds()
+        indexed = self._indexed_page(offset, limit)
+        if indexed is not None:
+            ids, total = indexed
+            data = self._serialize_rows(self.project_queryset(self.get_queryset().filter(pk__in=ids)), ids)
+        else:
+            queryset = self.filter_queryset(self.get_queryset())
+            if limit is None:
+                data = self._serialize_rows(queryset[offset:])
+                total = offset + len(data)
+            else:
+                data = self._serialize_rows(queryset[offset:offset + limit])
+                total = queryset.count()
+        response = Response(data)
+        response['X-Total-Count'] = total
+        return response
+
+    def _serialize_rows(self, queryset, pks=None):
+        """
+        Serialized rows of queryset (in pks order when given), built from values()
+        by fast_read when FAST_LIST_SERIALIZATION is on and it covers the fields.
+        """
+        if settings.FAST_LIST_SERIALIZATION:
+            data = fast_read.serialize(queryset, self.get_serializer(), pks)
+            if data is not None:
+                return data
+        rows = list(queryset)
+        if pks is not None:
+            by_pk = {prop.pk: prop for prop in rows}
+            rows = [by_pk[pk] for pk in pks if pk in by_pk]
+        return self.get_serializer(rows, many=True).data
+
     def _check_kyc_required(self, user):
         """
         Optimized KYC check using cached field - NO database queries!
@@ -106,6 +238,21 @@ class PropertyViewSet(viewsets.ModelViewSet):
         # Check cached KYC status (no DB query!)
         return not user.is_kyc_verified
     
+    def _floor_plan_uploads(self):
+        """Floor plans sent as multipart files ('floor_plans') or presigned keys ('floor_plans_key')."""
+        from .models import PropertyFloorPlan
+        uploads = list(self.request.FILES.getlist('floor_plans'))
+        image_field = PropertyFloorPlan._meta.get_field('image')
+        for key in self.request.data.getlist('floor_plans_key'):
+            if not claim_upload_key(key, image_field, self.request.user):
+                raise exceptions.ValidationError({"floor_plans_key": "Unknown or foreign upload key."})
+            uploads.append(key)
+        return uploads
+
+    @idempotent('property-create')
+    def create(self, request, *args, **kwargs):
+        return super().create(request, *args, **kwargs)
+
     def perform_create(self, serializer):
         user = self.request.user
         
@@ -123,9 +270,11 @@ class PropertyViewSet(viewsets.ModelViewSet):
         
         # Save with owner and initial pending status
         property_instance = serializer.save(owner=user, verification_status='PENDING')
+        # Worker fills in lat/lng from the address when the client didn't send them
+        schedule_geocoding(property_instance)
 
-        # Handle Floor Plan Uploads (Multipart)
-        floor_plans = self.request.FILES.getlist('floor_plans')
+        # Handle Floor Plan Uploads (Multipart files and/or direct-upload keys)
+        floor_plans = self._floor_plan_uploads()
         if floor_plans:
             from .models import PropertyFloorPlan
             for i, fp_file in enumerate(floor_plans):
@@ -165,7 +314,7 @@ class PropertyViewSet(viewsets.ModelViewSet):
 
         # 3. Handle New Floor Plan Uploads
         # Similar to create, but appending
-        floor_plans = self.request.FILES.getlist('floor_plans')
+        floor_plans = self._floor_plan_uploads()
         if floor_plans:
             from .models import PropertyFloorPlan
             # Get current max order to append correctly
@@ -182,6 +331,7 @@ class PropertyViewSet(viewsets.ModelViewSet):
     # --- IMAGE MANAGEMENT ---
 
     @action(detail=True, methods=['post'], url_path='upload_image')
+    @idempotent('property-upload-image')
     def upload_image(self, request, pk=None):
         """Allows uploading multiple images to the gallery"""
         property_obj = self.get_object()
@@ -264,8 +414,7 @@ class PropertyViewSet(viewsets.ModelViewSet):
     def my_listings(self, request):
         """Retrieve properties listed by the current user (Seller/Broker)"""
         listings = Property.objects.filter(owner=request.user).order_by('-created_at')
-        serializer = self.get_serializer(listings, many=True)
-        return Response(serializer.data)
+        return Response(self._serialize_rows(listings))
 
 
     
@@ -302,4 +451,15 @@ class PropertyViewSet(viewsets.ModelViewSet):
              self.perform_destroy(property_obj)
              return Response({"message": "Property deleted by authorized Broker."}, status=status.HTTP_204_NO_CONTENT)
 
-        return Response({"error": "Unauthorized: You do not have permission to delete this property."}, status=403)
\ No newline at end of file
+        return Response({"error": "Unauthorized: You do not have permission to delete this property."}, status=403)
+
+
+class HomeFeedView(APIView):
+    """
+    All homepage carousels in one response, from the materialized feed
+    (apps.properties.feed); only is_saved is computed per request.
+    """
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request):
+        return Response(feed.home_feed(request))
@@ -3,6 +3,7 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from .models import Property
 from .serializers import PropertySerializer
+from .jobs import schedule_geocoding
 
 class AdminPropertyViewSet(viewsets.ModelViewSet):
     """
@@ -14,10 +15,11 @@ class AdminPropertyViewSet(viewsets.ModelViewSet):
 
     def perform_create(self, serializer):
         # Admin-created listings are auto-verified and owned by the Platform
-        serializer.save(
+        property_instance = serializer.save(
             owner=self.request.user,
             verification_status='VERIFIED'
         )
+        schedule_geocoding(property_instance)
 
     @action(detail=True, methods=['post'])
     def approve(self, request, pk=None):
@@ -0,0 +1,154 @@
+"""
+Streaming parser for UIDAI offline / DigiLocker Aadhaar XML.
+
+The document is mostly a base64 photo (<Pht>) plus an XML signature; the
+identity itself is a handful of attributes on <Poi> and <Poa>. The parser feeds
+expat fixed-size chunks straight from the HTTP response, keeps every Poi/Poa
+attribute, decodes the photo incrementally into a spooled temp file and never
+buffers signature text, so memory stays flat however large the file is.
+"""
+import base64
+import binascii
+import logging
+from tempfile import SpooledTemporaryFile
+from xml.parsers import expat
+
+from django.core.files import File
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 64 * 1024
+PHOTO_SPOOL_SIZE = 256 * 1024  # photos larger than this spill to disk
+
+# Older callers only knew these address keys; always present (possibly empty)
+BASE_ADDRESS_KEYS = ('house', 'dist', 'state', 'pc')
+
+
+class AadhaarParseError(Exception):
+    pass
+
+
+class _Base64Writer:
+    """Decodes base64 text arriving in arbitrary pieces into a file."""
+
+    def __init__(self, fileobj):
+        self.fileobj = fileobj
+        self.pending = ''
+        self.size = 0
+
+    def write(self, text):
+        self.pending += ''.join(text.split())
+        usable = len(self.pending) - len(self.pending) % 4
+        if usable:
+            decoded = base64.b64decode(self.pending[:usable], validate=True)
+            self.fileobj.write(decoded)
+            self.size += len(decoded)
+            self.pending = self.pending[usable:]
+
+    def close(self):
+        if self.pending:
+            raise binascii.Error('Truncated base64 photo data')
+
+
+def _local_name(name):
+    return name.rsplit(':', 1)[-1]
+
+
+def _chunks(source):
+    if isinstance(source, str):
+        source = source.encode('utf-8')
+    if isinstance(source, bytes):
+        for start in range(0, len(source), CHUNK_SIZE):
+            yield source[start:start + CHUNK_SIZE]
+        return
+    while True:
+        chunk = source.read(CHUNK_SIZE)
+        if not chunk:
+            return
+        yield chunk
+
+
+def parse_aadhaar_xml(source):
+    """
+    Parses Aadhaar XML from bytes/str or a binary file-like object (e.g. a
+    streamed requests response's .raw). Returns
+
+        {'reference_id': ..., 'poi': {...}, 'poa': {...}, 'photo': File or None}
+
+    with every attribute of <Poi> and <Poa>. Raises AadhaarParseError.
+    """
+    result = {'reference_id': None, 'poi': None, 'poa': None, 'photo': None}
+    photo_file = SpooledTemporaryFile(max_size=PHOTO_SPOOL_SIZE)
+    state = {'photo': None, 'depth': 0}
+
+    def start(name, attrs):
+        state['depth'] += 1
+        tag = _local_name(name)
+        if state['depth'] == 1:
+            result['reference_id'] = attrs.get('referenceId')
+        if tag == 'Poi' and result['poi'] is None:
+            result['poi'] = dict(attrs)
+        elif tag == 'Poa' and result['poa'] is None:
+            result['poa'] = dict(attrs)
+        elif tag == 'Pht' and state['photo'] is None and photo_file.tell() == 0:
+            state['photo'] = _Base64Writer(photo_file)
+
+    def drop_photo(error):
+        # A damaged photo shouldn't cost us the identity data
+        logger.warning(f"Ignoring undecodable Aadhaar photo: {error}")
+        state['photo'] = None
+        photo_file.seek(0)
+        photo_file.truncate()
+
+    def end(name):
+        state['depth'] -= 1
+        if _local_name(name) == 'Pht' and state['photo'] is not None:
+            try:
+                state['photo'].close()
+            except binascii.Error as e:
+                return drop_photo(e)
+            if state['photo'].size:
+                photo_file.seek(0)
+                result['photo'] = File(photo_file, name='aadhaar_photo.jpg')
+            state['photo'] = None
+
+    def text(data):
+        # Only photo text is kept; everything else (signature, whitespace) is dropped
+        if state['photo'] is not None:
+            try:
+                state['photo'].write(data)
+            except binascii.Error as e:
+                drop_photo(e)
+
+    parser = expat.ParserCreate()
+    parser.StartElementHandler = start
+    parser.EndElementHandler = end
+    parser.CharacterDataHandler = text
+
+    try:
+        for chunk in _chunks(source):
+            parser.Parse(chunk, False)
+        parser.Parse(b'', True)
+    except expat.ExpatError as e:
+        photo_file.close()
+        raise AadhaarParseError(str(e))
+
+    if result['photo'] is None:
+        photo_file.close()
+    return result
+
+
+def to_aadhaar_data(parsed):
+    """Shapes a parse_aadhaar_xml() result like Sandbox's JSON aadhaar_data."""
+    poi = parsed['poi'] or {}
+    poa = parsed['poa'] or {}
+    address = {key: '' for key in BASE_ADDRESS_KEYS}
+    address.update(poa)
+    return {
+        'name': poi.get('name'),
+        'dob': poi.get('dob'),
+        'gender': poi.get('gender'),
+        'poi': poi,
+        'address': address,
+        'reference_id': parsed['reference_id'],
+    }
@@ -1,7 +1,30 @@
+import copy
+import hashlib
+import hmac
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import router
 from rest_framework.authentication import BaseAuthentication
 from rest_framework.exceptions import AuthenticationFailed
-from django.contrib.auth.hashers import check_password
-from .models import ExternalAPIKey
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+
+from apps.core.cache import TTLLRUCache, api_key_cache
+from .models import ExternalAPIKey, User
+
+# Per-process cache of keys whose secret has already been verified.
+# Keyed on an HMAC of the full key (the raw key is never held in memory as a
+# dict key); entries carry the 'api_keys' namespace version so a revocation in
+# any worker invalidates them everywhere on the next request.
+_verified_keys = TTLLRUCache(maxsize=1024, ttl=300)
+
+
+def _cache_key(api_key):
+    return hmac.new(settings.API_KEY_HASH_SECRET.encode(), api_key.encode(), hashlib.sha256).hexdigest()
+
 
 class APIKeyAuthentication(BaseAuthentication):
     """
@@ -11,40 +34,113 @@ class APIKeyAuthentication(BaseAuthentication):
     """
     def authenticate(self, request):
         api_key = request.headers.get('X-API-KEY')
-        
+
         if not api_key:
             return None  # No key, let other auth methods try (or fail permission)
-            
+
         # Parse Key Format: sPk_<prefix>.<secret>
         try:
             if not api_key.startswith('sPk_'):
                 raise ValueError("Invalid format")
-            
+
             parts = api_key.split('.')
             if len(parts) != 2:
                 raise ValueError("Invalid format")
-                
+
             prefix_part = parts[0][4:] # Remove 'sPk_'
             secret_part = parts[1]
-            
+
         except ValueError:
             raise AuthenticationFailed('Invalid API Key Format')
 
+        # Fast path: key verified recently and nothing revoked since
+        cache_key = _cache_key(api_key)
+        version = api_key_cache.version()
+        cached = _verified_keys.get(cache_key)
+        if cached is not None and cached[0] == version:
+            key_obj = copy.copy(cached[1])
+            return (copy.copy(key_obj.user), key_obj)
+
         try:
-            # Lookup by Prefix (Fast)
-            key_obj = ExternalAPIKey.objects.get(prefix=prefix_part)
+            # Lookup by Prefix (Fast), owner loaded in the same query
+            key_obj = ExternalAPIKey.objects.select_related('user').get(prefix=prefix_part)
         except ExternalAPIKey.DoesNotExist:
             raise AuthenticationFailed('Invalid API Key')
-            
+
         # Verify Secret Hash (Secure)
-        if not check_password(secret_part, key_obj.hashed_key):
+        if not key_obj.check_secret(secret_part):
              raise AuthenticationFailed('Invalid API Key')
-            
+
         if not key_obj.is_active:
             raise AuthenticationFailed('API Key is inactive')
-            
+
         if not key_obj.user.is_active:
             raise AuthenticationFailed('User account is inactive')
-            
-        return (key_obj.user, key_obj)  # request.user, request.auth
 
+        _verified_keys.set(cache_key, (version, key_obj))
+        return (copy.copy(key_obj.user), copy.copy(key_obj))  # request.user, request.auth
+
+
+# --- JWT users ---
+
+# Columns kept per user; enough for permission checks (is_staff, role_category,
+# is_kyc_verified, ...) and UserSerializer. Anything else (password, last_login)
+# is a deferred field and loads on first access.
+USER_SNAPSHOT_FIELDS = [
+    'id', 'email', 'username', 'first_name', 'last_name', 'phone_number',
+    'is_active', 'is_staff', 'is_superuser', 'is_active_seller', 'is_active_broker',
+    'is_kyc_verified', 'role_category', 'profile_picture', 'avatar_small', 'avatar_medium',
+]
+
+# from_db() expects values in model field order
+_SNAPSHOT_ATTNAMES = [f.attname for f in User._meta.concrete_fields if f.name in USER_SNAPSHOT_FIELDS]
+
+# Per-process snapshots, checked against a per-user version in the shared cache
+# that apps.users.signals bumps whenever the user row is saved or deleted.
+_user_snapshots = TTLLRUCache(maxsize=4096, ttl=60)
+
+USER_VERSION_TTL = 3600  # must outlive the snapshot TTL
+
+
+def _user_version_key(user_id):
+    return f"user-version:{user_id}"
+
+
+def invalidate_user_snapshot(user_id):
+    """Makes every worker reload the user on their next request."""
+    caches['default'].set(_user_version_key(user_id), time.time_ns(), USER_VERSION_TTL)
+    _user_snapshots.pop(str(user_id))
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    SimpleJWT authentication without a users-table query per request.
+    The user is rebuilt from a cached snapshot of USER_SNAPSHOT_FIELDS; the only
+    round trip is the per-user version read from the shared cache.
+    """
+
+    def get_user(self, validated_token):
+        if jwt_settings.CHECK_REVOKE_TOKEN:
+            # Needs the password hash on every request; not worth caching
+            return super().get_user(validated_token)
+
+        try:
+            user_id = str(validated_token[jwt_settings.USER_ID_CLAIM])
+        except KeyError:
+            raise InvalidToken("Token contained no recognizable user identification")
+
+        version = caches['default'].get(_user_version_key(user_id))
+        cached = _user_snapshots.get(user_id)
+        if cached is not None and cached[0] == version:
+            user = User.from_db(router.db_for_read(User), _SNAPSHOT_ATTNAMES, cached[1])
+        else:
+            try:
+                user = User.objects.only(*USER_SNAPSHOT_FIELDS).get(**{jwt_settings.USER_ID_FIELD: user_id})
+            except User.DoesNotExist:
+                raise AuthenticationFailed("User not found", code="user_not_found")
+            values = tuple(getattr(user, attname) for attname in _SNAPSHOT_ATTNAMES)
+            _user_snapshots.set(user_id, (version, values))
+
+        if not user.is_active:
+            raise AuthenticationFailed("User is inactive", code="user_inactive")
+        return user
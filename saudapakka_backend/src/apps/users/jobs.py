@@ -0,0 +1,216 @@
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+
+from apps.core.images import UNREADABLE_IMAGE_ERRORS, render_variants
+from apps.core.mail import send_pooled
+from apps.jobs.registry import task
+
+from . import kyc as kyc_service
+from . import otp as otp_service
+from . import usage
+from .models import KYCVerification
+
+User = get_user_model()
+logger = logging.getLogger(__name__)
+
+KYC_PREVIEW_PX = 1600
+PROFILE_PICTURE_PX = 1024
+AVATAR_VARIANTS = {'avatar_medium': 256, 'avatar_small': 96}
+
+# Uploaded original -> its normalised copy on KYCVerification
+KYC_PREVIEW_FIELDS = {
+    'aadhaar_front_image': 'aadhaar_front_preview',
+    'aadhaar_back_image': 'aadhaar_back_preview',
+    'selfie_image': 'selfie_preview',
+}
+
+_sandbox = None
+
+
+def get_sandbox():
+    # One pooled client per worker process, created on first use
+    global _sandbox
+    if _sandbox is None:
+        from .services import SandboxClient
+        _sandbox = SandboxClient()
+    return _sandbox
+
+
+def _otp_email_failed(delivery_id, email):
+    otp_service.discard_for_delivery(delivery_id)
+    otp_service.set_delivery_status(delivery_id, otp_service.FAILED)
+
+
+# OTPs expire after 5 minutes, so retries stop well before that
+@task(queue='email', priority=10, max_attempts=4, on_dead_letter=_otp_email_failed)
+def send_otp_email(delivery_id, email):
+    """
+    Sends a login OTP over the worker's persistent SMTP connection. The code is
+    picked up from the OTP store by delivery id, so job rows never contain it.
+    """
+    otp = otp_service.code_for_delivery(delivery_id)
+    if otp is None:
+        logger.warning(f"OTP email dropped (delivery {delivery_id}): code expired before it was sent")
+        otp_service.set_delivery_status(delivery_id, otp_service.FAILED)
+        return
+    try:
+        send_pooled([otp_service.build_otp_email(email, otp)])
+    except Exception as e:
+        logger.warning(f"OTP email send failed (delivery {delivery_id}): {e}")
+        otp_service.set_delivery_status(delivery_id, otp_service.RETRYING)
+        raise
+    otp_service.discard_for_delivery(delivery_id)
+    otp_service.set_delivery_status(delivery_id, otp_service.SENT)
+
+
+@task(queue='default', priority=5, max_attempts=3)
+def poll_kyc_session(kyc_id, request_id, deadline, attempt=0, reschedule=True):
+    """
+    Asks Sandbox whether the DigiLocker session has produced the Aadhaar
+    document yet; if not, schedules the next poll with exponential backoff
+    until `deadline` (epoch seconds), then gives up and marks the KYC failed.
+    """
+    pending = kyc_service.KYCVerification.objects.filter(pk=kyc_id, request_id=request_id, status='INITIATED')
+    if not pending.exists():
+        return  # Superseded by a new session or already settled
+
+    result = get_sandbox().get_kyc_status(request_id)
+    code = result.get('code')
+    data = result.get('data', {}) if code == 200 else {}
+    aadhaar = data.get('aadhaar_data', {})
+    photo = data.get('photo')
+
+    if aadhaar.get('name'):
+        try:
+            if kyc_service.mark_verified(kyc_id, request_id, aadhaar, photo):
+                logger.info(f"KYC {kyc_id} verified via DigiLocker")
+        finally:
+            if photo is not None:
+                photo.close()
+        return
+
+    if code != 200 and code not in kyc_service.TRANSIENT_CODES:
+        logger.warning(f"KYC {kyc_id} failed: {result}")
+        kyc_service.mark_failed(kyc_id, request_id)
+        return
+
+    if not reschedule:
+        return
+    if time.time() >= deadline:
+        logger.info(f"KYC {kyc_id} still pending at deadline, giving up")
+        kyc_service.mark_failed(kyc_id, request_id)
+        return
+    poll_kyc_session.enqueue_at(
+        timezone.now() + timedelta(seconds=kyc_service.next_poll_delay(attempt + 1)),
+        kyc_id, request_id, deadline, attempt + 1,
+    )
+
+
+# --- Upload normalisation ---
+
+def _avatar_variants(variants):
+    for name, px in AVATAR_VARIANTS.items():
+        variants[name] = (px, True, User._meta.get_field(name))
+    return variants
+
+
+def _render_to_storage(source_field, source_name, variants):
+    """
+    Decodes `source_name` from source_field's storage once and saves each
+    variant (name -> (max_px, square, model field)) to that field's storage,
+    next to its upload_to. Storage I/O and Pillow only (no ORM), so it is safe
+    to run in a thread.
+    """
+    with source_field.storage.open(source_name, 'rb') as source:
+        rendered = render_variants(source, {name: spec[:2] for name, spec in variants.items()})
+    stem = os.path.splitext(os.path.basename(source_name))[0]
+    saved = {}
+    for name, content in rendered.items():
+        field = variants[name][2]
+        saved[name] = field.storage.save(field.generate_filename(None, f"{stem}_{name}.jpg"), content)
+    return saved
+
+
+def _set_profile_picture(user_id, expected_name, stored):
+    """Points the user at the normalised picture and avatars, unless they changed it meanwhile."""
+    user = User.objects.filter(pk=user_id).first()
+    if user is None or user.profile_picture.name != expected_name:
+        return False
+    user.profile_picture.name = stored['profile_picture']
+    for name in AVATAR_VARIANTS:
+        getattr(user, name).name = stored[name]
+    user.save(update_fields=['profile_picture', *AVATAR_VARIANTS])
+    return True
+
+
+@task(queue='default', max_attempts=3)
+def process_kyc_images(kyc_id):
+    """
+    Normalises the Aadhaar front/back and selfie uploads in parallel: EXIF
+    stripped, downscaled, re-encoded as JPEG into the *_preview fields. The
+    originals are left untouched for admin review. A public copy of the selfie
+    preview also becomes the user's profile picture, with avatar thumbnails
+    for owner cards (the KYC files themselves stay on private storage).
+    """
+    kyc = KYCVerification.objects.filter(pk=kyc_id).first()
+    if kyc is None:
+        return
+    originals = {field: getattr(kyc, field).name for field in KYC_PREVIEW_FIELDS if getattr(kyc, field)}
+    profile_picture = User.objects.filter(pk=kyc.user_id).values_list('profile_picture', flat=True).first()
+
+    def variants_for(field):
+        preview_field = KYCVerification._meta.get_field(KYC_PREVIEW_FIELDS[field])
+        if field == 'selfie_image':
+            return _avatar_variants({
+                'preview': (PROFILE_PICTURE_PX, False, preview_field),
+                'profile_picture': (PROFILE_PICTURE_PX, False, User._meta.get_field('profile_picture')),
+            })
+        return {'preview': (KYC_PREVIEW_PX, False, preview_field)}
+
+    results = {}
+    with ThreadPoolExecutor(max_workers=max(len(originals), 1)) as pool:
+        futures = {
+            field: pool.submit(_render_to_storage, KYCVerification._meta.get_field(field), name, variants_for(field))
+            for field, name in originals.items()
+        }
+        for field, future in futures.items():
+            try:
+                results[field] = future.result()
+            except UNREADABLE_IMAGE_ERRORS as e:  # Not an image Pillow can (safely) read; keep the original only
+                logger.warning(f"KYC {kyc_id}: could not process {field}: {e}")
+
+    if not results:
+        return
+    # Only if the user hasn't re-uploaded while we were working
+    updated = KYCVerification.objects.filter(pk=kyc_id, **originals).update(
+        **{KYC_PREVIEW_FIELDS[field]: stored['preview'] for field, stored in results.items()}
+    )
+    if updated and 'selfie_image' in results:
+        _set_profile_picture(kyc.user_id, profile_picture, results['selfie_image'])
+
+
+@task(queue='default', max_attempts=3)
+def process_profile_picture(user_id, source_name):
+    """Normalises a directly uploaded profile picture and renders its avatars."""
+    profile_field = User._meta.get_field('profile_picture')
+    variants = _avatar_variants({'profile_picture': (PROFILE_PICTURE_PX, False, profile_field)})
+    try:
+        stored = _render_to_storage(profile_field, source_name, variants)
+    except UNREADABLE_IMAGE_ERRORS as e:
+        logger.warning(f"User {user_id}: could not process profile picture: {e}")
+        return
+    _set_profile_picture(user_id, source_name, stored)
+
+
+@task(queue='default', max_attempts=1, every=usage.DB_FLUSH_INTERVAL)
+def flush_api_usage():
+    """Moves the shared API key usage counters into APIKeyUsage rows."""
+    result = usage.flush()
+    if result is not None:
+        logger.info(f"API usage flushed: {result[0]} key-days, last-used for {result[1]} keys")
@@ -0,0 +1,136 @@
+"""
+DigiLocker KYC: background polling of Sandbox sessions.
+
+InitiateKYCView stores the Sandbox session id on KYCVerification.request_id
+and schedules poll_kyc_session (apps.users.jobs). The job asks Sandbox for the
+Aadhaar document, backing off exponentially while the user is still inside
+DigiLocker, and writes the outcome to KYCVerification. Request workers never
+call Sandbox for status: /api/kyc/verify-status/ only reads the row, and with
+?wait=<seconds> it long-polls a per-user version key in the shared cache that
+the job bumps whenever the status changes.
+"""
+import random
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import transaction
+from django.utils import timezone
+
+from .models import KYCVerification
+
+User = get_user_model()
+
+# Outcomes of SandboxClient.get_kyc_status() worth asking again about
+TRANSIENT_CODES = {202, 429, 500, 503}
+
+NUDGE_INTERVAL = 10  # at most one extra "poll now" per KYC session this often
+
+
+def _version_key(user_id):
+    return f"kyc-status-version:{user_id}"
+
+
+def status_version(user_id):
+    return caches['default'].get(_version_key(user_id), 0)
+
+
+def bump_status_version(user_id):
+    cache = caches['default']
+    key = _version_key(user_id)
+    if not cache.add(key, 1, timeout=settings.KYC_POLL_TIMEOUT * 2):
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, timeout=settings.KYC_POLL_TIMEOUT * 2)
+
+
+def next_poll_delay(attempt):
+    """Exponential backoff with jitter: ~initial, 2x, 4x ... capped at KYC_POLL_MAX_DELAY."""
+    base = min(settings.KYC_POLL_MAX_DELAY, settings.KYC_POLL_INITIAL_DELAY * 2 ** attempt)
+    return base / 2 + random.uniform(0, base / 2)
+
+
+def poll_deadline():
+    return time.time() + settings.KYC_POLL_TIMEOUT
+
+
+def schedule_poll(kyc, delay=None):
+    from .jobs import poll_kyc_session
+
+    delay = settings.KYC_POLL_INITIAL_DELAY if delay is None else delay
+    poll_kyc_session.enqueue_at(
+        timezone.now() + timedelta(seconds=delay),
+        kyc.pk, kyc.request_id, poll_deadline(),
+    )
+
+
+def nudge_poll(kyc_id, request_id):
+    """
+    Polls right away (once per NUDGE_INTERVAL), e.g. when the client is back
+    from DigiLocker and waiting, instead of sitting out the current backoff.
+    """
+    from .jobs import poll_kyc_session
+
+    if caches['default'].add(f"kyc-nudge:{kyc_id}", 1, NUDGE_INTERVAL):
+        poll_kyc_session.enqueue(kyc_id, request_id, poll_deadline(), reschedule=False)
+
+
+def _update_session(kyc_id, request_id, apply):
+    """Runs apply(kyc) on the row if it is still this session and still pending."""
+    with transaction.atomic():
+        kyc = KYCVerification.objects.select_for_update().filter(pk=kyc_id).first()
+        if kyc is None or kyc.request_id != request_id or kyc.status != 'INITIATED':
+            return None
+        apply(kyc)
+    transaction.on_commit(lambda: bump_status_version(kyc.user_id))
+    return kyc
+
+
+def mark_verified(kyc_id, request_id, aadhaar, photo=None):
+    def apply(kyc):
+        kyc.full_name = aadhaar.get('name')
+        kyc.dob = aadhaar.get('dob')
+        kyc.address_json = aadhaar.get('address')
+        kyc.verified_by = 'DIGILOCKER'
+        kyc.status = 'VERIFIED'
+        if photo is not None:
+            kyc.aadhaar_photo.save(f"{kyc.user_id}.jpg", photo, save=False)
+        kyc.save()
+
+        # Update User profile AND cached KYC status
+        user = User.objects.get(pk=kyc.user_id)
+        user.first_name = kyc.full_name.split(' ')[0]
+        user.is_kyc_verified = True
+        user.save()
+
+    return _update_session(kyc_id, request_id, apply)
+
+
+def mark_failed(kyc_id, request_id):
+    def apply(kyc):
+        kyc.status = 'FAILED'
+        kyc.save(update_fields=['status', 'verified_at'])
+
+    return _update_session(kyc_id, request_id, apply)
+
+
+def get_status_row(user):
+    return (
+        KYCVerification.objects.filter(user=user)
+        .values('pk', 'status', 'full_name', 'request_id')
+        .first()
+    )
+
+
+def status_payload(kyc):
+    """(body, http_status) for the client, from a get_status_row() row."""
+    if kyc is None:
+        return {"status": "NOT_STARTED"}, 404
+    if kyc['status'] == 'VERIFIED':
+        return {"status": "SUCCESS", "data": {"name": kyc['full_name']}}, 200
+    if kyc['status'] == 'FAILED':
+        return {"status": "FAILED"}, 400
+    return {"status": "PROCESSING"}, 202
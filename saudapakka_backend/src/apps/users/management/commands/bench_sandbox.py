@@ -0,0 +1,68 @@
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+from apps.users.services import SandboxClient
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class Command(BaseCommand):
+    help = (
+        'Measures SandboxClient latency for a full KYC round (init + status polls) '
+        'against --base-url (e.g. a local "manage.py sandbox_stub").'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--base-url', default='http://127.0.0.1:8765')
+        parser.add_argument('--requests', type=int, default=200, help='Number of KYC rounds.')
+        parser.add_argument('--concurrency', type=int, default=10)
+        parser.add_argument('--max-polls', type=int, default=10)
+
+    def handle(self, *args, **options):
+        client = SandboxClient(base_url=options['base_url'])
+        timings = {'init': [], 'status': [], 'round': []}
+        outcomes = {}
+
+        def kyc_round(_):
+            started = time.perf_counter()
+            t = time.perf_counter()
+            result = client.initiate_digilocker('http://localhost/kyc/callback')
+            timings['init'].append(time.perf_counter() - t)
+            if result.get('code') != 200:
+                return f"init:{result.get('code')}"
+            entity_id = result['data']['entity_id']
+            for _ in range(options['max_polls']):
+                t = time.perf_counter()
+                status = client.get_kyc_status(entity_id)
+                timings['status'].append(time.perf_counter() - t)
+                if status.get('code') != 202:
+                    timings['round'].append(time.perf_counter() - started)
+                    return f"status:{status.get('code')}"
+            return 'status:timeout'
+
+        wall = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as pool:
+            for outcome in pool.map(kyc_round, range(options['requests'])):
+                outcomes[outcome] = outcomes.get(outcome, 0) + 1
+        wall = time.perf_counter() - wall
+
+        self.stdout.write(f"{options['requests']} rounds in {wall:.2f}s "
+                          f"({options['requests'] / wall:.1f} rounds/s), breaker: {client.breaker.state}")
+        self.stdout.write(f"Outcomes: {outcomes}")
+        for name, values in timings.items():
+            if not values:
+                continue
+            self.stdout.write(
+                f"{name:>7}: n={len(values):<5} mean={statistics.mean(values) * 1000:7.1f}ms "
+                f"p50={percentile(values, 50) * 1000:7.1f}ms p95={percentile(values, 95) * 1000:7.1f}ms "
+                f"p99={percentile(values, 99) * 1000:7.1f}ms"
+            )
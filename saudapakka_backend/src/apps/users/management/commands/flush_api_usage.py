@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from apps.users import usage
+
+
+class Command(BaseCommand):
+    help = (
+        'Moves API key usage counters from the shared cache into APIKeyUsage. '
+        'The job worker runs this every minute (apps.users.jobs.flush_api_usage).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=3, help='How many recent days of counters to collect.')
+
+    def handle(self, *args, **options):
+        result = usage.flush(days=options['days'])
+        if result is None:
+            self.stdout.write(self.style.WARNING('Another flush is running; nothing done.'))
+            return
+        key_days, keys = result
+        self.stdout.write(self.style.SUCCESS(f'Flushed usage for {key_days} key-days, last-used for {keys} keys.'))
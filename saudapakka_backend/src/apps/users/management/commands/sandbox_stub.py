@@ -0,0 +1,143 @@
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.core.management.base import BaseCommand
+
+SAMPLE_AADHAAR_XML = """<?xml version="1.0" encoding="UTF-8"?>
+<OfflinePaperlessKyc referenceId="123420181031120000000">
+  <UidData>
+    <Poi name="Test Kumar" dob="01-01-1990" gender="M"/>
+    <Poa careof="S/O Test" house="12" street="MG Road" loc="Shivaji Nagar" vtc="Pune"
+         dist="Pune" state="Maharashtra" pc="411005" country="India"/>
+    <Pht>/9j/4AAQSkZJRgABAQAAAQABAAD/2wBDAAgGBgcGBQgHBwcJCQgKDBQNDAsLDBkSEw8UHRofHh0aHBwgJC4nICIsIxwcKDcpLDAxNDQ0Hyc5PTgyPC4zNDL/wAALCAABAAEBAREA/8QAFAABAAAAAAAAAAAAAAAAAAAACf/EABQQAQAAAAAAAAAAAAAAAAAAAAD/2gAIAQEAAD8AKp//2Q==</Pht>
+  </UidData>
+</OfflinePaperlessKyc>
+"""
+
+
+class StubState:
+    def __init__(self, polls_until_ready, latency, jitter, fail_rate):
+        self.polls_until_ready = polls_until_ready
+        self.latency = latency
+        self.jitter = jitter
+        self.fail_rate = fail_rate
+        self.polls = {}
+        self.tokens = set()
+        self.requests = []  # (method, path), for tests
+        self.lock = threading.Lock()
+
+
+def make_handler(state):
+    class SandboxStubHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'  # keep-alive, like the real API
+        disable_nagle_algorithm = True
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send(self, status, body, content_type='application/json'):
+            payload = body if isinstance(body, bytes) else json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def _authorized(self):
+            return self.headers.get('Authorization') in state.tokens
+
+        def _simulate(self):
+            with state.lock:
+                state.requests.append((self.command, self.path))
+            time.sleep(max(0.0, state.latency + random.uniform(-state.jitter, state.jitter)))
+            if random.random() < state.fail_rate:
+                self._send(503, {'message': 'Simulated outage'})
+                return False
+            return True
+
+        def _drain_body(self):
+            length = int(self.headers.get('Content-Length') or 0)
+            if length:
+                self.rfile.read(length)
+
+        def do_POST(self):
+            self._drain_body()
+            if not self._simulate():
+                return
+            if self.path == '/authenticate':
+                token = f"stub-{uuid.uuid4().hex}"
+                with state.lock:
+                    state.tokens.add(token)
+                return self._send(200, {'data': {'access_token': token}})
+            if self.path == '/kyc/digilocker/sessions/init':
+                if not self._authorized():
+                    return self._send(401, {'message': 'Unauthorized'})
+                session_id = uuid.uuid4().hex
+                return self._send(200, {'data': {
+                    'session_id': session_id,
+                    'authorization_url': f"http://{self.headers.get('Host')}/digilocker/{session_id}",
+                }})
+            self._send(404, {'message': 'Not found'})
+
+        def do_GET(self):
+            if not self._simulate():
+                return
+            match = re.fullmatch(r'/kyc/digilocker/sessions/([\w-]+)/documents/aadhaar', self.path)
+            if match:
+                if not self._authorized():
+                    return self._send(401, {'message': 'Unauthorized'})
+                session_id = match.group(1)
+                with state.lock:
+                    state.polls[session_id] = state.polls.get(session_id, 0) + 1
+                    ready = state.polls[session_id] > state.polls_until_ready
+                if not ready:
+                    return self._send(200, {'data': {'status': 'pending'}})
+                return self._send(200, {'data': {'files': [
+                    {'url': f"http://{self.headers.get('Host')}/files/{session_id}.xml"}
+                ]}})
+            if re.fullmatch(r'/files/[\w-]+\.xml', self.path):
+                return self._send(200, SAMPLE_AADHAAR_XML.encode(), 'application/xml')
+            self._send(404, {'message': 'Not found'})
+
+    return SandboxStubHandler
+
+
+class Command(BaseCommand):
+    help = (
+        'Runs a local stand-in for the Sandbox KYC API (set SANDBOX_BASE_URL=http://127.0.0.1:<port>). '
+        'Tokens it did not issue get 401; sessions report "pending" for --polls-until-ready polls, '
+        'then serve a sample Aadhaar XML.'
+    )
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument('--latency-ms', type=float, default=50, help='Mean response delay.')
+        parser.add_argument('--jitter-ms', type=float, default=20)
+        parser.add_argument('--fail-rate', type=float, default=0.0, help='Fraction of requests answered with 503.')
+        parser.add_argument('--polls-until-ready', type=int, default=2)
+
+    def handle(self, *args, **options):
+        state = StubState(
+            polls_until_ready=options['polls_until_ready'],
+            latency=options['latency_ms'] / 1000,
+            jitter=options['jitter_ms'] / 1000,
+            fail_rate=options['fail_rate'],
+        )
+        server = ThreadingHTTPServer((options['host'], options['port']), make_handler(state))
+        server.daemon_threads = True
+        self.stdout.write(self.style.SUCCESS(
+            f"Sandbox stub listening on http://{options['host']}:{options['port']}"
+        ))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
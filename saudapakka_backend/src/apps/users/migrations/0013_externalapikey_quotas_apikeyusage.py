@@ -0,0 +1,44 @@
+# Generated by Django 5.0.2 on 2026-10-19 05:13
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0012_alter_externalapikey_hashed_key_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='externalapikey',
+            name='burst_limit',
+            field=models.PositiveIntegerField(default=20, help_text='Max requests allowed in a burst'),
+        ),
+        migrations.AddField(
+            model_name='externalapikey',
+            name='last_used_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='externalapikey',
+            name='rate_limit_per_minute',
+            field=models.PositiveIntegerField(default=60, help_text='Sustained requests per minute'),
+        ),
+        migrations.CreateModel(
+            name='APIKeyUsage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('requests', models.PositiveIntegerField(default=0)),
+                ('listings_created', models.PositiveIntegerField(default=0)),
+                ('bytes_uploaded', models.BigIntegerField(default=0)),
+                ('api_key', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='usage', to='users.externalapikey')),
+            ],
+            options={
+                'ordering': ['-date'],
+                'unique_together': {('api_key', 'date')},
+            },
+        ),
+    ]
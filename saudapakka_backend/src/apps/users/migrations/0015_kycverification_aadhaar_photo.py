@@ -0,0 +1,18 @@
+# Generated by Django 5.0.2 on 2026-10-19 05:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0014_remove_user_otp_fields'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='kycverification',
+            name='aadhaar_photo',
+            field=models.ImageField(blank=True, null=True, upload_to='kyc/aadhaar_photos/'),
+        ),
+    ]
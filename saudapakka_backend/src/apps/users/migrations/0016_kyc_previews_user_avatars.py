@@ -0,0 +1,38 @@
+# Generated by Django 5.0.2 on 2026-10-19 05:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0015_kycverification_aadhaar_photo'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='kycverification',
+            name='aadhaar_back_preview',
+            field=models.ImageField(blank=True, null=True, upload_to='kyc/previews/'),
+        ),
+        migrations.AddField(
+            model_name='kycverification',
+            name='aadhaar_front_preview',
+            field=models.ImageField(blank=True, null=True, upload_to='kyc/previews/'),
+        ),
+        migrations.AddField(
+            model_name='kycverification',
+            name='selfie_preview',
+            field=models.ImageField(blank=True, null=True, upload_to='kyc/previews/'),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='avatar_medium',
+            field=models.ImageField(blank=True, null=True, upload_to='profile_pictures/avatars/'),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='avatar_small',
+            field=models.ImageField(blank=True, null=True, upload_to='profile_pictures/avatars/'),
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.0.2 on 2026-10-19 06:41
+
+import apps.core.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0016_kyc_previews_user_avatars'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='kycverification',
+            name='aadhaar_back_image',
+            field=models.ImageField(blank=True, null=True, storage=apps.core.storage.private_storage, upload_to='kyc/aadhaar/'),
+        ),
+        migrations.AlterField(
+            model_name='kycverification',
+            name='aadhaar_back_preview',
+            field=models.ImageField(blank=True, null=True, storage=apps.core.storage.private_storage, upload_to='kyc/previews/'),
+        ),
+        migrations.AlterField(
+            model_name='kycverification',
+            name='aadhaar_front_image',
+            field=models.ImageField(blank=True, null=True, storage=apps.core.storage.private_storage, upload_to='kyc/aadhaar/'),
+        ),
+        migrations.AlterField(
+            model_name='kycverification',
+            name='aadhaar_front_preview',
+            field=models.ImageField(blank=True, null=True, storage=apps.core.storage.private_storage, upload_to='kyc/previews/'),
+        ),
+        migrations.AlterField(
+            model_name='kycverification',
+            name='aadhaar_photo',
+            field=models.ImageField(blank=True, null=True, storage=apps.core.storage.private_storage, upload_to='kyc/aadhaar_photos/'),
+        ),
+        migrations.AlterField(
+            model_name='kycverification',
+            name='selfie_image',
+            field=models.ImageField(blank=True, null=True, storage=apps.core.storage.private_storage, upload_to='kyc/selfies/'),
+        ),
+        migrations.AlterField(
+            model_name='kycverification',
+            name='selfie_preview',
+            field=models.ImageField(blank=True, null=True, storage=apps.core.storage.private_storage, upload_to='kyc/previews/'),
+        ),
+    ]
@@ -2,6 +2,8 @@ import uuid
 from django.contrib.auth.models import AbstractUser
 from django.db import models
 
+from apps.core.storage import private_storage
+
 class User(AbstractUser):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     
@@ -20,6 +22,9 @@ class User(AbstractUser):
     
     # Profile Picture (set from KYC selfie)
     profile_picture = models.ImageField(upload_to='profile_pictures/', blank=True, null=True)
+    # Square JPEG thumbnails of profile_picture for owner cards (apps.users.jobs)
+    avatar_small = models.ImageField(upload_to='profile_pictures/avatars/', blank=True, null=True)
+    avatar_medium = models.ImageField(upload_to='profile_pictures/avatars/', blank=True, null=True)
     
     ROLE_CHOICES = [
         ('BUYER', 'Buyer'),
@@ -29,10 +34,6 @@ class User(AbstractUser):
         ('PLOTTING_AGENCY', 'Plotting Company/Agency'),
     ]
     role_category = models.CharField(max_length=20, choices=ROLE_CHOICES, default='BUYER')
-     
-    # OTP Fields
-    otp = models.CharField(max_length=6, blank=True, null=True)
-    otp_created_at = models.DateTimeField(blank=True, null=True)
 
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['username', 'first_name', 'last_name', 'phone_number']
@@ -60,9 +61,15 @@ class KYCVerification(models.Model):
     address_json = models.JSONField(null=True, blank=True)
     
     # Aadhaar Upload fields (NEW)
-    aadhaar_front_image = models.ImageField(upload_to='kyc/aadhaar/', blank=True, null=True)
-    aadhaar_back_image = models.ImageField(upload_to='kyc/aadhaar/', blank=True, null=True)
-    selfie_image = models.ImageField(upload_to='kyc/selfies/', blank=True, null=True)
+    aadhaar_front_image = models.ImageField(upload_to='kyc/aadhaar/', storage=private_storage, blank=True, null=True)
+    aadhaar_back_image = models.ImageField(upload_to='kyc/aadhaar/', storage=private_storage, blank=True, null=True)
+    selfie_image = models.ImageField(upload_to='kyc/selfies/', storage=private_storage, blank=True, null=True)
+    # Downscaled, EXIF-free copies of the uploads above (originals kept for admin review)
+    aadhaar_front_preview = models.ImageField(upload_to='kyc/previews/', storage=private_storage, blank=True, null=True)
+    aadhaar_back_preview = models.ImageField(upload_to='kyc/previews/', storage=private_storage, blank=True, null=True)
+    selfie_preview = models.ImageField(upload_to='kyc/previews/', storage=private_storage, blank=True, null=True)
+    # Photo embedded in the DigiLocker Aadhaar XML (<Pht>)
+    aadhaar_photo = models.ImageField(upload_to='kyc/aadhaar_photos/', storage=private_storage, blank=True, null=True)
 
     # User's requested role for upgrade
     ROLE_CHOICES = [
@@ -98,9 +105,23 @@ class BrokerProfile(models.Model):
     experience_years = models.IntegerField(default=0)
     is_verified = models.BooleanField(default=False)
 
-from django.contrib.auth.hashers import make_password
+from django.contrib.auth.hashers import check_password
+from django.conf import settings
+import hashlib
+import hmac
 import secrets
 
+API_KEY_HASH_PREFIX = 'hmac_sha256$'
+
+def hash_api_secret(secret):
+    """
+    Keyed hash for API key secrets.
+    The secrets are 128-bit random tokens, so a slow password hasher adds
+    nothing but CPU; an HMAC under a server-side key is enough.
+    """
+    digest = hmac.new(settings.API_KEY_HASH_SECRET.encode(), secret.encode(), hashlib.sha256).hexdigest()
+    return f"{API_KEY_HASH_PREFIX}{digest}"
+
 class ExternalAPIKey(models.Model):
     """
     API Keys for external automation (e.g., WhatsApp bots).
@@ -115,6 +136,13 @@ class ExternalAPIKey(models.Model):
     
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
+
+    # Quotas (token bucket: refills rate_limit_per_minute tokens/min, holds up to burst_limit)
+    rate_limit_per_minute = models.PositiveIntegerField(default=60, help_text="Sustained requests per minute")
+    burst_limit = models.PositiveIntegerField(default=20, help_text="Max requests allowed in a burst")
+
+    # Written in batches by apps.users.usage.flush (a periodic job), never on the request path
+    last_used_at = models.DateTimeField(null=True, blank=True)
     
     def save(self, *args, **kwargs):
         if not self.pk:
@@ -125,13 +153,28 @@ class ExternalAPIKey(models.Model):
             secret = secrets.token_hex(16)
             
             # 3. Store Hash
-            self.hashed_key = make_password(secret)
+            self.hashed_key = hash_api_secret(secret)
             
             # 4. Attach raw key to instance (TEMPORARY) for Admin to show ONCE
             self._raw_key = f"sPk_{self.prefix}.{secret}"
             
         super().save(*args, **kwargs)
         
+    def check_secret(self, secret):
+        """
+        Verifies the secret part of 'sPk_<prefix>.<secret>'.
+        Keys created before the HMAC scheme still hold a PBKDF2 hash; those are
+        verified the slow way once and rehashed in place.
+        """
+        if self.hashed_key.startswith(API_KEY_HASH_PREFIX):
+            return hmac.compare_digest(self.hashed_key, hash_api_secret(secret))
+
+        if check_password(secret, self.hashed_key):
+            self.hashed_key = hash_api_secret(secret)
+            self.save(update_fields=['hashed_key'])
+            return True
+        return False
+
     def __str__(self):
         return f"{self.name} ({self.prefix}...)"
 
@@ -147,3 +190,19 @@ class ExternalAPIKey(models.Model):
 
     def __str__(self):
         return f"{self.name} ({self.user.email})"
+
+
+class APIKeyUsage(models.Model):
+    """Daily usage counters per API key (flushed from the shared cache in batches)."""
+    api_key = models.ForeignKey(ExternalAPIKey, on_delete=models.CASCADE, related_name='usage')
+    date = models.DateField()
+    requests = models.PositiveIntegerField(default=0)
+    listings_created = models.PositiveIntegerField(default=0)
+    bytes_uploaded = models.BigIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('api_key', 'date')
+        ordering = ['-date']
+
+    def __str__(self):
+        return f"{self.api_key.name} @ {self.date}: {self.requests} requests"
@@ -0,0 +1,159 @@
+"""
+Login OTPs: storage and email delivery.
+
+Codes live in the shared cache, never on the User row: a keyed hash of the
+code, an attempt counter and a 5-minute expiry per email. Verification is
+check-and-consume under a short lock, so a code works exactly once even if
+the same request hits two workers.
+
+SendOtpView enqueues the email on the 'email' queue and answers immediately;
+a worker claims queued OTP jobs in batches and sends each over its pooled
+SMTP connection (apps.core.mail), one message per job. The job only
+carries an opaque delivery id: the code itself waits in the cache for the
+worker (hold_for_delivery / code_for_delivery) and never reaches the jobs or
+dead-letter tables. Delivery progress is kept under the same id, which the
+client can poll at /api/auth/otp-status/<delivery_id>/.
+"""
+import hashlib
+import hmac
+import secrets
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.mail import EmailMultiAlternatives
+from django.utils import timezone
+from django.utils.html import strip_tags
+
+OTP_TTL = 5 * 60
+OTP_MAX_ATTEMPTS = 5
+OTP_LOCK_TIMEOUT = 5
+
+# verify_otp() results
+VALID, INVALID, EXPIRED, TOO_MANY_ATTEMPTS = 'valid', 'invalid', 'expired', 'too_many_attempts'
+BUSY = 'busy'  # another verification of the same email is in flight; try again shortly
+
+DELIVERY_STATUS_TTL = 15 * 60
+
+
+# --- OTP store ---
+
+def normalize_email(email):
+    """The form OTPs and accounts are keyed by: surrounding spaces dropped, lowercased."""
+    return (email or '').strip().lower()
+
+
+def _email_digest(email):
+    return hashlib.sha256(normalize_email(email).encode()).hexdigest()
+
+
+def _otp_key(email):
+    return f"otp:{_email_digest(email)}"
+
+
+def _hash_code(email, code):
+    message = f"{normalize_email(email)}:{code}".encode()
+    return hmac.new(settings.SECRET_KEY.encode(), message, hashlib.sha256).hexdigest()
+
+
+def issue_otp(email):
+    """Creates a fresh 6-digit code for `email`, replacing any previous one, and returns it."""
+    code = f"{secrets.randbelow(900000) + 100000}"
+    caches['default'].set(
+        _otp_key(email),
+        {'hash': _hash_code(email, code), 'attempts': 0, 'expires_at': time.time() + OTP_TTL},
+        OTP_TTL,
+    )
+    return code
+
+
+def verify_otp(email, code):
+    """
+    Checks `code` and consumes it on success. Returns VALID, INVALID, EXPIRED,
+    TOO_MANY_ATTEMPTS or BUSY (a concurrent check holds the lock; nothing was
+    consumed or counted). After OTP_MAX_ATTEMPTS wrong guesses the code is dropped.
+    """
+    if not email or not code:
+        return INVALID
+    cache = caches['default']
+    key = _otp_key(email)
+    lock_key = f"{key}:lock"
+    if not cache.add(lock_key, 1, OTP_LOCK_TIMEOUT):
+        # A double submit or client retry: the other request decides
+        return BUSY
+    try:
+        record = cache.get(key)
+        if record is None or record['expires_at'] <= time.time():
+            return EXPIRED
+        if hmac.compare_digest(record['hash'], _hash_code(email, str(code).strip())):
+            cache.delete(key)
+            return VALID
+        record['attempts'] += 1
+        if record['attempts'] >= OTP_MAX_ATTEMPTS:
+            cache.delete(key)
+            return TOO_MANY_ATTEMPTS
+        cache.set(key, record, max(1, int(record['expires_at'] - time.time())))
+        return INVALID
+    finally:
+        cache.delete(lock_key)
+
+
+# --- Delivery status ---
+
+# queued -> sent, or queued -> retrying -> ... -> sent / failed
+QUEUED, RETRYING, SENT, FAILED = 'queued', 'retrying', 'sent', 'failed'
+
+
+def _status_key(delivery_id):
+    return f"otp-delivery:{delivery_id}"
+
+
+def new_delivery_id():
+    return uuid.uuid4().hex
+
+
+def _outbox_key(delivery_id):
+    return f"otp-outbox:{delivery_id}"
+
+
+def hold_for_delivery(delivery_id, code):
+    """Keeps the plaintext code for the email worker, no longer than the code itself lives."""
+    caches['default'].set(_outbox_key(delivery_id), code, OTP_TTL)
+
+
+def code_for_delivery(delivery_id):
+    """The code held for `delivery_id`, or None once it has expired or been discarded."""
+    return caches['default'].get(_outbox_key(delivery_id))
+
+
+def discard_for_delivery(delivery_id):
+    caches['default'].delete(_outbox_key(delivery_id))
+
+
+def set_delivery_status(delivery_id, status):
+    caches['default'].set(
+        _status_key(delivery_id),
+        {'status': status, 'updated_at': timezone.now().isoformat()},
+        DELIVERY_STATUS_TTL,
+    )
+
+
+def get_delivery_status(delivery_id):
+    return caches['default'].get(_status_key(delivery_id))
+
+
+def build_otp_email(email, otp):
+    """Professional Email Template"""
+    subject = f"{otp} is your SaudaPakka verification code"
+    html_content = f"""
+        <div style="font-family: sans-serif; padding: 20px; border: 1px solid #eee; border-radius: 10px;">
+            <h2 style="color: #2D3FE2;">SaudaPakka</h2>
+            <p>Your verification code is:</p>
+            <h1 style="letter-spacing: 5px; color: #1a1a1a;">{otp}</h1>
+            <p style="color: #666; font-size: 12px;">Valid for 5 minutes.</p>
+        </div>
+    """
+    msg = EmailMultiAlternatives(subject, strip_tags(html_content), settings.DEFAULT_FROM_EMAIL, [email])
+    msg.attach_alternative(html_content, "text/html")
+    return msg
@@ -1,6 +1,7 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
 from .models import KYCVerification, BrokerProfile
+from apps.core.fieldsets import SparseFieldsetMixin
 
 User = get_user_model()
 
@@ -13,7 +14,7 @@ class BrokerProfileSerializer(serializers.ModelSerializer):
         fields = ['services_offered', 'experience_years', 'is_verified']
         read_only_fields = ['is_verified']
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """
     Standard User Serializer for Profile display and searching.
     Includes the 'full_name' property from the model.
@@ -39,9 +40,19 @@ class UserSerializer(serializers.ModelSerializer):
             'is_kyc_verified',
             'is_staff',
             'broker_profile',
-            'profile_picture'
+            'profile_picture',
+            'avatar_small',
+            'avatar_medium'
         ]
-        read_only_fields = ['id', 'email', 'full_name', 'kyc_status', 'is_kyc_verified', 'is_staff', 'broker_profile']
+        read_only_fields = ['id', 'email', 'full_name', 'kyc_status', 'is_kyc_verified', 'is_staff', 'broker_profile',
+                            'avatar_small', 'avatar_medium']
+        # Only with ?expand= (or named in ?fields=) once ?fields= is given
+        expandable_fields = ['broker_profile']
+        # Model fields read by method fields/properties (for the ?fields= .only() projection)
+        field_sources = {
+            'full_name': ['first_name', 'last_name'],
+            'kyc_status': ['kyc_data'],
+        }
 
     def get_kyc_status(self, obj):
         try:
@@ -54,6 +65,10 @@ class UserSerializer(serializers.ModelSerializer):
         Overridden to automatically set active flags based on role_category.
         """
         role_category = validated_data.get('role_category', instance.role_category)
+        new_picture = 'profile_picture' in validated_data
+        if new_picture:
+            # Stale thumbnails of the old picture; regenerated by process_profile_picture
+            instance.avatar_small = instance.avatar_medium = None
         
         # Update instance with standard fields
         instance = super().update(instance, validated_data)
@@ -81,6 +96,10 @@ class UserSerializer(serializers.ModelSerializer):
             instance.is_active_broker = False
             
         instance.save()
+
+        if new_picture and instance.profile_picture:
+            from .jobs import process_profile_picture
+            process_profile_picture.enqueue(str(instance.pk), instance.profile_picture.name)
         return instance
 
 class PublicUserSerializer(serializers.ModelSerializer):
@@ -90,6 +109,7 @@ class PublicUserSerializer(serializers.ModelSerializer):
     """
     full_name = serializers.ReadOnlyField()
     profile_picture = serializers.SerializerMethodField()
+    avatar_small = serializers.SerializerMethodField()
     
     class Meta:
         model = User
@@ -100,17 +120,24 @@ class PublicUserSerializer(serializers.ModelSerializer):
             'full_name', 
             'is_active_seller', 
             'is_active_broker',
-            'profile_picture'
+            'profile_picture',
+            'avatar_small'
         ]
 
+    def _absolute_url(self, image):
+        if not image:
+            return None
+        request = self.context.get('request')
+        if request:
+            return request.build_absolute_uri(image.url)
+        return image.url
+
     def get_profile_picture(self, obj):
-        """Return absolute URL for profile picture"""
-        if obj.profile_picture:
-            request = self.context.get('request')
-            if request:
-                return request.build_absolute_uri(obj.profile_picture.url)
-            return obj.profile_picture.url
-        return None
+        """Owner cards get the 256px avatar; the full picture until it has been generated."""
+        return self._absolute_url(obj.avatar_medium or obj.profile_picture)
+
+    def get_avatar_small(self, obj):
+        return self._absolute_url(obj.avatar_small)
 
 
 class KYCVerificationSerializer(serializers.ModelSerializer):
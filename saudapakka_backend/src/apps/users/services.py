@@ -1,19 +1,117 @@
 # services.py
 
-import os
+import math
+import random
+import threading
+import time
 import requests
-import xml.etree.ElementTree as ET
 import logging
 from django.conf import settings
+from django.core.cache import caches
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import ConnectTimeoutError
+
+from .aadhaar import AadhaarParseError, parse_aadhaar_xml, to_aadhaar_data
 
 logger = logging.getLogger(__name__)
 
+# Sandbox tokens live 24h; refresh an hour early so no request races the expiry
+TOKEN_LIFETIME = 24 * 3600
+TOKEN_REFRESH_MARGIN = 3600
+TOKEN_CACHE_KEY = 'sandbox:access-token'
+
+RETRY_STATUSES = {429, 502, 503, 504}
+# Safe to send twice. Other methods (session init, authenticate) are only
+# retried when the request never left (see _never_sent) or on 429.
+IDEMPOTENT_METHODS = {'GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'}
+
+
+class CircuitOpen(Exception):
+    def __init__(self, retry_after=1):
+        super().__init__(f"Circuit open, retry in {retry_after}s")
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    Per-process breaker: after `threshold` consecutive failures calls fail fast
+    for `cooldown` seconds, then a single trial call decides whether to close again.
+    """
+
+    def __init__(self, threshold=5, cooldown=30):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return 'closed'
+        if time.monotonic() - self.opened_at >= self.cooldown:
+            return 'half-open'
+        return 'open'
+
+    def before_call(self):
+        with self._lock:
+            state = self.state
+            if state == 'open':
+                raise CircuitOpen(max(1, math.ceil(self.cooldown - (time.monotonic() - self.opened_at))))
+            if state == 'half-open' and self._trial_running:
+                raise CircuitOpen()
+            if state == 'half-open':
+                self._trial_running = True
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial_running = False
+            if self.failures >= self.threshold or self.opened_at is not None:
+                if self.opened_at is None:
+                    logger.error("Sandbox circuit opened after %s consecutive failures", self.failures)
+                self.opened_at = time.monotonic()
+
+
 class SandboxClient:
-    def __init__(self):
+    """
+    Sandbox.co.in KYC client.
+
+    - One pooled requests.Session per client (keep-alive, no TLS handshake per call).
+    - Access token shared by all workers through the default cache and refreshed
+      before it expires (or right away after a 401/403).
+    - Bounded retries with exponential backoff and full jitter on network errors
+      and 429/5xx, all within `deadline` seconds per call, then a circuit
+      breaker so an outage fails fast. POSTs are not repeated once sent.
+    """
+
+    def __init__(self, base_url=None, max_retries=3, backoff=0.5, timeout=20, deadline=30, breaker=None):
         self.api_key = settings.SANDBOX_API_KEY
         self.api_secret = settings.SANDBOX_API_SECRET
-        self.base_url = 'https://api.sandbox.co.in'
+        self.base_url = (base_url or settings.SANDBOX_BASE_URL).rstrip('/')
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.deadline = deadline
+        self.breaker = breaker or CircuitBreaker()
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=settings.SANDBOX_POOL_SIZE)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
         self.access_token = None
+        self.token_expires_at = 0
+        self._token_lock = threading.Lock()
+
+    # --- Token handling ---
 
     def _authenticate(self):
         """Step 1: Get JWT Access Token (Valid for 24 hours)"""
@@ -25,35 +123,117 @@ class SandboxClient:
             'Content-Type': 'application/json'
         }
         try:
-            response = requests.post(url, headers=headers, timeout=15)
+            response = self._request('POST', url, headers=headers, timeout=15)
             if response.status_code == 200:
                 self.access_token = response.json().get('data', {}).get('access_token')
+                self.token_expires_at = time.time() + TOKEN_LIFETIME
+                caches['default'].set(
+                    TOKEN_CACHE_KEY, (self.access_token, self.token_expires_at),
+                    TOKEN_LIFETIME - TOKEN_REFRESH_MARGIN,
+                )
                 return True
             logger.error(f"Sandbox Auth Failed: {response.text}")
             return False
+        except CircuitOpen:
+            raise  # The caller answers 503 with Retry-After rather than a generic failure
         except Exception as e:
             logger.error(f"Sandbox Auth Exception: {e}")
             return False
 
+    def _ensure_token(self, force=False):
+        """Returns True when a fresh token is available, authenticating if needed."""
+        if not force and self.access_token and time.time() < self.token_expires_at - TOKEN_REFRESH_MARGIN:
+            return True
+        with self._token_lock:
+            if not force:
+                # Another worker may already have refreshed it
+                cached = caches['default'].get(TOKEN_CACHE_KEY)
+                if cached and time.time() < cached[1] - TOKEN_REFRESH_MARGIN:
+                    self.access_token, self.token_expires_at = cached
+                    return True
+            return self._authenticate()
+
+    def _auth_headers(self, extra=None):
+        headers = {'Authorization': self.access_token, 'x-api-key': self.api_key}
+        headers.update(extra or {})
+        return headers
+
+    # --- Transport ---
+
+    def _retry_delay(self, attempt, response=None):
+        retry_after = response.headers.get('Retry-After') if response is not None else None
+        if retry_after and retry_after.isdigit():
+            return min(float(retry_after), 10)
+        return random.uniform(0, self.backoff * 2 ** attempt)
+
+    @staticmethod
+    def _never_sent(error):
+        """True when the connection couldn't be opened, so the server never saw the request."""
+        if isinstance(error, requests.ConnectTimeout):
+            return True
+        reason = getattr(error.args[0], 'reason', None) if error.args else None
+        return isinstance(reason, ConnectTimeoutError)  # includes connection refused / DNS failures
+
+    def _request(self, method, url, **kwargs):
+        """Pooled request with bounded, jittered retries behind the circuit breaker."""
+        self.breaker.before_call()
+        timeout = kwargs.pop('timeout', self.timeout)
+        idempotent = method.upper() in IDEMPOTENT_METHODS
+        give_up_at = time.monotonic() + self.deadline
+        attempt = 0
+        while True:
+            remaining = give_up_at - time.monotonic()
+            try:
+                response = self.session.request(method, url, timeout=max(0.1, min(timeout, remaining)), **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                retry = idempotent or self._never_sent(e)
+                delay = self._retry_delay(attempt)
+                if not retry or attempt == self.max_retries or time.monotonic() + delay >= give_up_at:
+                    self.breaker.record_failure()
+                    raise
+                logger.warning(f"Sandbox {method} {url} failed ({e}), retrying")
+            else:
+                retry = response.status_code in RETRY_STATUSES and (idempotent or response.status_code == 429)
+                delay = self._retry_delay(attempt, response)
+                if not retry or attempt == self.max_retries or time.monotonic() + delay >= give_up_at:
+                    break
+            time.sleep(delay)
+            attempt += 1
+
+        if response.status_code >= 500:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+        return response
+
+    def _authorized(self, method, url, headers=None, **kwargs):
+        """Request with the access token; re-authenticates once if it was rejected."""
+        response = self._request(method, url, headers=self._auth_headers(headers), **kwargs)
+        if response.status_code in (401, 403) and self._ensure_token(force=True):
+            response = self._request(method, url, headers=self._auth_headers(headers), **kwargs)
+        return response
+
+    def _unavailable(self, circuit_open):
+        return {
+            'code': 503,
+            'message': 'KYC provider temporarily unavailable',
+            'retry_after': circuit_open.retry_after,
+        }
+
     def initiate_digilocker(self, redirect_url):
         """Step 2: Start DigiLocker Session"""
-        if not self.access_token and not self._authenticate():
-            return {'code': 500, 'message': 'Authentication failed'}
-
-        url = f"{self.base_url}/kyc/digilocker/sessions/init"
-        payload = {
-            "@entity": "in.co.sandbox.kyc.digilocker.session.request",
-            "flow": "signin",
-            "doc_types": ["aadhaar"],
-            "redirect_url": redirect_url
-        }
-        headers = {
-            'Authorization': self.access_token,
-            'x-api-key': self.api_key,
-            'Content-Type': 'application/json'
-        }
         try:
-            response = requests.post(url, json=payload, headers=headers, timeout=20)
+            if not self._ensure_token():
+                return {'code': 500, 'message': 'Authentication failed'}
+
+            url = f"{self.base_url}/kyc/digilocker/sessions/init"
+            payload = {
+                "@entity": "in.co.sandbox.kyc.digilocker.session.request",
+                "flow": "signin",
+                "doc_types": ["aadhaar"],
+                "redirect_url": redirect_url
+            }
+            response = self._authorized('POST', url, json=payload, headers={'Content-Type': 'application/json'})
             data = response.json()
             if response.status_code == 200:
                 return {
@@ -64,23 +244,19 @@ class SandboxClient:
                     }
                 }
             return {'code': response.status_code, 'message': data.get('message')}
+        except CircuitOpen as e:
+            return self._unavailable(e)
         except Exception as e:
             return {'code': 500, 'message': str(e)}
 
     def get_kyc_status(self, entity_id):
         """Step 3: Check status and pull Aadhaar XML if ready"""
-        if not self.access_token and not self._authenticate():
-            return {'code': 500, 'message': 'Auth failed'}
-
-        url = f"{self.base_url}/kyc/digilocker/sessions/{entity_id}/documents/aadhaar"
-        headers = {
-            'Authorization': self.access_token,
-            'x-api-key': self.api_key,
-            'x-api-version': '1.0'
-        }
-        
         try:
-            response = requests.get(url, headers=headers, timeout=20)
+            if not self._ensure_token():
+                return {'code': 500, 'message': 'Auth failed'}
+
+            url = f"{self.base_url}/kyc/digilocker/sessions/{entity_id}/documents/aadhaar"
+            response = self._authorized('GET', url, headers={'x-api-version': '1.0'})
             res_data = response.json()
             
             # Case A: JSON Data provided directly
@@ -91,47 +267,49 @@ class SandboxClient:
             files = res_data.get('data', {}).get('files', [])
             if response.status_code == 200 and len(files) > 0:
                 file_url = files[0].get('url')
-                xml_res = requests.get(file_url, timeout=20)
-                # Call the parser method defined below
-                return self._parse_aadhaar_xml(xml_res.text)
+                # Same pooled session: the file host connection is kept alive too.
+                # Streamed, so the (mostly photo) document is never held in memory whole.
+                xml_res = self._request('GET', file_url, stream=True)
+                try:
+                    if xml_res.status_code != 200:
+                        return {'code': 503, 'message': 'Aadhaar document not available yet'}
+                    xml_res.raw.decode_content = True
+                    # Call the parser method defined below
+                    return self._parse_aadhaar_xml(xml_res.raw)
+                finally:
+                    xml_res.close()
             
+            if response.status_code == 429:
+                return {'code': 429, 'message': 'Rate limited'}
             return {'code': 202, 'message': 'Processing'}
             
+        except CircuitOpen as e:
+            return self._unavailable(e)
         except Exception as e:
             logger.error(f"Sandbox Fetch Error: {e}")
             return {'code': 500, 'message': str(e)}
 
     def _parse_aadhaar_xml(self, xml_content):
-        """Step 4: Extract identity from Government XML"""
+        """
+        Step 4: Extract identity from Government XML (bytes, str or a binary
+        stream). aadhaar_data carries every Poi/Poa attribute; the decoded photo,
+        if any, comes back as a File under data['photo'].
+        """
         try:
-            if isinstance(xml_content, str):
-                xml_content = xml_content.encode('utf-8')
-            
-            root = ET.fromstring(xml_content)
-            
-            # Locate Identity (Poi) and Address (Poa) tags
-            poi = root.find('.//Poi')
-            poa = root.find('.//Poa')
-            
-            if poi is None:
-                return {'code': 400, 'message': 'Poi data missing in Aadhaar XML'}
-
-            return {
-                'code': 200,
-                'data': {
-                    'aadhaar_data': {
-                        'name': poi.get('name'),
-                        'dob': poi.get('dob'),
-                        'gender': poi.get('gender'),
-                        'address': {
-                            'house': poa.get('house') if poa is not None else "",
-                            'dist': poa.get('dist') if poa is not None else "",
-                            'state': poa.get('state') if poa is not None else "",
-                            'pc': poa.get('pc') if poa is not None else ""
-                        }
-                    }
-                }
-            }
-        except Exception as e:
+            parsed = parse_aadhaar_xml(xml_content)
+        except AadhaarParseError as e:
             logger.error(f"XML Parse Error: {e}")
-            return {'code': 500, 'message': 'Failed to parse identity document'}
\ No newline at end of file
+            return {'code': 500, 'message': 'Failed to parse identity document'}
+
+        if parsed['poi'] is None:
+            if parsed['photo'] is not None:
+                parsed['photo'].close()
+            return {'code': 400, 'message': 'Poi data missing in Aadhaar XML'}
+
+        return {
+            'code': 200,
+            'data': {
+                'aadhaar_data': to_aadhaar_data(parsed),
+                'photo': parsed['photo'],
+            }
+        }
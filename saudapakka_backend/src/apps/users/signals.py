@@ -1,6 +1,9 @@
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
-from .models import KYCVerification
+from apps.core.cache import api_key_cache
+from .authentication import invalidate_user_snapshot
+from .models import KYCVerification, ExternalAPIKey, User
 
 @receiver(post_save, sender=KYCVerification)
 def sync_kyc_status_to_user(sender, instance, created, **kwargs):
@@ -19,3 +22,34 @@ def sync_kyc_status_to_user(sender, instance, created, **kwargs):
         if user.is_kyc_verified:
             user.is_kyc_verified = False
             user.save(update_fields=['is_kyc_verified'])
+
+# Cache invalidation waits for the commit: done earlier, a concurrent read could
+# re-cache the old row (or one from a transaction that then rolls back).
+
+# Saves that never change whether a key is valid (lazy rehash, usage bookkeeping)
+API_KEY_BOOKKEEPING_FIELDS = {'hashed_key', 'last_used_at'}
+
+@receiver(post_save, sender=ExternalAPIKey)
+@receiver(post_delete, sender=ExternalAPIKey)
+def invalidate_verified_api_keys(sender, instance, update_fields=None, **kwargs):
+    """Revoked/edited/deleted keys stop authenticating in every worker immediately."""
+    if update_fields and set(update_fields) <= API_KEY_BOOKKEEPING_FIELDS:
+        return
+    transaction.on_commit(api_key_cache.invalidate)
+
+@receiver(post_save, sender=User)
+def invalidate_api_keys_of_blocked_user(sender, instance, created, **kwargs):
+    """A blocked user's API keys must stop working without waiting for the cache TTL."""
+    if not created and not instance.is_active:
+        transaction.on_commit(api_key_cache.invalidate)
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_jwt_user_snapshot(sender, instance, created=False, **kwargs):
+    """
+    Any change to the user row (block/unblock and role changes in AdminUserAction,
+    the is_kyc_verified flip above, profile edits) drops the cached JWT snapshot.
+    """
+    if not created:
+        user_id = instance.pk
+        transaction.on_commit(lambda: invalidate_user_snapshot(user_id))
@@ -1,3 +1,257 @@
-from django.test import TestCase
+import io
+import shutil
+import tempfile
+import threading
+from http.server import ThreadingHTTPServer
+from unittest import mock
 
-# Create your tests here.
+import requests
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.files.base import ContentFile
+from django.test import TestCase, override_settings
+from PIL import Image
+from rest_framework.test import APIClient
+
+from apps.core.storage import claim_upload_key, key_prefix, private_storage
+
+from . import jobs, otp, services, usage, views
+from .management.commands.sandbox_stub import StubState, make_handler
+from .models import APIKeyUsage, ExternalAPIKey, KYCVerification
+from .views import SendOtpView
+
+User = get_user_model()
+
+
+class OtpTests(TestCase):
+    def setUp(self):
+        caches['default'].clear()
+        throttles = mock.patch.object(SendOtpView, 'throttle_classes', [])
+        throttles.start()
+        self.addCleanup(throttles.stop)
+        self.client = APIClient()
+
+    def request_code(self, email):
+        response = self.client.post('/api/auth/login/', {'email': email}, format='json')
+        self.assertEqual(response.status_code, 200, response.content)
+        return otp.code_for_delivery(response.data['delivery_id'])
+
+    def verify(self, email, code):
+        return self.client.post('/api/auth/verify/', {'email': email, 'otp': code}, format='json')
+
+    def test_code_works_once(self):
+        code = otp.issue_otp('buyer@example.com')
+        self.assertEqual(otp.verify_otp('buyer@example.com', code), otp.VALID)
+        self.assertEqual(otp.verify_otp('buyer@example.com', code), otp.EXPIRED)
+
+    def test_attempts_are_limited(self):
+        code = otp.issue_otp('buyer@example.com')
+        wrong = '000000' if code != '000000' else '111111'
+        for _ in range(otp.OTP_MAX_ATTEMPTS - 1):
+            self.assertEqual(otp.verify_otp('buyer@example.com', wrong), otp.INVALID)
+        self.assertEqual(otp.verify_otp('buyer@example.com', wrong), otp.TOO_MANY_ATTEMPTS)
+        self.assertEqual(otp.verify_otp('buyer@example.com', code), otp.EXPIRED)
+
+    def test_concurrent_check_is_busy_not_invalid(self):
+        code = otp.issue_otp('buyer@example.com')
+        caches['default'].add(f"{otp._otp_key('buyer@example.com')}:lock", 1, otp.OTP_LOCK_TIMEOUT)
+        self.assertEqual(otp.verify_otp('buyer@example.com', code), otp.BUSY)
+        response = self.verify('buyer@example.com', code)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response['Retry-After'], '1')
+
+        caches['default'].delete(f"{otp._otp_key('buyer@example.com')}:lock")
+        self.assertEqual(otp.verify_otp('buyer@example.com', code), otp.VALID)
+
+    def test_code_expires(self):
+        code = otp.issue_otp('buyer@example.com')
+        later = otp.time.time() + otp.OTP_TTL + 1
+        with mock.patch.object(otp.time, 'time', return_value=later):
+            self.assertEqual(otp.verify_otp('buyer@example.com', code), otp.EXPIRED)
+
+    def test_email_case_and_spaces_map_to_one_account(self):
+        code = self.request_code('user@x.com')
+        response = self.verify(' User@X.com ', code)
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(response.data['user']['email'], 'user@x.com')
+
+        code = self.request_code('USER@x.com')
+        self.assertEqual(self.verify('user@x.com', code).status_code, 200)
+        self.assertEqual(User.objects.filter(email__iexact='user@x.com').count(), 1)
+
+    def test_existing_mixed_case_account_is_reused(self):
+        legacy = User.objects.create_user(username='legacy', email='Legacy@X.com', password='x',
+                                          phone_number='9000000001')
+        response = self.verify('legacy@x.com', self.request_code('legacy@x.com'))
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(response.data['user']['id'], str(legacy.pk))
+        self.assertEqual(User.objects.count(), 1)
+
+
+class SandboxClientTests(TestCase):
+    """SandboxClient against the sandbox_stub server."""
+
+    def setUp(self):
+        caches['default'].clear()
+        self.state = StubState(polls_until_ready=0, latency=0, jitter=0, fail_rate=0)
+        server = ThreadingHTTPServer(('127.0.0.1', 0), make_handler(self.state))
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        self.base_url = f"http://127.0.0.1:{server.server_address[1]}"
+        sleep = mock.patch.object(services.time, 'sleep')
+        sleep.start()
+        self.addCleanup(sleep.stop)
+
+    def sandbox_client(self, **kwargs):
+        return services.SandboxClient(**{'base_url': self.base_url, **kwargs})
+
+    def paths(self):
+        return [path for _, path in self.state.requests]
+
+    def test_token_is_shared_and_refreshed_when_rejected(self):
+        first = self.sandbox_client()
+        self.assertEqual(first.initiate_digilocker('https://example.com/cb')['code'], 200)
+        self.assertEqual(self.sandbox_client().initiate_digilocker('https://example.com/cb')['code'], 200)
+        self.assertEqual(self.paths().count('/authenticate'), 1)
+
+        self.state.tokens.clear()  # provider revoked it
+        self.assertEqual(first.initiate_digilocker('https://example.com/cb')['code'], 200)
+        self.assertEqual(self.paths().count('/authenticate'), 2)
+
+    def test_get_is_retried_on_5xx(self):
+        sandbox = self.sandbox_client(max_retries=2, breaker=services.CircuitBreaker(threshold=10))
+        self.state.fail_rate = 1
+        response = sandbox._request('GET', f"{self.base_url}/files/x.xml")
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(len(self.state.requests), 3)
+
+    def test_post_is_not_repeated_once_sent(self):
+        sandbox = self.sandbox_client(max_retries=2, breaker=services.CircuitBreaker(threshold=10))
+        self.state.fail_rate = 1
+        self.assertEqual(sandbox._request('POST', f"{self.base_url}/authenticate").status_code, 503)
+        self.assertEqual(len(self.state.requests), 1)
+
+        with mock.patch.object(sandbox.session, 'request', side_effect=requests.ReadTimeout) as request:
+            with self.assertRaises(requests.ReadTimeout):
+                sandbox._request('POST', f"{self.base_url}/authenticate")
+        self.assertEqual(request.call_count, 1)
+
+    def test_post_is_retried_when_never_sent(self):
+        sandbox = self.sandbox_client(max_retries=2, breaker=services.CircuitBreaker(threshold=10))
+        with mock.patch.object(sandbox.session, 'request', side_effect=requests.ConnectTimeout) as request:
+            with self.assertRaises(requests.ConnectTimeout):
+                sandbox._request('POST', f"{self.base_url}/authenticate")
+        self.assertEqual(request.call_count, 3)
+
+        refused = self.sandbox_client(base_url='http://127.0.0.1:1', max_retries=2,
+                              breaker=services.CircuitBreaker(threshold=10))
+        with self.assertRaises(requests.ConnectionError):
+            refused._request('POST', 'http://127.0.0.1:1/authenticate')
+        self.assertEqual(refused.breaker.failures, 1)
+
+    def test_retries_stop_at_the_deadline(self):
+        sandbox = self.sandbox_client(max_retries=10, timeout=20, deadline=30, breaker=services.CircuitBreaker(threshold=20))
+        clock = [0.0]
+
+        def slow_failure(*args, timeout, **kwargs):
+            clock[0] += timeout
+            raise requests.ReadTimeout()
+
+        with mock.patch.object(services.time, 'monotonic', lambda: clock[0]), \
+                mock.patch.object(sandbox.session, 'request', side_effect=slow_failure):
+            with self.assertRaises(requests.ReadTimeout):
+                sandbox._request('GET', f"{self.base_url}/files/x.xml")
+        self.assertLessEqual(clock[0], 30)
+
+    def test_open_breaker_answers_503_with_retry_after(self):
+        sandbox = self.sandbox_client(max_retries=0, breaker=services.CircuitBreaker(threshold=1, cooldown=30))
+        self.state.fail_rate = 1
+        self.assertEqual(sandbox.initiate_digilocker('https://example.com/cb')['code'], 500)
+        self.assertEqual(sandbox.breaker.state, 'open')
+
+        user = User.objects.create_user(username='kyc', email='kyc@example.com', password='x',
+                                        phone_number='9000000009')
+        client = APIClient()
+        client.force_authenticate(user)
+        requests_before = len(self.state.requests)
+        with mock.patch.object(views, 'sandbox', sandbox):
+            response = client.post('/api/kyc/initiate/', {'redirect_url': 'https://example.com/cb'},
+                                   format='json')
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '30')
+        self.assertEqual(len(self.state.requests), requests_before)
+
+
+class ApiUsageTests(TestCase):
+    def setUp(self):
+        caches['default'].clear()
+        owner = User.objects.create_user(username='bot', email='bot@example.com', password='x',
+                                         phone_number='9000000011')
+        self.key = ExternalAPIKey.objects.create(user=owner, name='WhatsApp Bot')
+
+    def test_record_reaches_the_database_once(self):
+        usage.record(self.key.pk, requests=3, bytes_uploaded=100)
+        usage.flush_local()
+        self.assertEqual(usage.flush(), (1, 1))
+
+        row = APIKeyUsage.objects.get(api_key=self.key)
+        self.assertEqual((row.requests, row.listings_created, row.bytes_uploaded), (3, 0, 100))
+        self.key.refresh_from_db()
+        self.assertIsNotNone(self.key.last_used_at)
+
+        # Drained: a second flush adds only what was recorded since
+        usage.record(self.key.pk, requests=1)
+        usage.flush()
+        row.refresh_from_db()
+        self.assertEqual((row.requests, row.bytes_uploaded), (4, 100))
+
+    def test_flush_is_a_periodic_job(self):
+        from apps.jobs.registry import periodic_tasks
+        self.assertIn('apps.users.jobs.flush_api_usage', periodic_tasks())
+
+
+class KycImageTests(TestCase):
+    def setUp(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media)
+        settings_override = override_settings(MEDIA_ROOT=media)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def upload(self, name, image, format):
+        buffer = io.BytesIO()
+        image.save(buffer, format=format)
+        return private_storage().save(name, ContentFile(buffer.getvalue()))
+
+    def test_oversized_upload_keeps_the_other_previews(self):
+        user = User.objects.create_user(username='kyc', email='kyc@example.com', password='x',
+                                        phone_number='9000000012')
+        kyc = KYCVerification.objects.create(
+            user=user,
+            # 400 MP, a few KB as a 1-bit PNG
+            aadhaar_front_image=self.upload('kyc/aadhaar/front.png', Image.new('1', (20000, 20000)), 'PNG'),
+            selfie_image=self.upload('kyc/selfies/me.jpg', Image.new('RGB', (800, 600), 'gray'), 'JPEG'),
+        )
+        jobs.process_kyc_images(kyc.pk)
+
+        kyc.refresh_from_db()
+        self.assertFalse(kyc.aadhaar_front_preview)
+        self.assertTrue(kyc.selfie_preview)
+        user.refresh_from_db()
+        self.assertTrue(user.profile_picture.name.startswith('profile_pictures/'))
+        self.assertTrue(user.avatar_small)
+
+    def test_claimed_keys_are_checked_for_size_and_type(self):
+        user = User.objects.create_user(username='kyc', email='kyc@example.com', password='x',
+                                        phone_number='9000000012')
+        field = KYCVerification._meta.get_field('aadhaar_front_image')
+        prefix = key_prefix(field, user)
+        png = self.upload(f'{prefix}front.png', Image.new('RGB', (10, 10)), 'PNG')
+        script = private_storage().save(f'{prefix}front.jpg', ContentFile(b'<script>alert(1)</script>'))
+
+        self.assertTrue(claim_upload_key(png, field, user))
+        self.assertFalse(claim_upload_key(script, field, user))
+        self.assertFalse(claim_upload_key(f'{prefix}missing.png', field, user))
+        with mock.patch.object(type(private_storage()), 'size', return_value=26 * 1024 * 1024):
+            self.assertFalse(claim_upload_key(png, field, user))
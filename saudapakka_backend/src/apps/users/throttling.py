@@ -0,0 +1,45 @@
+from rest_framework.throttling import BaseThrottle
+
+from apps.core.ratelimit import token_bucket_take
+
+from . import usage
+
+
+class APIKeyRateThrottle(BaseThrottle):
+    """
+    Token bucket per ExternalAPIKey, shared across workers via the atomic
+    counter store (settings.RATELIMIT_BACKEND, see apps.core.ratelimit).
+
+    The bucket holds up to `burst_limit` tokens and refills at
+    `rate_limit_per_minute` per minute. Each request spends one token.
+    Also meters the request (count + uploaded bytes) for usage reporting.
+    Requests that are not authenticated with an API key are not throttled here.
+    """
+
+    def allow_request(self, request, view):
+        key_obj = getattr(request, 'auth', None)
+        if key_obj is None or not hasattr(key_obj, 'rate_limit_per_minute'):
+            return True
+
+        if not key_obj.rate_limit_per_minute:
+            # A bucket that never refills: the key is switched off
+            self._wait = None
+            return False
+
+        allowed, self._wait = token_bucket_take(
+            f"apikey:{key_obj.pk}",
+            capacity=max(key_obj.burst_limit, 1),
+            rate=key_obj.rate_limit_per_minute / 60.0,  # tokens per second
+        )
+        if not allowed:
+            return False
+
+        usage.record(
+            key_obj.pk,
+            requests=1,
+            bytes_uploaded=int(request.META.get('CONTENT_LENGTH') or 0),
+        )
+        return True
+
+    def wait(self):
+        return getattr(self, '_wait', None) or None
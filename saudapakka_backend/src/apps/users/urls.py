@@ -1,6 +1,6 @@
 from django.urls import path
 from .views import (
-    SendOtpView, VerifyOtpView, InitiateKYCView, 
+    SendOtpView, VerifyOtpView, OtpDeliveryStatusView, InitiateKYCView, 
     VerifyKYCStatusView, UpgradeRoleView, SearchProfileView, 
     AdminDashboardStats, UserProfileView, KYCCallbackView,
     AdminUserDocumentView, AdminVerifyUserView, UploadAadhaarView
@@ -10,6 +10,7 @@ from rest_framework_simplejwt.views import TokenRefreshView
 urlpatterns = [
     path('auth/login/', SendOtpView.as_view(), name='login-otp'),
     path('auth/verify/', VerifyOtpView.as_view(), name='verify-otp'),
+    path('auth/otp-status/<str:delivery_id>/', OtpDeliveryStatusView.as_view(), name='otp-delivery-status'),
     path('auth/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
     path('user/me/', UserProfileView.as_view(), name='user-profile'),
     path('user/upgrade/', UpgradeRoleView.as_view(), name='upgrade-role'),
@@ -0,0 +1,164 @@
+"""
+API key usage metering.
+
+The request path only bumps in-process counters. Every USAGE_FLUSH_INTERVAL
+seconds a worker pushes its counters into the shared cache with add/incr, and
+every DB_FLUSH_INTERVAL seconds the job worker (jobs.flush_api_usage, or
+'manage.py flush_api_usage' by hand) moves the shared counters into
+APIKeyUsage rows in one batch. Nothing on the hot path writes to the database.
+"""
+import atexit
+import threading
+import time
+from collections import defaultdict
+from datetime import date as date_cls, datetime, timedelta, timezone as dt_timezone
+
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from apps.core.cache import add_or_incr_many
+
+USAGE_FLUSH_INTERVAL = 5  # seconds between pushes of local counters to the shared cache
+DB_FLUSH_INTERVAL = 60  # seconds between moves of the shared counters into APIKeyUsage
+USAGE_TTL = 3 * 24 * 3600  # shared counters survive a missed flush for a few days
+FLUSH_LOCK_KEY = 'apikey-usage:flush-lock'
+FLUSH_LOCK_TIMEOUT = 300
+
+METRICS = ('requests', 'listings_created', 'bytes_uploaded')
+
+_lock = threading.Lock()
+_pending = defaultdict(int)  # (key_id, date iso, metric) -> delta
+_last_used = {}  # key_id -> epoch seconds
+_last_flush = time.monotonic()
+
+
+def usage_key(key_id, date, metric):
+    return f"apikey-usage:{key_id}:{date}:{metric}"
+
+
+def last_used_key(key_id):
+    return f"apikey-last-used:{key_id}"
+
+
+def record(key_id, requests=0, listings_created=0, bytes_uploaded=0):
+    """Counts usage for an API key (in memory; pushed to the shared cache in batches)."""
+    global _last_flush
+    today = timezone.localdate().isoformat()
+    with _lock:
+        for metric, delta in (('requests', requests),
+                              ('listings_created', listings_created),
+                              ('bytes_uploaded', bytes_uploaded)):
+            if delta:
+                _pending[(key_id, today, metric)] += delta
+        _last_used[key_id] = time.time()
+        due = time.monotonic() - _last_flush > USAGE_FLUSH_INTERVAL
+    if due:
+        flush_local()
+
+
+def flush_local():
+    """Pushes this process's counters into the shared cache."""
+    global _last_flush
+    with _lock:
+        pending = dict(_pending)
+        last_used = dict(_last_used)
+        _pending.clear()
+        _last_used.clear()
+        _last_flush = time.monotonic()
+
+    if not pending and not last_used:
+        return
+    cache = caches['default']
+    add_or_incr_many(cache, {
+        usage_key(key_id, date, metric): delta for (key_id, date, metric), delta in pending.items()
+    }, timeout=USAGE_TTL)
+    # Last writer wins; an exact timestamp is not worth a read-modify-write
+    cache.set_many({last_used_key(key_id): ts for key_id, ts in last_used.items()}, timeout=USAGE_TTL)
+
+
+atexit.register(flush_local)
+
+
+def pending_usage(key_ids, dates):
+    """
+    Counters sitting in the shared cache that have not reached APIKeyUsage yet.
+    Returns {(key_id, date iso, metric): value}.
+    """
+    cache = caches['default']
+    keys = {
+        usage_key(key_id, date, metric): (key_id, date, metric)
+        for key_id in key_ids for date in dates for metric in METRICS
+    }
+    found = cache.get_many(list(keys))
+    return {keys[k]: v for k, v in found.items() if v}
+
+
+def pending_last_used(key_ids):
+    """{key_id: aware datetime} of last use recorded in the shared cache."""
+    cache = caches['default']
+    found = cache.get_many([last_used_key(key_id) for key_id in key_ids])
+    result = {}
+    for key_id in key_ids:
+        ts = found.get(last_used_key(key_id))
+        if ts:
+            result[key_id] = datetime.fromtimestamp(ts, tz=dt_timezone.utc)
+    return result
+
+
+def drain(key_id, date, metric, amount):
+    """Subtracts what was written to the DB, keeping increments that raced the flush."""
+    cache = caches['default']
+    try:
+        cache.decr(usage_key(key_id, date, metric), amount)
+    except ValueError:
+        pass
+
+
+def flush(days=3):
+    """
+    Moves the shared counters of the last `days` days into APIKeyUsage rows and
+    last_used_at. Returns (key-days written, keys touched), or None when
+    another flush holds the lock (two flushes would both write the same counts).
+    """
+    from .models import APIKeyUsage, ExternalAPIKey
+
+    cache = caches['default']
+    if not cache.add(FLUSH_LOCK_KEY, 1, FLUSH_LOCK_TIMEOUT):
+        return None
+    try:
+        today = timezone.localdate()
+        dates = [(today - timedelta(days=n)).isoformat() for n in range(days)]
+        key_ids = list(ExternalAPIKey.objects.values_list('id', flat=True))
+
+        flush_local()
+        pending = pending_usage(key_ids, dates)
+
+        rows = {}
+        for (key_id, day, metric), value in pending.items():
+            rows.setdefault((key_id, day), {})[metric] = value
+
+        with transaction.atomic():
+            for (key_id, day), counts in rows.items():
+                row, created = APIKeyUsage.objects.get_or_create(
+                    api_key_id=key_id, date=date_cls.fromisoformat(day), defaults=counts
+                )
+                if not created:
+                    APIKeyUsage.objects.filter(pk=row.pk).update(
+                        **{metric: F(metric) + value for metric, value in counts.items()}
+                    )
+
+            # Queryset update: bookkeeping only, so no save() signals / cache invalidation
+            last_used = pending_last_used(key_ids)
+            for key_id, used_at in last_used.items():
+                ExternalAPIKey.objects.filter(pk=key_id).exclude(
+                    last_used_at__gte=used_at
+                ).update(last_used_at=used_at)
+
+        # Only once the rows are committed: take exactly what was written off the counters
+        for (key_id, day, metric), value in pending.items():
+            drain(key_id, day, metric, value)
+        return len(rows), len(last_used)
+    finally:
+        cache.delete(FLUSH_LOCK_KEY)
@@ -1,95 +1,86 @@
-import random
 import logging
+import time
+import uuid
+from datetime import timedelta
 from django.conf import settings
 from django.utils import timezone
 from django.contrib.auth import get_user_model
+from django.db import IntegrityError
 from django.db.models import Q
-from django.core.mail import EmailMultiAlternatives
-from django.utils.html import strip_tags
 
 from rest_framework import status, permissions, generics
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, AllowAny
-from rest_framework.throttling import AnonRateThrottle
 from rest_framework_simplejwt.tokens import RefreshToken
 
 # Internal App Imports
 from .models import KYCVerification, BrokerProfile
 from .serializers import UserSerializer
 from .services import SandboxClient
+from . import kyc as kyc_service
+from . import otp as otp_service
+from .jobs import process_kyc_images, send_otp_email
 from apps.properties.models import Property
+from apps.core.storage import uploaded_file_or_key
+from apps.core.cache import dashboard_cache
+from apps.core.throttling import SlidingWindowThrottle
 
 
 
 User = get_user_model()
 logger = logging.getLogger(__name__)
 
+LAST_LOGIN_UPDATE_INTERVAL = timedelta(hours=1)
+
 # Initialize Sandbox AWS-Powered Client
 # This client handles the AWS SigV4 signing to prevent 403/400 errors
 sandbox = SandboxClient()
 
 # --- 1. THROTTLES ---
-class OtpRequestThrottle(AnonRateThrottle):
-    rate = '5/hour'
+class OtpRequestThrottle(SlidingWindowThrottle):
     scope = 'otp_request'
+    key_func = 'ip'
+
+class OtpEmailThrottle(SlidingWindowThrottle):
+    # Caps mails to one address no matter how many IPs ask for them
+    scope = 'otp_email'
+    key_func = 'email'
 
 # --- 2. AUTHENTICATION VIEWS ---
 
 class SendOtpView(APIView):
     """Generates a 6-digit OTP and sends it via SaudaPakka branded email."""
-    throttle_classes = [OtpRequestThrottle]
+    throttle_classes = [OtpRequestThrottle, OtpEmailThrottle]
     authentication_classes = []
     permission_classes = [AllowAny]
     
     def post(self, request):
-        email = request.data.get('email')
+        email = otp_service.normalize_email(request.data.get('email'))
         if not email:
             return Response({'error': 'Email is required'}, status=400)
 
-        otp = str(random.randint(100000, 999999))
-        # OTP Generation Logic
-        # (Debug print removed)
-        
-        # FIX: Generate a temp unique phone number to satisfy unique constraint
-        # max_length=15. "temp_" (5) + 8 chars = 13 chars.
-        import uuid
-        user, created = User.objects.get_or_create(
-            email=email, 
-            defaults={
-                'username': email,
-                'phone_number': f"temp_{uuid.uuid4().hex[:8]}"
-            }
-        )
-        
-        user.otp = otp
-        user.otp_created_at = timezone.now()
-        user.save()
-        
-        # Professional Email Template
-        subject = f"{otp} is your SaudaPakka verification code"
-        html_content = f"""
-            <div style="font-family: sans-serif; padding: 20px; border: 1px solid #eee; border-radius: 10px;">
-                <h2 style="color: #2D3FE2;">SaudaPakka</h2>
-                <p>Your verification code is:</p>
-                <h1 style="letter-spacing: 5px; color: #1a1a1a;">{otp}</h1>
-                <p style="color: #666; font-size: 12px;">Valid for 5 minutes.</p>
-            </div>
-        """
+        # Code goes to the shared OTP store; no User row is read or written here
+        otp = otp_service.issue_otp(email)
         
-        try:
-            msg = EmailMultiAlternatives(subject, strip_tags(html_content), settings.DEFAULT_FROM_EMAIL, [email])
-            msg.attach_alternative(html_content, "text/html")
-            msg.send(fail_silently=False)
-            return Response({'message': 'OTP sent successfully'})
-        except Exception as e:
-            logger.error(f"OTP email send failed: {e}")
-            return Response(
-                {'error': 'Failed to send OTP email. Please try again.'}, 
-                status=status.HTTP_503_SERVICE_UNAVAILABLE
-            )
+        # Delivery happens in the 'email' worker queue; respond as soon as the OTP is stored
+        delivery_id = otp_service.new_delivery_id()
+        otp_service.hold_for_delivery(delivery_id, otp)
+        otp_service.set_delivery_status(delivery_id, otp_service.QUEUED)
+        send_otp_email.enqueue(delivery_id, email)
+        return Response({'message': 'OTP sent successfully', 'delivery_id': delivery_id})
 
-from django.contrib.auth.models import update_last_login
+
+class OtpDeliveryStatusView(APIView):
+    """Delivery progress of an OTP email: queued, retrying, sent or failed."""
+    authentication_classes = []
+    permission_classes = [AllowAny]
+
+    def get(self, request, delivery_id):
+        status_data = otp_service.get_delivery_status(delivery_id)
+        if status_data is None:
+            return Response({'error': 'Unknown or expired delivery id'}, status=404)
+        return Response({'delivery_id': delivery_id, **status_data})
 
 class VerifyOtpView(APIView):
     """Verifies OTP and returns JWT tokens + User details."""
@@ -97,28 +88,50 @@ class VerifyOtpView(APIView):
     permission_classes = [AllowAny]
     
     def post(self, request):
-        email = request.data.get('email')
+        email = otp_service.normalize_email(request.data.get('email'))
         otp = request.data.get('otp')
         
-        try:
-            user = User.objects.get(email=email)
-            # Check OTP match and 5-minute expiry
-            if user.otp == otp and (timezone.now() - user.otp_created_at).total_seconds() < 300:
-                user.otp = None # Clear OTP after success
-                user.save()
-                
-                # Update last_login timestamp
-                update_last_login(None, user)
-                
-                refresh = RefreshToken.for_user(user)
-                return Response({
-                    'refresh': str(refresh),
-                    'access': str(refresh.access_token),
-                    'user': UserSerializer(user).data
-                })
+        result = otp_service.verify_otp(email, otp)
+        if result == otp_service.BUSY:
+            return Response({'error': 'This code is already being verified. Please retry.'}, status=409,
+                            headers={'Retry-After': '1'})
+        if result == otp_service.TOO_MANY_ATTEMPTS:
+            return Response({'error': 'Too many incorrect attempts. Please request a new OTP.'}, status=429)
+        if result != otp_service.VALID:
             return Response({'error': 'Invalid or expired OTP'}, status=400)
-        except User.DoesNotExist:
-            return Response({'error': 'User not found'}, status=404)
+
+        # Accounts are only created once the email is proven. Older accounts
+        # may be stored with capitals, hence iexact.
+        user = User.objects.filter(email__iexact=email).order_by('date_joined').first()
+        if user is None:
+            # FIX: Generate a temp unique phone number to satisfy unique constraint
+            # max_length=15. "temp_" (5) + 8 chars = 13 chars.
+            try:
+                user, _ = User.objects.get_or_create(
+                    email=email,
+                    defaults={
+                        'username': email,
+                        'phone_number': f"temp_{uuid.uuid4().hex[:8]}"
+                    }
+                )
+            except IntegrityError:
+                user = User.objects.filter(email__iexact=email).order_by('date_joined').first()
+
+        if not user.is_active:
+            return Response({'error': 'User account is disabled'}, status=403)
+
+        # Update last_login timestamp (at most hourly, so logins don't rewrite the users table)
+        now = timezone.now()
+        if user.last_login is None or now - user.last_login > LAST_LOGIN_UPDATE_INTERVAL:
+            User.objects.filter(pk=user.pk).update(last_login=now)
+            user.last_login = now
+
+        refresh = RefreshToken.for_user(user)
+        return Response({
+            'refresh': str(refresh),
+            'access': str(refresh.access_token),
+            'user': UserSerializer(user).data
+        })
 
 # --- 2. PROFILE & SEARCH VIEWS ---
 
@@ -170,15 +183,22 @@ class InitiateKYCView(APIView):
         result = sandbox.initiate_digilocker(redirect_url)
         
         if result.get('code') == 200:
-            # FIX: Store entity_id in session as per guide
-            request.session['kyc_entity_id'] = result['data']['entity_id']
-            
-            KYCVerification.objects.update_or_create(
+            # entity_id is kept on KYCVerification.request_id (no session needed)
+            kyc, _ = KYCVerification.objects.update_or_create(
                 user=request.user,
                 defaults={'request_id': result['data']['entity_id'], 'status': 'INITIATED'}
             )
+            # A worker polls Sandbox from here on (apps.users.jobs.poll_kyc_session)
+            kyc_service.schedule_poll(kyc)
             return Response(result['data'])
-        
+
+        if result.get('code') == 503 and 'retry_after' in result:
+            # Circuit breaker open: the provider is down, not the request bad
+            return Response(
+                {"error": result['message']}, status=503,
+                headers={'Retry-After': str(result['retry_after'])},
+            )
+
         # Log error detail
         logger.error(f"Sandbox API error: {result}")
         return Response({"error": result.get('message', "Forbidden")}, status=403)
@@ -193,8 +213,8 @@ class KYCCallbackView(APIView):
 
     def get(self, request):
         logger.info("KYCCallbackView hit")
-        # We can try to rely on session if cookie is present, but usually 
-        # for detached callbacks we just return a success page or JSON.
+        # No session under /api/ (see apps.core.middleware); for detached
+        # callbacks we just return a success page or JSON.
         # Since frontend handles the verification, we just confirm receipt.
         return Response({
             "status": "Target Reached", 
@@ -202,40 +222,42 @@ class KYCCallbackView(APIView):
         })
 
 class VerifyKYCStatusView(APIView):
+    """
+    DigiLocker KYC status, read from KYCVerification (a background job does the
+    Sandbox polling, see apps.users.kyc). Pass ?wait=<seconds> (max
+    KYC_LONG_POLL_MAX_WAIT) to hold the request until the status changes.
+    """
     permission_classes = [IsAuthenticated]
+    poll_interval = 1.0
 
-    def post(self, request):
-        entity_id = request.data.get('entity_id')
-        logger.debug(f"Verifying KYC ID: {entity_id}")
-        
-        result = sandbox.get_kyc_status(entity_id)
-        
-        if result.get('code') == 200:
-            aadhaar = result.get('data', {}).get('aadhaar_data', {})
-            
-            if not aadhaar or not aadhaar.get('name'):
-                 return Response({"status": "PROCESSING"}, status=202)
-
-            # SAVE DATA
-            kyc = KYCVerification.objects.get(user=request.user)
-            kyc.full_name = aadhaar.get('name')
-            kyc.dob = aadhaar.get('dob')
-            kyc.address_json = aadhaar.get('address')
-            kyc.status = 'VERIFIED'
-            kyc.save()
-            
-            # Update User profile AND cached KYC status
-            user = request.user
-            user.first_name = kyc.full_name.split(' ')[0]
-            user.is_kyc_verified = True  # Cache KYC status for performance
-            user.save()
+    def get(self, request):
+        return self._status(request, request.query_params.get('wait'))
 
-            logger.info(f"KYC verification successful for {user.email}")
-            return Response({"status": "SUCCESS", "data": {"name": kyc.full_name}})
+    def post(self, request):
+        return self._status(request, request.query_params.get('wait') or request.data.get('wait'))
 
-        # If rate limited or processing
-        status_code = 202 if result.get('code') in [202, 429] else 400
-        return Response({"status": "PROCESSING"}, status=status_code)
+    def _status(self, request, wait):
+        try:
+            wait = min(max(float(wait or 0), 0), settings.KYC_LONG_POLL_MAX_WAIT)
+        except (TypeError, ValueError):
+            wait = 0
+
+        user_id = request.user.pk
+        version = kyc_service.status_version(user_id)
+        kyc = kyc_service.get_status_row(request.user)
+
+        if kyc and kyc['status'] == 'INITIATED':
+            # Client is back from DigiLocker: check now rather than after the current backoff
+            kyc_service.nudge_poll(kyc['pk'], kyc['request_id'])
+            deadline = time.monotonic() + wait
+            while time.monotonic() < deadline:
+                time.sleep(min(self.poll_interval, max(deadline - time.monotonic(), 0)))
+                if kyc_service.status_version(user_id) != version:
+                    kyc = kyc_service.get_status_row(request.user)
+                    break
+
+        body, status_code = kyc_service.status_payload(kyc)
+        return Response(body, status=status_code)
 
 class UploadAadhaarView(APIView):
     """
@@ -245,9 +267,10 @@ class UploadAadhaarView(APIView):
     permission_classes = [IsAuthenticated]
 
     def post(self, request):
-        aadhaar_front = request.FILES.get('aadhaar_front')
-        aadhaar_back = request.FILES.get('aadhaar_back')
-        selfie = request.FILES.get('selfie')
+        # Multipart files, or presigned upload keys ('aadhaar_front_key', ...) already in storage
+        aadhaar_front = uploaded_file_or_key(request, 'aadhaar_front', KYCVerification._meta.get_field('aadhaar_front_image'))
+        aadhaar_back = uploaded_file_or_key(request, 'aadhaar_back', KYCVerification._meta.get_field('aadhaar_back_image'))
+        selfie = uploaded_file_or_key(request, 'selfie', KYCVerification._meta.get_field('selfie_image'))
         
         # Validation
         if not aadhaar_front or not aadhaar_back or not selfie:
@@ -255,11 +278,10 @@ class UploadAadhaarView(APIView):
                 "error": "Aadhaar front, back, and selfie images are all required"
             }, status=400)
         
-        # Validate file types
+        # Validate file types (claimed keys were checked for size and type by claim_upload_key)
         allowed_types = ['image/jpeg', 'image/jpg', 'image/png']
-        if (aadhaar_front.content_type not in allowed_types or 
-            aadhaar_back.content_type not in allowed_types or
-            selfie.content_type not in allowed_types):
+        uploaded_files = [f for f in (aadhaar_front, aadhaar_back, selfie) if not isinstance(f, str)]
+        if any(f.content_type not in allowed_types for f in uploaded_files):
             return Response({
                 "error": "Invalid file format. Please upload JPG or PNG images only."
             }, status=400)
@@ -270,17 +292,17 @@ class UploadAadhaarView(APIView):
         back_max_size = 25 * 1024 * 1024   # 25MB
         selfie_max_size = 10 * 1024 * 1024 # 10MB
         
-        if aadhaar_front.size > front_max_size:
+        if not isinstance(aadhaar_front, str) and aadhaar_front.size > front_max_size:
             return Response({
                 "error": "Aadhaar front image exceeds 15MB limit. Please upload a smaller image."
             }, status=400)
         
-        if aadhaar_back.size > back_max_size:
+        if not isinstance(aadhaar_back, str) and aadhaar_back.size > back_max_size:
             return Response({
                 "error": "Aadhaar back image exceeds 25MB limit. Please upload a smaller image."
             }, status=400)
         
-        if selfie.size > selfie_max_size:
+        if not isinstance(selfie, str) and selfie.size > selfie_max_size:
             return Response({
                 "error": "Selfie image exceeds 10MB limit. Please upload a smaller image."
             }, status=400)
@@ -309,10 +331,9 @@ class UploadAadhaarView(APIView):
             user = request.user
             user.is_kyc_verified = True
             
-            # Set selfie as profile picture using the saved file from KYC verification
-            if kyc_verification.selfie_image:
-                user.profile_picture = kyc_verification.selfie_image
-            
+            # process_kyc_images makes a public copy of the selfie the profile picture
+            # (the upload itself is on private storage)
+
             if requested_role:
                 user.role_category = requested_role
                 if requested_role == 'SELLER':
@@ -332,6 +353,9 @@ class UploadAadhaarView(APIView):
             
             user.save()
 
+            # Worker normalises the uploads and swaps in a downscaled profile picture + avatars
+            process_kyc_images.enqueue(kyc_verification.pk)
+
             logger.info(f"Aadhaar KYC verification successful for {user.email}. Role: {requested_role if requested_role else 'N/A'}")
 
             return Response({
@@ -408,7 +432,10 @@ class AdminDashboardStats(APIView):
     permission_classes = [permissions.IsAdminUser]
 
     def get(self, request):
-        return Response({
+        return Response(dashboard_cache.get_or_set('user-dashboard-stats', self._build_stats))
+
+    def _build_stats(self):
+        return {
             "user_metrics": {
                 "total": User.objects.count(),
                 "sellers": User.objects.filter(is_active_seller=True).count(),
@@ -424,7 +451,7 @@ class AdminDashboardStats(APIView):
                 "timezone": settings.TIME_ZONE,
                 "current_time": timezone.now()
             }
-        })
+        }
 
 class AdminUserDocumentView(APIView):
     """
@@ -455,6 +482,11 @@ class AdminUserDocumentView(APIView):
                     documents["aadhaar_back_url"] = request.build_absolute_uri(kyc.aadhaar_back_image.url)
                 if kyc.selfie_image:
                     documents["selfie_url"] = request.build_absolute_uri(kyc.selfie_image.url)
+                for preview in ('aadhaar_front_preview', 'aadhaar_back_preview', 'selfie_preview'):
+                    if getattr(kyc, preview):
+                        documents[f"{preview}_url"] = request.build_absolute_uri(getattr(kyc, preview).url)
+                if kyc.aadhaar_photo:
+                    documents["aadhaar_photo_url"] = request.build_absolute_uri(kyc.aadhaar_photo.url)
                 
                 return Response({
                     "user_id": target_user.id,
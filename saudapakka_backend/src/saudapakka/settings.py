@@ -24,6 +24,10 @@ environ.Env.read_env(os.path.join(BASE_DIR.parent.parent, '.env'))
 
 SECRET_KEY = env('SECRET_KEY')  # ❌ No default — must be set in .env or env vars
 
+# Server-side key for hashing external API key secrets (HMAC-SHA256).
+# Rotating it invalidates every issued API key.
+API_KEY_HASH_SECRET = env('API_KEY_HASH_SECRET', default=SECRET_KEY)
+
 DEBUG = env.bool('DEBUG', default=False)
 
 # Robust definition of ALLOWED_HOSTS
@@ -50,6 +54,8 @@ INSTALLED_APPS = [
     'corsheaders',
     
     # Custom Apps
+    'apps.core',
+    'apps.jobs',
     'apps.users',
     'apps.properties',
     'apps.mandates',
@@ -61,11 +67,11 @@ MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',  # WhiteNoise for static files
-    'django.contrib.sessions.middleware.SessionMiddleware',
+    'apps.core.middleware.ApiSessionMiddleware',  # SessionMiddleware, skipped for /api/
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
-    'django.contrib.messages.middleware.MessageMiddleware',
+    'apps.core.middleware.ApiMessageMiddleware',  # MessageMiddleware, skipped for /api/
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
@@ -107,6 +113,64 @@ DATABASES = {
 }
 
 
+# =============================================================================
+# CACHE (shared by all gunicorn workers)
+# =============================================================================
+
+# 'redis' when REDIS_URL is set, otherwise a Postgres UNLOGGED table ('postgres').
+# 'locmem' is per-process and only meant for local experiments.
+REDIS_URL = env('REDIS_URL', default='')
+CACHE_BACKEND = env('CACHE_BACKEND', default='redis' if REDIS_URL else 'postgres')
+
+_cache_backends = {
+    'redis': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': REDIS_URL,
+    },
+    'postgres': {
+        'BACKEND': 'apps.core.cache_backends.PostgresUnloggedCache',
+        'LOCATION': 'core_cache',
+        'OPTIONS': {'MAX_ENTRIES': 100000},
+    },
+    'locmem': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+}
+
+CACHES = {
+    'default': {
+        **_cache_backends[CACHE_BACKEND],
+        'KEY_PREFIX': env('CACHE_KEY_PREFIX', default='sp'),
+        'TIMEOUT': 300,
+    },
+}
+
+# Where throttle counters and API key token buckets live: 'redis', 'postgres'
+# (UNLOGGED core_ratelimit / core_tokenbucket tables)
+# or 'cache' (add/incr on CACHES['default']; only atomic for locmem).
+RATELIMIT_BACKEND = env('RATELIMIT_BACKEND', default={'redis': 'redis', 'postgres': 'postgres'}.get(CACHE_BACKEND, 'cache'))
+
+# Sessions are only used by the Django admin; the JSON API (JWT / API keys) never
+# loads or saves one (apps.core.middleware). Admin sessions read through the shared
+# cache; set SESSION_ENGINE=django.contrib.sessions.backends.signed_cookies for no rows at all.
+SESSION_ENGINE = env('SESSION_ENGINE', default='django.contrib.sessions.backends.cached_db')
+SESSIONLESS_PATH_PREFIXES = ['/api/', '/health/']
+
+# Admin flash messages ride in a signed cookie instead of the session
+MESSAGE_STORAGE = 'django.contrib.messages.storage.cookie.CookieStorage'
+
+# How long a stored response is replayed for a repeated Idempotency-Key
+IDEMPOTENCY_KEY_TTL = env.int('IDEMPOTENCY_KEY_TTL', default=24 * 3600)
+
+
+# =============================================================================
+# BACKGROUND JOBS (apps.jobs, run with 'manage.py run_worker')
+# =============================================================================
+
+# A job locked for longer than this is assumed lost with its worker and retried
+JOBS_LOCK_TIMEOUT = env.int('JOBS_LOCK_TIMEOUT', default=600)
+
+
 # =============================================================================
 # PASSWORD VALIDATION
 # =============================================================================
@@ -135,13 +199,55 @@ USE_TZ = True
 
 STATIC_URL = '/static/'
 STATIC_ROOT = BASE_DIR / 'staticfiles'
-STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 
 # MEDIA CONFIGURATION (Critical for Production Docker Setup)
-# Nginx serves /media/ from /app/media
+# Nginx serves /media/ from /app/media when STORAGE_BACKEND=filesystem
 MEDIA_URL = '/media/'
 MEDIA_ROOT = '/app/media'
 
+# Media backend for every FileField/ImageField: 'filesystem' (single host) or 's3' (S3/MinIO)
+STORAGE_BACKEND = env('STORAGE_BACKEND', default='filesystem')
+
+STORAGES = {
+    'default': {
+        'BACKEND': 'apps.core.storage.S3MediaStorage' if STORAGE_BACKEND == 's3' else 'apps.core.storage.FileSystemMediaStorage',
+    },
+    # Identity documents (KYC); see apps.core.storage.private_storage
+    'private': {
+        'BACKEND': 'apps.core.storage.S3MediaStorage' if STORAGE_BACKEND == 's3' else 'apps.core.storage.FileSystemMediaStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'whitenoise.storage.CompressedManifestStaticFilesStorage',
+    },
+}
+
+if STORAGE_BACKEND == 's3':
+    AWS_STORAGE_BUCKET_NAME = env('AWS_STORAGE_BUCKET_NAME', default='saudapakka-media')
+    AWS_ACCESS_KEY_ID = env('AWS_ACCESS_KEY_ID', default='')
+    AWS_SECRET_ACCESS_KEY = env('AWS_SECRET_ACCESS_KEY', default='')
+    AWS_S3_REGION_NAME = env('AWS_S3_REGION_NAME', default='ap-south-1')
+    AWS_S3_ENDPOINT_URL = env('AWS_S3_ENDPOINT_URL', default=None)  # e.g. http://minio:9000
+    AWS_S3_CUSTOM_DOMAIN = env('AWS_S3_CUSTOM_DOMAIN', default=None)  # CDN / public bucket host
+    AWS_S3_ADDRESSING_STYLE = env('AWS_S3_ADDRESSING_STYLE', default='path' if AWS_S3_ENDPOINT_URL else 'auto')
+    AWS_S3_SIGNATURE_VERSION = 's3v4'
+    AWS_LOCATION = env('AWS_LOCATION', default='media')
+    AWS_DEFAULT_ACL = None
+    AWS_S3_FILE_OVERWRITE = False
+    # Public media URLs (listing photos are served without signatures, same as /media/ today)
+    AWS_QUERYSTRING_AUTH = env.bool('AWS_QUERYSTRING_AUTH', default=False)
+    # KYC documents: own prefix, outside any public bucket policy, signed URLs only
+    AWS_PRIVATE_LOCATION = env('AWS_PRIVATE_LOCATION', default='private')
+    STORAGES['private']['OPTIONS'] = {
+        'location': AWS_PRIVATE_LOCATION,
+        'querystring_auth': True,
+        'querystring_expire': env.int('AWS_PRIVATE_URL_EXPIRY_SECONDS', default=600),
+        'custom_domain': None,
+        'default_acl': 'private',
+    }
+
+# Lifetime of presigned upload grants (/api/uploads/presign/)
+DIRECT_UPLOAD_EXPIRY_SECONDS = env.int('DIRECT_UPLOAD_EXPIRY_SECONDS', default=900)
+
 
 # =============================================================================
 # DEFAULT PRIMARY KEY
@@ -168,6 +274,10 @@ _from_email_raw = env('DEFAULT_FROM_EMAIL', default='SaudaPakka <qutubahmad3@gma
 _from_email_clean = _from_email_raw.replace('"', '').replace("'", "")
 DEFAULT_FROM_EMAIL = _from_email_clean
 
+# OTP mails are sent by the job worker ('email' queue) over a reused SMTP connection
+EMAIL_TIMEOUT = env.int('EMAIL_TIMEOUT', default=15)
+SMTP_IDLE_TIMEOUT = env.int('SMTP_IDLE_TIMEOUT', default=60)
+
 
 # =============================================================================
 # REST FRAMEWORK & JWT
@@ -178,19 +288,22 @@ REST_FRAMEWORK = {
         'rest_framework.renderers.JSONRenderer',
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        # SimpleJWT with a per-process user snapshot cache (no users query per request)
+        'apps.users.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',  # ✅ Secure default
     ],
+    # Sliding-window counters in the shared store (see RATELIMIT_BACKEND), shared by all workers
     'DEFAULT_THROTTLE_CLASSES': [
-        'rest_framework.throttling.AnonRateThrottle',
-        'rest_framework.throttling.UserRateThrottle'
+        'apps.core.throttling.AnonSlidingWindowThrottle',
+        'apps.core.throttling.UserSlidingWindowThrottle'
     ],
     'DEFAULT_THROTTLE_RATES': {
         'anon': '1000/hour',
         'user': '5000/hour',
-        'otp_request': '5/hour'
+        'otp_request': '5/hour',
+        'otp_email': '5/hour'
     }
 }
 
@@ -217,9 +330,13 @@ default_origins = [
     "http://127.0.0.1:3000",
 ]
 
+from corsheaders.defaults import default_headers
+
 CORS_ALLOW_ALL_ORIGINS = env.bool('CORS_ALLOW_ALL_ORIGINS', default=DEBUG)
 CORS_ALLOWED_ORIGINS = env.list('CORS_ALLOWED_ORIGINS', default=default_origins)
 CORS_ALLOW_CREDENTIALS = True
+CORS_ALLOW_HEADERS = (*default_headers, 'idempotency-key')
+CORS_EXPOSE_HEADERS = ['Idempotent-Replayed']
 
 # Trust the same origins for CSRF
 CSRF_TRUSTED_ORIGINS = env.list('CSRF_TRUSTED_ORIGINS', default=default_origins)
@@ -311,6 +428,17 @@ LOGGING = {
 SANDBOX_API_KEY = env('SANDBOX_API_KEY', default='')
 SANDBOX_API_SECRET = env('SANDBOX_API_SECRET', default='')
 SANDBOX_BASE_URL = env('SANDBOX_BASE_URL', default='https://api.sandbox.co.in')
+# Keep-alive connections per worker process (see apps.users.services.SandboxClient)
+SANDBOX_POOL_SIZE = env.int('SANDBOX_POOL_SIZE', default=10)
+
+# DigiLocker sessions are polled by a background job (apps.users.kyc):
+# first check after KYC_POLL_INITIAL_DELAY seconds, doubling up to KYC_POLL_MAX_DELAY,
+# giving up after KYC_POLL_TIMEOUT
+KYC_POLL_INITIAL_DELAY = env.int('KYC_POLL_INITIAL_DELAY', default=5)
+KYC_POLL_MAX_DELAY = env.int('KYC_POLL_MAX_DELAY', default=60)
+KYC_POLL_TIMEOUT = env.int('KYC_POLL_TIMEOUT', default=30 * 60)
+# Longest ?wait= on /api/kyc/verify-status/ (keep below the proxy read timeout)
+KYC_LONG_POLL_MAX_WAIT = env.int('KYC_LONG_POLL_MAX_WAIT', default=25)
 
 # =============================================================================
 # GOOGLE MAPS CONFIGURATION
@@ -318,6 +446,63 @@ SANDBOX_BASE_URL = env('SANDBOX_BASE_URL', default='https://api.sandbox.co.in')
 
 GOOGLE_MAPS_API_KEY = env('GOOGLE_MAPS_API_KEY', default='')
 
+# Geocoding (apps.properties.geocoding): 'google', or 'stub' for tests/local
+# development (deterministic coordinates, no network)
+GEOCODING_BACKEND = env('GEOCODING_BACKEND', default='google')
+GEOCODING_BASE_URL = env('GEOCODING_BASE_URL', default='https://maps.googleapis.com/maps/api/geocode/json')
+GEOCODING_TIMEOUT = env.float('GEOCODING_TIMEOUT', default=5.0)
+# Requests per second the geocode_properties backfill may send
+GEOCODING_RATE_LIMIT = env.float('GEOCODING_RATE_LIMIT', default=10.0)
+# "Not found" results are retried after this many days
+GEOCODING_NEGATIVE_CACHE_DAYS = env.int('GEOCODING_NEGATIVE_CACHE_DAYS', default=30)
+# GeoJSON FeatureCollection of ward/locality boundaries (manage.py assign_localities)
+LOCALITY_BOUNDARIES_PATH = env('LOCALITY_BOUNDARIES_PATH', default=str(BASE_DIR / 'data' / 'localities.geojson'))
+
+# =============================================================================
+# LISTING INDEX
+# =============================================================================
+
+# Per-process in-memory index of verified listings answering the browse
+# filters/counts (apps.properties.listing_index); Postgres only hydrates pages
+LISTING_INDEX_ENABLED = env.bool('LISTING_INDEX_ENABLED', default=True)
+# Seconds between incremental refreshes (how stale a browse result can be)
+LISTING_INDEX_REFRESH_INTERVAL = env.float('LISTING_INDEX_REFRESH_INTERVAL', default=5.0)
+# Seconds between full rebuilds, which pick up rows whose transaction committed
+# too late for the incremental refresh's updated_at overlap window
+LISTING_INDEX_REBUILD_INTERVAL = env.float('LISTING_INDEX_REBUILD_INTERVAL', default=600.0)
+# Build listing list payloads from values() rows instead of model instances +
+# PropertySerializer (apps.properties.fast_read); same output, opt-in
+FAST_LIST_SERIALIZATION = env.bool('FAST_LIST_SERIALIZATION', default=False)
+
+# =============================================================================
+# RANKING
+# =============================================================================
+
+# Default listing order (apps.properties.ranking). Boosts are measured in
+# freshness half-lives: priority=2 ranks a listing like one 60 days newer.
+# Run manage.py refresh_rank_scores after changing these.
+RANKING_WEIGHTS = {
+    'freshness_half_life_days': env.float('RANKING_FRESHNESS_HALF_LIFE_DAYS', default=30.0),
+    'priority': env.float('RANKING_PRIORITY_WEIGHT', default=2.0),
+    'featured': env.float('RANKING_FEATURED_WEIGHT', default=1.0),
+    'completeness': env.float('RANKING_COMPLETENESS_WEIGHT', default=1.0),
+    'engagement': env.float('RANKING_ENGAGEMENT_WEIGHT', default=0.5),
+    # Added at query time for ?search= when every searched field matches
+    'text': env.float('RANKING_TEXT_WEIGHT', default=3.0),
+}
+# Seconds between full re-scores by the job worker (views feed in, weights apply)
+RANKING_REFRESH_INTERVAL = env.int('RANKING_REFRESH_INTERVAL', default=3600)
+
+# =============================================================================
+# HOME FEED
+# =============================================================================
+
+# /api/feed/home/ is served from the HomeFeedItem table, rebuilt by
+# the job worker every HOME_FEED_REFRESH_INTERVAL seconds (or manage.py refresh_home_feed)
+HOME_FEED_REFRESH_INTERVAL = env.int('HOME_FEED_REFRESH_INTERVAL', default=300)
+HOME_FEED_SIZE = env.int('HOME_FEED_SIZE', default=12)  # cards per carousel
+HOME_FEED_CITIES = env.int('HOME_FEED_CITIES', default=6)  # largest cities that get their own carousel
+
 # File upload settings
 DATA_UPLOAD_MAX_MEMORY_SIZE = 10485760  # 10MB per file
 FILE_UPLOAD_MAX_MEMORY_SIZE = 10485760  # 10MB per file
@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'saudapakka.settings')
 
 application = get_wsgi_application()
+
+# Build this worker's in-memory listing index now rather than on the first browse request
+from apps.properties.listing_index import warm_up  # noqa: E402
+
+warm_up()